@@ -0,0 +1,163 @@
+# Copyright 2021 DAI FOUNDATION (the original version https://github.com/daifoundation/ethtx_ce)
+# Copyright 2021-2022 Token Flow Insights SA (modifications to the original software as recorded
+# in the changelog https://github.com/EthTx/ethtx/blob/master/CHANGELOG.md)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# The product contains trademarks and other branding elements of Token Flow Insights SA which are
+# not licensed under the Apache 2.0 license. When using or reproducing the code, please remove
+# the trademark and/or other branding elements.
+
+
+"""Compile contract ABI to the ethtx semantics."""
+
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ethtx.models.semantics_model import (
+    AddressSemantics,
+    ContractSemantics,
+    ERC20Semantics,
+    EventSemantics,
+    FunctionSemantics,
+    ParameterSemantics,
+)
+from eth_hash.auto import keccak
+
+# code hash of the account without code
+EOA_CODE_HASH = "0xc5d2460186f7233c927e7db2dcc703c0e500b653ca82273b7bfad8045d85a470"
+
+
+@lru_cache(maxsize=16384)
+def signature_hash(canonical: str) -> str:
+    """Keccak of the canonical signature, e.g. `transfer(address,uint256)`. Memoized, as most contracts share them."""
+    return "0x" + keccak(canonical.encode()).hex()
+
+
+def compile_parameters(
+    parameters: Iterable[Dict],
+) -> Tuple[str, List[ParameterSemantics]]:
+    """Canonical types tuple, e.g. `(address,(uint256,bytes)[])`, and semantics of ABI parameters."""
+    types = []
+    semantics = []
+
+    for parameter in parameters:
+        parameter_type = parameter["type"]
+        components = []
+
+        if parameter_type.startswith("tuple"):
+            canonical, components = compile_parameters(parameter["components"])
+            types.append(canonical + parameter_type[5:])
+        else:
+            types.append(parameter_type)
+
+        if parameter_type in ("string", "bytes") or parameter_type.endswith("[]"):
+            dynamic = True
+        elif parameter_type == "tuple":
+            dynamic = any(component.dynamic for component in components)
+        else:
+            dynamic = False
+
+        semantics.append(
+            ParameterSemantics.construct(
+                parameter_name=parameter.get("name") or "",
+                parameter_type=parameter_type,
+                components=components,
+                indexed=parameter.get("indexed", False),
+                dynamic=dynamic,
+            )
+        )
+
+    return "(" + ",".join(types) + ")", semantics
+
+
+def compile_abi(
+    abi: Iterable[Dict],
+) -> Tuple[Dict[str, FunctionSemantics], Dict[str, EventSemantics]]:
+    """
+    Functions semantics by selector and events semantics by topic of the contract ABI.
+    Models are constructed without validation, types of their fields are given by the compiler.
+    """
+    functions = {}
+    events = {}
+
+    for item in abi:
+        item_type = item.get("type")
+
+        if item_type == "constructor":
+            _, inputs = compile_parameters(item.get("inputs", []))
+            functions["constructor"] = FunctionSemantics.construct(
+                signature="constructor", name="constructor", inputs=inputs, outputs=[]
+            )
+
+        elif item_type == "function":
+            canonical, inputs = compile_parameters(item.get("inputs", []))
+            _, outputs = compile_parameters(item.get("outputs", []))
+            selector = signature_hash(item["name"] + canonical)[:10]
+            functions[selector] = FunctionSemantics.construct(
+                signature=selector, name=item["name"], inputs=inputs, outputs=outputs
+            )
+
+        elif item_type == "event":
+            canonical, parameters = compile_parameters(item.get("inputs", []))
+            topic = signature_hash(item["name"] + canonical)
+            events[topic] = EventSemantics.construct(
+                signature=topic,
+                name=item["name"],
+                anonymous=item.get("anonymous", False),
+                parameters=parameters,
+            )
+
+    return functions, events
+
+
+def compile_semantics(
+    chain_id: str,
+    address: str,
+    abi: Optional[List[Dict]],
+    code_hash: Optional[str] = None,
+    name: Optional[str] = None,
+    standard: Optional[Dict] = None,
+) -> AddressSemantics:
+    """
+    Address semantics of the contract ABI. Address without ABI is an EOA.
+    Standard is `{"name": "ERC20", "data": {"name": ..., "symbol": ..., "decimals": ...}}`.
+    """
+    standard = standard or {}
+    name = name or address
+
+    if abi:
+        if not code_hash:
+            raise ValueError(f"Code hash of contract {address} is missing.")
+
+        functions, events = compile_abi(abi)
+        contract = ContractSemantics(
+            code_hash=code_hash, name=name, functions=functions, events=events
+        )
+    else:
+        contract = ContractSemantics(code_hash=EOA_CODE_HASH, name="EOA")
+
+    erc20 = None
+    if standard.get("name") == "ERC20":
+        data = standard.get("data") or {}
+        erc20 = ERC20Semantics(
+            name=data.get("name"),
+            symbol=data.get("symbol"),
+            decimals=data.get("decimals"),
+        )
+
+    return AddressSemantics(
+        chain_id=chain_id,
+        address=address,
+        name=name,
+        is_contract=bool(abi),
+        contract=contract,
+        standard=standard.get("name"),
+        erc20=erc20,
+    )
@@ -23,7 +23,11 @@ from flask import Flask
 
 from .. import factory
 from .decorators import auth_required
+from ..decoding import init_decoding
 from ..helpers import read_ethtx_versions
+from ..semantics_cache import init_semantics_cache
+from ..jobs import create_job_queue
+from .version_info import VersionInfo
 
 
 def create_app(
@@ -36,6 +40,10 @@ def create_app(
 
     app.ethtx = engine  # init ethtx engine
     read_ethtx_versions(app)
+    init_decoding(app, engine)
+    init_semantics_cache(app, engine)
+    app.jobs = create_job_queue(app.config)
+    app.version_info = VersionInfo.from_config(app.config)
 
     return app
 
@@ -0,0 +1,164 @@
+# Copyright 2021 DAI FOUNDATION (the original version https://github.com/daifoundation/ethtx_ce)
+# Copyright 2021-2022 Token Flow Insights SA (modifications to the original software as recorded
+# in the changelog https://github.com/EthTx/ethtx/blob/master/CHANGELOG.md)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# The product contains trademarks and other branding elements of Token Flow Insights SA which are
+# not licensed under the Apache 2.0 license. When using or reproducing the code, please remove
+# the trademark and/or other branding elements.
+
+import base64
+import binascii
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from ethtx.models.decoded_model import DecodedCall
+
+from ..exceptions import MalformedRequest
+
+
+def call_tree(call: Optional[DecodedCall], max_depth: int = 0) -> Optional[Dict]:
+    """
+    Convert call tree to dicts without recursion.
+    :param max_depth: subcalls of calls at this depth are cut and the calls marked with `subcalls_truncated` (0 - no limit)
+    """
+    if call is None:
+        return None
+
+    root = _call_dict(call)
+    stack = [(call, root, 1)]
+    while stack:
+        call, node, depth = stack.pop()
+        node["subcalls"] = []
+        if call.subcalls and max_depth and depth >= max_depth:
+            node["subcalls_truncated"] = True
+            continue
+
+        for subcall in call.subcalls:
+            child = _call_dict(subcall)
+            node["subcalls"].append(child)
+            stack.append((subcall, child, depth + 1))
+
+    return root
+
+
+def calls_page(
+    call: Optional[DecodedCall],
+    cursor: Optional[str] = None,
+    limit: int = 500,
+    max_depth: int = 0,
+) -> Dict[str, Any]:
+    """
+    Page of the flattened call tree, calls are listed depth first with their parent id, depth
+    and number of subcalls. The cursor holds the path (child indices from the root) of the next call,
+    the walk resumes there, so only the calls of the page and their ancestors are visited.
+    :param cursor: `next_cursor` of the previous page, None for the first page
+    """
+    if call is None:
+        stack = []
+    elif cursor:
+        stack = _resume(call, decode_cursor(cursor), max_depth, cursor)
+    else:
+        stack = [(call, None, 1, None)]
+
+    calls: List[Dict] = []
+    walk = _walk(stack, max_depth)
+    for call, parent_id, depth, _ in islice(walk, limit):
+        calls.append(
+            {
+                **_call_dict(call),
+                "parent_id": parent_id,
+                "depth": depth,
+                "subcalls_count": len(call.subcalls),
+            }
+        )
+
+    following = next(walk, None) if len(calls) == limit else None
+    return {
+        "calls": calls,
+        "next_cursor": encode_cursor(_path(following[3])) if following else None,
+    }
+
+
+def encode_cursor(path: List[int]) -> str:
+    position = ".".join(str(index) for index in path)
+    return base64.urlsafe_b64encode(f"calls:{position}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> List[int]:
+    try:
+        prefix, position = base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+        path = [int(index) for index in position.split(".")] if position else []
+        if prefix == "calls" and all(index >= 0 for index in path):
+            return path
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        pass
+
+    raise MalformedRequest(f"Invalid cursor: {cursor}.")
+
+
+# path of child indices from the root, linked to the parent path, so calls do not copy the path of their parent
+_Path = Optional[Tuple["_Path", int]]
+# walk stack items: call, parent call id, depth and path
+_StackItem = Tuple[DecodedCall, Optional[str], int, _Path]
+
+
+def _walk(stack: List[_StackItem], max_depth: int) -> Iterator[_StackItem]:
+    while stack:
+        call, parent_id, depth, path = item = stack.pop()
+        yield item
+
+        if not max_depth or depth < max_depth:
+            stack.extend(
+                (call.subcalls[index], call.call_id, depth + 1, (path, index))
+                for index in range(len(call.subcalls) - 1, -1, -1)
+            )
+
+
+def _resume(
+    root: DecodedCall, path: List[int], max_depth: int, cursor: str
+) -> List[_StackItem]:
+    """
+    Walk stack positioned at the call of the path: the call on top, below it the following siblings
+    of the call and of its ancestors, which the walk visits after the subtree of the call.
+    """
+    if max_depth and len(path) >= max_depth:
+        raise MalformedRequest(f"Invalid cursor: {cursor}.")
+
+    stack = []
+    call, parent_id, call_path = root, None, None
+    for depth, index in enumerate(path, 2):
+        if index >= len(call.subcalls):
+            raise MalformedRequest(f"Invalid cursor: {cursor}.")
+
+        stack.extend(
+            (call.subcalls[sibling], call.call_id, depth, (call_path, sibling))
+            for sibling in range(len(call.subcalls) - 1, index, -1)
+        )
+        call, parent_id, call_path = (
+            call.subcalls[index],
+            call.call_id,
+            (call_path, index),
+        )
+
+    stack.append((call, parent_id, len(path) + 1, call_path))
+    return stack
+
+
+def _path(path: _Path) -> List[int]:
+    indices = []
+    while path is not None:
+        path, index = path
+        indices.append(index)
+    return indices[::-1]
+
+
+def _call_dict(call: DecodedCall) -> Dict:
+    return call.dict(exclude={"subcalls"})
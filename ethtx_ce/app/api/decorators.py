@@ -18,8 +18,7 @@ import logging
 from functools import wraps
 from typing import Callable, Optional
 
-import jsonpickle
-from flask import request, current_app, jsonify
+from flask import Response, request, current_app, jsonify
 
 from ..exceptions import (
     AuthorizationError,
@@ -27,12 +26,11 @@ from ..exceptions import (
     UnexpectedError,
     InternalError,
 )
-from .utils import enable_direct, delete_bstrings
+from .formats import negotiate_format
+from .utils import enable_direct, jsonable
 
 log = logging.getLogger(__name__)
 
-jsonpickle.set_decoder_options('simplejson', use_decimal=True)
-
 
 def auth_required(func: Callable):
     """api key  verification."""
@@ -52,6 +50,7 @@ def response(status: Optional[int] = 200):
     """
     Return response with:
     :param status: response status code, default: `200`
+    Response is json, or MessagePack / CBOR when preferred by the `Accept` header.
     """
 
     def _response(f: Callable):
@@ -60,14 +59,15 @@ def response(status: Optional[int] = 200):
             func = f(*args, **kwargs)
 
             try:
-                data = jsonify(
-                    delete_bstrings(
-                        jsonpickle.decode(
-                            jsonpickle.encode(func, make_refs=False, unpicklable=False, use_decimal=True)
-                        )
+                response_format = negotiate_format(request)
+                if response_format is None:
+                    data = jsonify(jsonable(func))
+                else:
+                    data = Response(
+                        response_format.dumps(func), mimetype=response_format.mimetype
                     )
-                )
-            except TypeError as e:
+                data.vary.add("Accept")
+            except (TypeError, OverflowError) as e:
                 log.critical("Response cannot be serialized. %s", e)
                 raise InternalError()
             except Exception as e:
@@ -14,6 +14,8 @@
 # not licensed under the Apache 2.0 license. When using or reproducing the code, please remove
 # the trademark and/or other branding elements.
 
+from .blocks import blocks_bp
 from .info import info_bp
+from .jobs import jobs_bp
 from .semantics import semantics_bp
 from .transactions import transactions_bp
@@ -0,0 +1,61 @@
+# Copyright 2021 DAI FOUNDATION (the original version https://github.com/daifoundation/ethtx_ce)
+# Copyright 2021-2022 Token Flow Insights SA (modifications to the original software as recorded
+# in the changelog https://github.com/EthTx/ethtx/blob/master/CHANGELOG.md)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# The product contains trademarks and other branding elements of Token Flow Insights SA which are
+# not licensed under the Apache 2.0 license. When using or reproducing the code, please remove
+# the trademark and/or other branding elements.
+
+import logging
+from typing import Optional
+
+from flask import Blueprint, current_app
+
+from .. import api_route
+from ..utils import stream_ndjson
+from .transactions import decoded_items
+
+log = logging.getLogger(__name__)
+blocks_bp = Blueprint("api_blocks", __name__)
+
+
+@api_route(blocks_bp, "/blocks/<int:block_number>")
+@api_route(blocks_bp, "/blocks/<string:chain_id>/<int:block_number>")
+def read_decoded_block(block_number: int, chain_id: Optional[str] = None):
+    """Decode all block transactions, stream results as NDJSON in transaction index order."""
+    chain_id = chain_id or current_app.ethtx.default_chain
+    block = current_app.ethtx.providers.web3provider.get_block(block_number, chain_id)
+
+    tx_hashes = []
+    for transaction in block.transactions:
+        tx_hash = transaction.hex() if isinstance(transaction, bytes) else transaction
+        tx_hashes.append(tx_hash if tx_hash.startswith("0x") else "0x" + tx_hash)
+
+    log.info(
+        "Decoding %s transactions of block %s / %s.",
+        len(tx_hashes),
+        block_number,
+        chain_id,
+    )
+
+    return stream_ndjson(
+        {"block_number": block_number, "tx_index": tx_index, **item}
+        for tx_index, item in enumerate(
+            decoded_items(
+                current_app.ethtx,
+                chain_id,
+                tx_hashes,
+                current_app.config["BLOCK_DECODE_CONCURRENCY"],
+                ordered=True,
+                block=block,
+            )
+        )
+    )
@@ -18,7 +18,7 @@ from flask import Blueprint, current_app
 
 from .. import api_route
 from ..decorators import response
-from ...helpers import get_latest_ethtx_version
+from ...semantics_cache import CachedSemanticsDatabase
 
 info_bp = Blueprint("api_info", __name__)
 
@@ -28,11 +28,11 @@ info_bp = Blueprint("api_info", __name__)
 def read_info():
     """Get info."""
     ethtx_version = current_app.config["ethtx_version"]
-    latest_ethtx_version = get_latest_ethtx_version()
+    latest_ethtx_version = current_app.version_info.latest_ethtx_version
 
     ethtx_ce_version = current_app.config["ethtx_ce_version"]
 
-    return {
+    info = {
         "ethtx": {
             "version": ethtx_version,
             "is_latest": ethtx_version == latest_ethtx_version,
@@ -41,3 +41,9 @@ def read_info():
             "version": ethtx_ce_version,
         },
     }
+
+    database = current_app.ethtx.semantics.database
+    if isinstance(database, CachedSemanticsDatabase):
+        info["semantics_cache"] = database.stats()
+
+    return info
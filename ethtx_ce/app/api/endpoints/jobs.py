@@ -0,0 +1,67 @@
+# Copyright 2021 DAI FOUNDATION (the original version https://github.com/daifoundation/ethtx_ce)
+# Copyright 2021-2022 Token Flow Insights SA (modifications to the original software as recorded
+# in the changelog https://github.com/EthTx/ethtx/blob/master/CHANGELOG.md)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# The product contains trademarks and other branding elements of Token Flow Insights SA which are
+# not licensed under the Apache 2.0 license. When using or reproducing the code, please remove
+# the trademark and/or other branding elements.
+
+import json
+
+from flask import Blueprint, current_app, request
+
+from .. import api_route
+from ..decorators import response
+from ...exceptions import EmptyResponseError, MalformedRequest
+
+jobs_bp = Blueprint("api_jobs", __name__)
+
+
+@api_route(jobs_bp, "/jobs", methods=["POST"])
+@response(202)
+def create_decode_job():
+    """Queue transaction decode, return job immediately."""
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or not isinstance(payload.get("tx_hash"), str):
+        raise MalformedRequest("Expected JSON object with `tx_hash`.")
+
+    tx_hash = payload["tx_hash"]
+    tx_hash = tx_hash if tx_hash.startswith("0x") else "0x" + tx_hash
+    chain_id = payload.get("chain_id") or current_app.ethtx.default_chain
+
+    return current_app.jobs.enqueue(chain_id, tx_hash).dict()
+
+
+@api_route(jobs_bp, "/jobs/<string:job_id>")
+@response(200)
+def read_decode_job(job_id: str):
+    """Get job status."""
+    job = current_app.jobs.get(job_id)
+    if job is None:
+        raise EmptyResponseError(f"Job {job_id} does not exist.")
+
+    return job.dict()
+
+
+@api_route(jobs_bp, "/jobs/<string:job_id>/result")
+@response(200)
+def read_decode_job_result(job_id: str):
+    """Get decoded transaction of the done job."""
+    result = current_app.jobs.result(job_id)
+    if result is None:
+        job = current_app.jobs.get(job_id)
+        raise EmptyResponseError(
+            f"Job {job_id} has no result, status: {job.status.value}."
+            if job
+            else f"Job {job_id} does not exist."
+        )
+
+    return json.loads(result)
@@ -14,15 +14,37 @@
 # not licensed under the Apache 2.0 license. When using or reproducing the code, please remove
 # the trademark and/or other branding elements.
 
-from typing import Optional
+from collections import defaultdict
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 
-from flask import Blueprint, current_app
+from ethtx.models.semantics_model import ContractSemantics
+from ethtx.semantics.protocols_router import amend_contract_semantics
+from flask import Blueprint, current_app, request
+from werkzeug.wsgi import get_input_stream
 
 from .. import api_route
-from ..decorators import response
+from ..decorators import limit_content_length, response
+from ..exceptions import item_error
+from ..utils import jsonable, stream_ndjson
+from ...abi import EOA_CODE_HASH
+from ...exceptions import EmptyResponseError, MalformedRequest, PayloadTooLarge
+from ...semantics_cache import invalidate_semantics
+from ...semantics_import import import_semantics, read_records
 
 semantics_bp = Blueprint("api_semantics", __name__)
 
+ADDRESS_FIELDS = (
+    "chain_id",
+    "address",
+    "name",
+    "is_contract",
+    "contract",
+    "standard",
+    "erc20",
+)
+CONTRACT_FIELDS = ("code_hash", "name", "events", "functions", "transformations")
+
 
 @api_route(semantics_bp, "/semantics/<string:address>")
 @api_route(semantics_bp, "/semantics/<string:chain_id>/<string:address>")
@@ -33,3 +55,253 @@ def read_raw_semantic(address: str, chain_id: Optional[str] = None):
         chain_id=chain_id, address=address
     )
     return raw_semantics.dict()
+
+
+@api_route(semantics_bp, "/semantics/batch", methods=["POST"])
+@limit_content_length
+def read_raw_semantics_batch():
+    """
+    Get raw semantics of many addresses, stream them as NDJSON in the requested order.
+    Only stored semantics are returned, missing ones are reported as not found.
+    """
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or not isinstance(payload.get("addresses"), list):
+        raise MalformedRequest("Expected JSON object with `addresses` list.")
+
+    default_chain = current_app.ethtx.default_chain
+    addresses = []
+    for item in payload["addresses"]:
+        if isinstance(item, dict):
+            item = (item.get("chain_id"), item.get("address"))
+        if isinstance(item, str):
+            item = (None, item)
+        if (
+            not isinstance(item, (list, tuple))
+            or len(item) != 2
+            or not isinstance(item[1], str)
+        ):
+            raise MalformedRequest(
+                "Expected `addresses` items as address, [chain_id, address] or {chain_id, address}."
+            )
+        addresses.append((item[0] or default_chain, item[1].lower()))
+    addresses = list(dict.fromkeys(addresses))
+
+    max_size = current_app.config["SEMANTICS_BATCH_MAX_SIZE"]
+    if not addresses or len(addresses) > max_size:
+        raise MalformedRequest(
+            f"Expected from 1 to {max_size} addresses, got {len(addresses)}."
+        )
+
+    return stream_ndjson(
+        semantics_items(
+            current_app.ethtx.semantics.database,
+            addresses,
+            semantics_fields(payload.get("fields")),
+        )
+    )
+
+
+def semantics_fields(
+    fields: Optional[List[str]],
+) -> Optional[Dict[str, Optional[Set[str]]]]:
+    """
+    Requested address semantics fields and contract fields (e.g. `contract.name`) of each, None for all of them.
+    """
+    if fields is None:
+        return None
+
+    known = ADDRESS_FIELDS + tuple(f"contract.{field}" for field in CONTRACT_FIELDS)
+    unknown = (
+        [str(field) for field in fields if field not in known]
+        if isinstance(fields, list)
+        else [str(fields)]
+    )
+    if not fields or unknown:
+        raise MalformedRequest(
+            f"Expected `fields` from: {', '.join(known)}, got: {', '.join(sorted(unknown)) or 'none'}."
+        )
+
+    projection: Dict[str, Optional[Set[str]]] = {}
+    for field in fields:
+        field, _, contract_field = field.partition(".")
+        if contract_field and projection.get(field, set()) is not None:
+            projection.setdefault(field, set()).add(contract_field)
+        else:
+            projection[field] = None
+
+    return projection
+
+
+def semantics_items(
+    database,
+    addresses: List[Tuple[str, str]],
+    fields: Optional[Dict[str, Optional[Set[str]]]],
+) -> Iterator[Dict]:
+    """
+    Look up stored semantics of addresses and their contracts in bulk, return streamed response entries.
+    Lookups run before the response is streamed, so their errors are handled like in other endpoints.
+    """
+    records = database.get_many_address_semantics(addresses)
+
+    contracts = {}
+    if fields is None or "contract" in fields:
+        contracts = database.get_many_contract_semantics(
+            {
+                record["contract"]
+                for record in records.values()
+                if record["contract"] != EOA_CODE_HASH
+            }
+        )
+
+    return _semantics_items(addresses, fields, records, contracts)
+
+
+def _semantics_items(
+    addresses: List[Tuple[str, str]],
+    fields: Optional[Dict[str, Optional[Set[str]]]],
+    records: Dict[Tuple[str, str], Dict],
+    contracts: Dict[str, Dict],
+) -> Iterator[Dict]:
+    for chain_id, address in addresses:
+        item = {"chain_id": chain_id, "address": address}
+        record = records.get((chain_id, address))
+        if record is None:
+            yield {
+                **item,
+                **item_error(EmptyResponseError(f"Semantics of {address} not found.")),
+            }
+            continue
+
+        result = {
+            field: record.get(field)
+            for field in (fields or ADDRESS_FIELDS)
+            if field != "contract"
+        }
+        if fields is None or "contract" in fields:
+            contract = _contract_semantics(
+                record["contract"], contracts.get(record["contract"])
+            )
+            if contract is None:
+                error = EmptyResponseError(
+                    f"Contract semantics {record['contract']} of {address} not found."
+                )
+                yield {**item, **item_error(error)}
+                continue
+
+            result["contract"] = {
+                field: value
+                for field, value in contract.items()
+                if not fields
+                or fields["contract"] is None
+                or field in fields["contract"]
+            }
+
+        yield {**item, "status": 200, "result": jsonable(result)}
+
+
+def _contract_semantics(code_hash: str, record: Optional[Dict]) -> Optional[Dict]:
+    """Contract semantics record with local amendments, as returned by the EthTx semantics repository."""
+    if code_hash == EOA_CODE_HASH:
+        return ContractSemantics(code_hash=code_hash, name="EOA").dict()
+    if record is None:
+        return None
+
+    # copy maps of the cached record, amendments are set in them
+    contract = ContractSemantics.construct(
+        code_hash=record["code_hash"],
+        name=record["name"],
+        events=dict(record.get("events") or {}),
+        functions=dict(record.get("functions") or {}),
+        transformations=dict(record.get("transformations") or {}),
+    )
+    amend_contract_semantics(contract)
+    return contract.dict()
+
+
+@api_route(semantics_bp, "/signatures/<string:signature_hash>")
+@response(200)
+def read_signatures(signature_hash: str):
+    """Get candidate signatures of function selector (4 bytes) or event topic (32 bytes), most used first."""
+    signature_hash = signature_hash.lower()
+    signature_hash = (
+        signature_hash if signature_hash.startswith("0x") else "0x" + signature_hash
+    )
+    if len(signature_hash) not in (10, 66):
+        raise MalformedRequest(
+            f"Expected 4 bytes function selector or 32 bytes event topic, got {signature_hash}."
+        )
+
+    signatures = getattr(current_app.ethtx.semantics.database, "signatures", None)
+    if signatures is None or not signatures.loaded:
+        raise EmptyResponseError("Signature index is not loaded.")
+
+    kind = "function" if len(signature_hash) == 10 else "event"
+    candidates = (
+        signatures.functions(signature_hash)
+        if kind == "function"
+        else signatures.events(signature_hash)
+    )
+    if not candidates:
+        raise EmptyResponseError(f"Signature {signature_hash} not found.")
+
+    return {
+        "signature_hash": signature_hash,
+        "type": kind,
+        "candidates": [
+            {key: value for key, value in candidate.items() if key != "_id"}
+            for candidate in sorted(candidates, key=lambda c: -c["count"])
+        ],
+    }
+
+
+@api_route(semantics_bp, "/semantics/import", methods=["POST"])
+@response(200)
+def import_raw_semantics():
+    """
+    Import semantics of contracts from NDJSON records with ABI, written with bulk operations in batches.
+    Invalid records are reported and skipped.
+    """
+    max_length = current_app.config["SEMANTICS_IMPORT_MAX_CONTENT_LENGTH"]
+    if request.content_length and request.content_length > max_length:
+        raise PayloadTooLarge(request.content_length, max_length)
+
+    # `request.stream` enforces the app MAX_CONTENT_LENGTH (Werkzeug 2.3+), which the per-request limit
+    # replaces only from Flask 3.1, so the body is read from the WSGI input limited to its content length
+    try:
+        request.max_content_length = max_length
+    except AttributeError:
+        pass
+    body = get_input_stream(request.environ)
+
+    ethtx = current_app.ethtx
+    database = ethtx.semantics.database
+    batch_size = current_app.config["SEMANTICS_IMPORT_BATCH_SIZE"]
+
+    totals = defaultdict(int)
+    errors = []
+    records = read_records(body, ethtx.default_chain)
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            break
+
+        semantics = []
+        for line, address_semantics, error in batch:
+            if error:
+                errors.append({"line": line, **item_error(error)})
+            else:
+                semantics.append(address_semantics)
+
+        for key, value in import_semantics(database, semantics).items():
+            totals[key] += value
+
+        addresses = defaultdict(list)
+        for address_semantics in semantics:
+            addresses[address_semantics.chain_id].append(address_semantics.address)
+        for chain_id, chain_addresses in addresses.items():
+            invalidate_semantics(chain_id, chain_addresses)
+
+    if not totals and not errors:
+        raise MalformedRequest("Expected NDJSON records of contract semantics.")
+
+    return {**totals, "errors": errors}
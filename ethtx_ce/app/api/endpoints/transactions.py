@@ -15,12 +15,27 @@
 # the trademark and/or other branding elements.
 
 import logging
-from typing import Optional
+from typing import Dict, Iterator, List, Optional, Set
 
-from flask import Blueprint, current_app
+from ethtx import EthTx
+from ethtx.models.w3_model import W3Block
+from flask import Blueprint, current_app, request
 
 from .. import api_route
-from ..decorators import response
+from ..calls import call_tree, calls_page
+from ..decorators import response, limit_content_length
+from ..exceptions import item_error
+from ..utils import jsonable, stream_ndjson
+from ...decoding import (
+    FULL,
+    LITE,
+    SECTION_STAGES,
+    decode_transaction,
+    decode_transaction_lite,
+    decode_transactions,
+    format_transaction,
+)
+from ...exceptions import MalformedRequest
 
 log = logging.getLogger(__name__)
 transactions_bp = Blueprint("api_transactions", __name__)
@@ -30,14 +45,148 @@ transactions_bp = Blueprint("api_transactions", __name__)
 @api_route(transactions_bp, "/transactions/<string:chain_id>/<string:tx_hash>")
 @response(200)
 def read_decoded_transaction(tx_hash: str, chain_id: Optional[str] = None):
-    """Decode transaction."""
+    """
+    Decode transaction, optionally only the sections listed in `fields`.
+    With `mode=lite` transactions not decoded yet are decoded from the receipt, without calls,
+    the response `mode` tells which decode produced it.
+    """
     tx_hash = tx_hash if tx_hash.startswith("0x") else "0x" + tx_hash
+    fields = requested_fields()
+    mode = request.args.get("mode")
+    if mode not in (None, FULL, LITE):
+        raise MalformedRequest(f"Expected `mode` {FULL} or {LITE}, got {mode}.")
 
     chain_id = chain_id or current_app.ethtx.default_chain
-    decoded_transaction = current_app.ethtx.decoders.decode_transaction(
-        chain_id=chain_id, tx_hash=tx_hash
+    max_depth = request.args.get("max_depth", 0, type=int)
+
+    if mode == LITE:
+        decoded_transaction, mode = decode_transaction_lite(
+            current_app.ethtx, chain_id=chain_id, tx_hash=tx_hash
+        )
+    else:
+        decoded_transaction = decode_transaction(
+            current_app.ethtx, chain_id=chain_id, tx_hash=tx_hash, sections=fields
+        )
+
+    decoded_transaction = format_transaction(decoded_transaction)
+    result = decoded_transaction.dict(include=fields, exclude={"calls"})
+    if fields is None or "calls" in fields:
+        result["calls"] = call_tree(decoded_transaction.calls, max_depth)
+    if mode is not None:
+        result["mode"] = mode
+
+    return result
+
+
+@api_route(
+    transactions_bp,
+    f"/transactions/<string:chain_id>/<string:tx_hash>/<any({', '.join(SECTION_STAGES)}):section>",
+)
+@response(200)
+def read_decoded_transaction_section(chain_id: str, tx_hash: str, section: str):
+    """Decode transaction section."""
+    tx_hash = tx_hash if tx_hash.startswith("0x") else "0x" + tx_hash
+
+    decoded_transaction = decode_transaction(
+        current_app.ethtx, chain_id=chain_id, tx_hash=tx_hash, sections={section}
+    )
+    if section == "calls":
+        max_depth = request.args.get("max_depth", 0, type=int)
+        return call_tree(decoded_transaction.calls, max_depth)
+
+    return format_transaction(decoded_transaction).dict(include={section})[section]
+
+
+@api_route(
+    transactions_bp, "/transactions/<string:chain_id>/<string:tx_hash>/calls/flat"
+)
+@response(200)
+def read_decoded_transaction_calls_page(chain_id: str, tx_hash: str):
+    """Page of the flattened call tree, continued with the `next_cursor` of the previous page."""
+    tx_hash = tx_hash if tx_hash.startswith("0x") else "0x" + tx_hash
+    max_size = current_app.config["CALLS_PAGE_MAX_SIZE"]
+    limit = request.args.get("limit", current_app.config["CALLS_PAGE_SIZE"], type=int)
+    if not 0 < limit <= max_size:
+        raise MalformedRequest(f"Expected `limit` from 1 to {max_size}, got {limit}.")
+
+    decoded_transaction = decode_transaction(
+        current_app.ethtx, chain_id=chain_id, tx_hash=tx_hash, sections={"calls"}
+    )
+    return calls_page(
+        decoded_transaction.calls,
+        cursor=request.args.get("cursor"),
+        limit=limit,
+        max_depth=request.args.get("max_depth", 0, type=int),
+    )
+
+
+def requested_fields() -> Optional[Set[str]]:
+    """Sections listed in the comma separated `fields` query parameter, None if not given."""
+    if "fields" not in request.args:
+        return None
+
+    fields = {field.strip() for field in request.args["fields"].split(",")} - {""}
+    unknown = fields - SECTION_STAGES.keys()
+    if not fields or unknown:
+        raise MalformedRequest(
+            f"Expected `fields` from: {', '.join(SECTION_STAGES)}, got: {', '.join(sorted(unknown)) or 'none'}."
+        )
+
+    return fields
+
+
+@api_route(transactions_bp, "/transactions/batch", methods=["POST"])
+@limit_content_length
+def read_decoded_transactions_batch():
+    """Decode transactions concurrently, stream results as NDJSON in completion order."""
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or not isinstance(payload.get("tx_hashes"), list):
+        raise MalformedRequest("Expected JSON object with `tx_hashes` list.")
+
+    tx_hashes = list(
+        dict.fromkeys(
+            tx_hash if tx_hash.startswith("0x") else "0x" + tx_hash
+            for tx_hash in payload["tx_hashes"]
+            if isinstance(tx_hash, str)
+        )
     )
-    decoded_transaction.metadata.timestamp = (
-        decoded_transaction.metadata.timestamp.strftime("%Y-%m-%d %H:%M:%S")
+    max_size = current_app.config["BATCH_DECODE_MAX_SIZE"]
+    if not tx_hashes or len(tx_hashes) > max_size:
+        raise MalformedRequest(
+            f"Expected from 1 to {max_size} transaction hashes, got {len(tx_hashes)}."
+        )
+
+    chain_id = payload.get("chain_id") or current_app.ethtx.default_chain
+
+    return stream_ndjson(
+        decoded_items(
+            current_app.ethtx,
+            chain_id,
+            tx_hashes,
+            current_app.config["BATCH_DECODE_CONCURRENCY"],
+            ordered=False,
+        )
     )
-    return decoded_transaction.dict()
+
+
+def decoded_items(
+    engine: EthTx,
+    chain_id: str,
+    tx_hashes: List[str],
+    concurrency: int,
+    ordered: bool,
+    block: Optional[W3Block] = None,
+) -> Iterator[Dict]:
+    """Decode transactions concurrently, yield streamed response entries."""
+    for tx_hash, decoded_transaction in decode_transactions(
+        engine, chain_id, tx_hashes, concurrency, ordered, block
+    ):
+        item = {"chain_id": chain_id, "tx_hash": tx_hash}
+        if isinstance(decoded_transaction, Exception):
+            yield {**item, **item_error(decoded_transaction)}
+        else:
+            yield {
+                **item,
+                "status": 200,
+                "result": jsonable(format_transaction(decoded_transaction).dict()),
+            }
@@ -18,11 +18,11 @@ import datetime
 import logging
 from dataclasses import dataclass
 from http.client import responses
-from typing import Tuple, TypeVar
+from typing import Dict, Tuple, TypeVar
 
 from ethtx import exceptions as ethtx_exceptions
 from flask import Blueprint, request
-from web3.exceptions import TransactionNotFound
+from web3.exceptions import BlockNotFound, TransactionNotFound
 from werkzeug.exceptions import HTTPException
 
 from .utils import as_dict
@@ -53,6 +53,25 @@ class BaseRequestException:
 
 BaseErrorType = TypeVar("BaseErrorType", bound=Tuple[BaseRequestException, int])
 
+ITEM_ERROR_STATUSES = (
+    (ethtx_exceptions.NodeConnectionException, 500),
+    (ethtx_exceptions.ProcessingException, 500),
+    (ethtx_exceptions.InvalidTransactionHash, 400),
+    (TransactionNotFound, 404),
+    (MalformedRequest, 400),
+    (EmptyResponseError, 404),
+)
+
+
+def item_error(error: Exception) -> Dict:
+    """Error entry of the multi-item (streamed) response."""
+    for error_type, status in ITEM_ERROR_STATUSES:
+        if isinstance(error, error_type):
+            return {"status": status, "error": str(error)}
+
+    log.exception(str(error))
+    return {"status": 500, "error": str(UnexpectedError())}
+
 
 @exceptions_bp.app_errorhandler(HTTPException)
 def handle_all_http_exceptions(error: HTTPException) -> BaseErrorType:
@@ -84,6 +103,12 @@ def transaction_not_found(error) -> BaseErrorType:
     return BaseRequestException(404, error, request.path), 404
 
 
+@exceptions_bp.app_errorhandler(BlockNotFound)
+def block_not_found(error) -> BaseErrorType:
+    """Could not find block."""
+    return BaseRequestException(404, error, request.path), 404
+
+
 @exceptions_bp.app_errorhandler(AuthorizationError)
 def authorization_error(error) -> BaseErrorType:
     """Unauthorized request."""
@@ -108,6 +133,12 @@ def resource_locked_error(error) -> BaseErrorType:
     return BaseRequestException(423, error, request.path), 423
 
 
+@exceptions_bp.app_errorhandler(EmptyResponseError)
+def empty_response(error) -> BaseErrorType:
+    """Response is empty."""
+    return BaseRequestException(404, error, request.path), 404
+
+
 @exceptions_bp.app_errorhandler(Exception)
 def unexpected_error(error) -> BaseErrorType:
     """Unexpected error."""
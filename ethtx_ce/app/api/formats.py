@@ -0,0 +1,71 @@
+# Copyright 2021 DAI FOUNDATION (the original version https://github.com/daifoundation/ethtx_ce)
+# Copyright 2021-2022 Token Flow Insights SA (modifications to the original software as recorded
+# in the changelog https://github.com/EthTx/ethtx/blob/master/CHANGELOG.md)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# The product contains trademarks and other branding elements of Token Flow Insights SA which are
+# not licensed under the Apache 2.0 license. When using or reproducing the code, please remove
+# the trademark and/or other branding elements.
+
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+from flask import Request
+
+from .utils import native
+
+try:
+    import msgpack
+except ImportError:  # optional
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:  # optional
+    cbor2 = None
+
+JSON_MIMETYPE = "application/json"
+
+# MessagePack integers are limited to 64 bits, CBOR encodes bigger ones as bignums
+MSGPACK_INT_RANGE = (-(2**63), 2**64 - 1)
+
+
+class ResponseFormat(NamedTuple):
+    """Binary response format, alternative to json."""
+
+    mimetype: str
+    dumps: Callable[[Any], bytes]
+
+
+def _dumps_msgpack(obj: Any) -> bytes:
+    return msgpack.packb(native(obj, MSGPACK_INT_RANGE), use_bin_type=True)
+
+
+def _dumps_cbor(obj: Any) -> bytes:
+    return cbor2.dumps(native(obj))
+
+
+# by `Accept` mimetype, formats of the installed libraries only
+RESPONSE_FORMATS: Dict[str, ResponseFormat] = {}
+if msgpack is not None:
+    RESPONSE_FORMATS["application/msgpack"] = RESPONSE_FORMATS[
+        "application/x-msgpack"
+    ] = ResponseFormat("application/msgpack", _dumps_msgpack)
+if cbor2 is not None:
+    RESPONSE_FORMATS["application/cbor"] = ResponseFormat(
+        "application/cbor", _dumps_cbor
+    )
+
+
+def negotiate_format(request: Request) -> Optional[ResponseFormat]:
+    """Return binary format preferred by the client or None for json (also the default)."""
+    mimetype = request.accept_mimetypes.best_match(
+        [JSON_MIMETYPE, *RESPONSE_FORMATS], default=JSON_MIMETYPE
+    )
+    return RESPONSE_FORMATS.get(mimetype)
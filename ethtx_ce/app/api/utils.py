@@ -14,11 +14,21 @@
 # not licensed under the Apache 2.0 license. When using or reproducing the code, please remove
 # the trademark and/or other branding elements.
 
+import datetime
+import re
 from dataclasses import asdict
 from functools import wraps
-from typing import Dict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
 from decimal import Decimal
 
+import jsonpickle
+from flask import Response, json, stream_with_context
+from pydantic import BaseModel
+
+INTEGER_LITERAL = re.compile(r"-?\d+")
+
+jsonpickle.set_decoder_options("simplejson", use_decimal=True)
+
 
 def enable_direct(decorator):
     """Decorator direct helper."""
@@ -68,3 +78,125 @@ def delete_bstrings(obj):
         raise Exception("Unknown type:" + str(type(obj)))
 
     return obj
+
+
+def stream_ndjson(items: Iterable[Any]) -> Response:
+    """Stream json compatible items as newline delimited json, one item per line."""
+
+    def generate():
+        for item in items:
+            yield json.dumps(item) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+def jsonable(obj: Any) -> Any:
+    """
+    Convert object to the json compatible structure in a single pass.
+    Output is the same as the `jsonpickle` encode/decode + `delete_bstrings` round trip:
+    numbers are stringified, bytes decoded, dates converted to iso format.
+    Unknown types fall back to the round trip.
+    """
+    handler = _JSONABLE_HANDLERS.get(type(obj))
+    if handler is not None:
+        return handler(obj)
+
+    if isinstance(obj, BaseModel):
+        return jsonable(obj.dict())
+    if isinstance(obj, (datetime.date, datetime.time)):
+        return obj.isoformat()
+
+    return _jsonable_roundtrip(obj)
+
+
+def _jsonable_roundtrip(obj: Any) -> Any:
+    return delete_bstrings(
+        jsonpickle.decode(
+            jsonpickle.encode(obj, make_refs=False, unpicklable=False, use_decimal=True)
+        )
+    )
+
+
+def _jsonable_key(key: Any) -> str:
+    if type(key) is str:
+        return key
+    if key is None:
+        return "null"
+    return repr(key)
+
+
+def _jsonable_number(literal: str) -> str:
+    """Stringify number literal the same way as simplejson `use_decimal` decoder does."""
+    if INTEGER_LITERAL.fullmatch(literal):
+        return str(int(literal))
+    return str(Decimal(literal))
+
+
+def _jsonable_float(obj: float) -> Any:
+    if obj != obj or obj in (float("inf"), float("-inf")):
+        return obj
+    return _jsonable_number(repr(obj))
+
+
+def _jsonable_decimal(obj: Decimal) -> Any:
+    if not obj.is_finite():
+        return _jsonable_roundtrip(obj)
+    return _jsonable_number(str(obj))
+
+
+def _jsonable_dict(obj: dict) -> Dict[str, Any]:
+    return {_jsonable_key(key): jsonable(value) for key, value in obj.items()}
+
+
+def _jsonable_list(obj) -> list:
+    return [jsonable(value) for value in obj]
+
+
+_JSONABLE_HANDLERS: Dict[type, Callable[[Any], Any]] = {
+    str: lambda obj: obj,
+    bool: lambda obj: obj,
+    type(None): lambda obj: obj,
+    int: str,
+    float: _jsonable_float,
+    Decimal: _jsonable_decimal,
+    bytes: bytes.decode,
+    dict: _jsonable_dict,
+    list: _jsonable_list,
+    tuple: _jsonable_list,
+    set: _jsonable_list,
+    frozenset: _jsonable_list,
+    datetime.datetime: datetime.datetime.isoformat,
+    datetime.date: datetime.date.isoformat,
+}
+
+
+def native(obj: Any, int_range: Optional[Tuple[int, int]] = None) -> Any:
+    """
+    Convert object to the structure of binary formats (MessagePack, CBOR) in a single pass.
+    Unlike `jsonable`, integers and bytes keep their types, integers outside of `int_range`
+    (if given) and non-integral decimals are stringified. Unknown types fall back to `jsonable`.
+    """
+    if type(obj) in (str, bool, float, bytes) or obj is None:
+        return obj
+    if type(obj) is int:
+        return _native_int(obj, int_range)
+    if type(obj) is dict:
+        return {
+            _jsonable_key(key): native(value, int_range) for key, value in obj.items()
+        }
+    if type(obj) in (list, tuple, set, frozenset):
+        return [native(value, int_range) for value in obj]
+    if isinstance(obj, Decimal) and obj.is_finite() and obj == obj.to_integral_value():
+        return _native_int(int(obj), int_range)
+    if isinstance(obj, bytes):
+        return bytes(obj)
+    if isinstance(obj, BaseModel):
+        return native(obj.dict(), int_range)
+
+    return jsonable(obj)
+
+
+def _native_int(obj: int, int_range: Optional[Tuple[int, int]]) -> Any:
+    if int_range is None or int_range[0] <= obj <= int_range[1]:
+        return obj
+    return str(obj)
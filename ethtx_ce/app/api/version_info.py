@@ -0,0 +1,53 @@
+# Copyright 2021 DAI FOUNDATION (the original version https://github.com/daifoundation/ethtx_ce)
+# Copyright 2021-2022 Token Flow Insights SA (modifications to the original software as recorded
+# in the changelog https://github.com/EthTx/ethtx/blob/master/CHANGELOG.md)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# The product contains trademarks and other branding elements of Token Flow Insights SA which are
+# not licensed under the Apache 2.0 license. When using or reproducing the code, please remove
+# the trademark and/or other branding elements.
+
+import logging
+from typing import Dict, Optional
+
+from ..background import BackgroundRefresher
+from ..helpers import get_latest_ethtx_version
+
+log = logging.getLogger(__name__)
+
+
+class VersionInfo(BackgroundRefresher):
+    """
+    Latest EthTx version, fetched from PyPI in the background every `ttl` seconds.
+    The last known version is served while refreshing or when PyPI is unavailable.
+    """
+
+    def __init__(self, ttl: float, timeout: float):
+        super().__init__(ttl, name="version-info")
+        self.timeout = timeout
+
+        self._latest_ethtx_version: Optional[str] = None
+
+    @classmethod
+    def from_config(cls, config: Dict) -> "VersionInfo":
+        return cls(
+            ttl=config["LATEST_VERSION_TTL"], timeout=config["LATEST_VERSION_TIMEOUT"]
+        )
+
+    @property
+    def latest_ethtx_version(self) -> Optional[str]:
+        """Last known latest EthTx version, None if not fetched yet."""
+        self.start()
+        return self._latest_ethtx_version
+
+    def refresh(self) -> None:
+        version = get_latest_ethtx_version(timeout=self.timeout)
+        if version:
+            self._latest_ethtx_version = version
@@ -0,0 +1,67 @@
+# Copyright 2021 DAI FOUNDATION (the original version https://github.com/daifoundation/ethtx_ce)
+# Copyright 2021-2022 Token Flow Insights SA (modifications to the original software as recorded
+# in the changelog https://github.com/EthTx/ethtx/blob/master/CHANGELOG.md)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# The product contains trademarks and other branding elements of Token Flow Insights SA which are
+# not licensed under the Apache 2.0 license. When using or reproducing the code, please remove
+# the trademark and/or other branding elements.
+
+import logging
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Optional
+
+log = logging.getLogger(__name__)
+
+
+class BackgroundRefresher(ABC):
+    """
+    Calls `refresh` every `interval` seconds in a daemon thread. The thread is started lazily
+    in each process using the refresher, so it also runs in workers forked after creation.
+    """
+
+    def __init__(self, interval: float, name: str):
+        self.interval = interval
+        self.name = name
+
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._stopped = threading.Event()
+
+    @abstractmethod
+    def refresh(self) -> None:
+        """Refresh the data, called periodically in the background thread."""
+
+    def start(self) -> None:
+        if self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+
+            self._pid = os.getpid()
+            self._stopped = threading.Event()
+            threading.Thread(target=self._run, name=self.name, daemon=True).start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                log.warning("%s refresh failed: %s", self.name, e)
+
+            if self._stopped.wait(self.interval):
+                return
@@ -0,0 +1,234 @@
+# Copyright 2021 DAI FOUNDATION (the original version https://github.com/daifoundation/ethtx_ce)
+# Copyright 2021-2022 Token Flow Insights SA (modifications to the original software as recorded
+# in the changelog https://github.com/EthTx/ethtx/blob/master/CHANGELOG.md)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# The product contains trademarks and other branding elements of Token Flow Insights SA which are
+# not licensed under the Apache 2.0 license. When using or reproducing the code, please remove
+# the trademark and/or other branding elements.
+
+import logging
+import pickle
+import threading
+import zlib
+from collections import OrderedDict
+from datetime import datetime
+from typing import Iterable, Optional, Set, Tuple
+
+from ethtx import EthTx
+from ethtx.models.decoded_model import DecodedCall, DecodedTransaction
+from flask import Flask
+from pymongo.collection import Collection
+from pymongo.errors import PyMongoError
+
+from .helpers import Singleton
+
+log = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, str]
+
+
+class DecodedTransactionCache(metaclass=Singleton):
+    """
+    Decoded transactions cache shared by the frontend and the api.
+    In-process LRU in front of a persistent mongo collection. Entries are keyed by
+    (chain_id, tx_hash) and stamped with the decoder version, so upgrading EthTx
+    invalidates them. Every entry remembers the addresses whose semantics were used,
+    which allows to drop only the transactions affected by a semantics edit.
+    """
+
+    COLLECTION = "decoded_transactions"
+
+    def __init__(
+        self,
+        max_size: int = 256,
+        version: str = "",
+        collection: Optional[Collection] = None,
+    ):
+        self.max_size = max_size
+        self.version = version
+
+        self._entries: "OrderedDict[CacheKey, Tuple[DecodedTransaction, Set[str]]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+        self._collection = collection
+        if self._collection is not None:
+            try:
+                self._collection.create_index([("chain_id", 1), ("addresses", 1)])
+            except PyMongoError as e:
+                log.warning("Cannot create decoded transactions cache index: %s", e)
+
+    def get(self, chain_id: str, tx_hash: str) -> Optional[DecodedTransaction]:
+        """Get decoded transaction from the memory, then from the persistent tier."""
+        key = _key(chain_id, tx_hash)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry[0]
+
+        if self._collection is None:
+            return None
+
+        try:
+            document = self._collection.find_one(
+                {"_id": _document_id(key), "version": self.version}
+            )
+        except PyMongoError as e:
+            log.warning("Decoded transactions cache read error: %s", e)
+            return None
+
+        if not document:
+            return None
+
+        decoded_transaction = pickle.loads(zlib.decompress(document["payload"]))
+        self._remember(key, decoded_transaction, set(document["addresses"]))
+
+        return decoded_transaction
+
+    def set(self, decoded_transaction: DecodedTransaction) -> None:
+        """Store decoded transaction. Pending transactions are never cached."""
+        metadata = decoded_transaction.metadata
+        if metadata.block_number is None:
+            return
+
+        key = _key(metadata.chain_id, metadata.tx_hash)
+        addresses = used_addresses(decoded_transaction)
+        self._remember(key, decoded_transaction, addresses)
+
+        if self._collection is None:
+            return
+
+        try:
+            self._collection.replace_one(
+                {"_id": _document_id(key)},
+                {
+                    "_id": _document_id(key),
+                    "chain_id": key[0],
+                    "tx_hash": key[1],
+                    "version": self.version,
+                    "addresses": sorted(addresses),
+                    "payload": zlib.compress(pickle.dumps(decoded_transaction)),
+                    "created_at": datetime.utcnow(),
+                },
+                upsert=True,
+            )
+        except PyMongoError as e:
+            log.warning("Decoded transactions cache write error: %s", e)
+
+    def invalidate(
+        self, chain_id: str, addresses: Iterable[str], persistent: bool = True
+    ) -> None:
+        """
+        Drop all cached transactions decoded with semantics of given addresses.
+        :param persistent: drop them also from the persistent tier, otherwise only from the memory
+        """
+        chain_id = chain_id.lower()
+        addresses = {address.lower() for address in addresses if address}
+        if not addresses:
+            return
+
+        with self._lock:
+            for key in [
+                key
+                for key, (_, used) in self._entries.items()
+                if key[0] == chain_id and used & addresses
+            ]:
+                del self._entries[key]
+
+        if self._collection is None or not persistent:
+            return
+
+        try:
+            self._collection.delete_many(
+                {"chain_id": chain_id, "addresses": {"$in": list(addresses)}}
+            )
+        except PyMongoError as e:
+            log.warning("Decoded transactions cache invalidation error: %s", e)
+
+        log.info(
+            "Decoded transactions cache invalidated for %s: %s",
+            chain_id,
+            ", ".join(addresses),
+        )
+
+    def clear(self) -> None:
+        """Drop all cached transactions from the memory."""
+        with self._lock:
+            self._entries.clear()
+
+    def _remember(
+        self,
+        key: CacheKey,
+        decoded_transaction: DecodedTransaction,
+        addresses: Set[str],
+    ) -> None:
+        with self._lock:
+            self._entries[key] = (decoded_transaction, addresses)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+def init_decoded_cache(app: Flask, engine: Optional[EthTx]) -> None:
+    """Setup decoded transactions cache, persistent tier uses the semantics mongo database."""
+    collection = None
+    if engine and app.config["DECODED_CACHE_PERSISTENT"]:
+        database = getattr(engine.semantics.database, "_db", None)
+        if database is not None:
+            collection = database[DecodedTransactionCache.COLLECTION]
+
+    DecodedTransactionCache(
+        max_size=app.config["DECODED_CACHE_SIZE"],
+        version=app.config["ethtx_version"],
+        collection=collection,
+    )
+
+
+def used_addresses(decoded_transaction: DecodedTransaction) -> Set[str]:
+    """Return addresses whose semantics could have been used in the decoding."""
+    metadata = decoded_transaction.metadata
+    addresses = {metadata.from_address, metadata.to_address}
+
+    for event in decoded_transaction.events:
+        addresses.add(event.contract.address)
+
+    for transfer in decoded_transaction.transfers:
+        addresses.update(
+            (
+                transfer.token_address,
+                transfer.from_address.address,
+                transfer.to_address.address,
+            )
+        )
+
+    for balance in decoded_transaction.balances:
+        addresses.add(balance.holder.address)
+
+    calls = [decoded_transaction.calls] if decoded_transaction.calls else []
+    while calls:
+        call: DecodedCall = calls.pop()
+        addresses.add(call.from_address.address)
+        if call.to_address:
+            addresses.add(call.to_address.address)
+        calls.extend(call.subcalls)
+
+    return {address.lower() for address in addresses if address}
+
+
+def _key(chain_id: str, tx_hash: str) -> CacheKey:
+    return chain_id.lower(), tx_hash.lower()
+
+
+def _document_id(key: CacheKey) -> str:
+    return ":".join(key)
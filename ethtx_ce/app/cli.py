@@ -0,0 +1,356 @@
+# Copyright 2021 DAI FOUNDATION (the original version https://github.com/daifoundation/ethtx_ce)
+# Copyright 2021-2022 Token Flow Insights SA (modifications to the original software as recorded
+# in the changelog https://github.com/EthTx/ethtx/blob/master/CHANGELOG.md)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# The product contains trademarks and other branding elements of Token Flow Insights SA which are
+# not licensed under the Apache 2.0 license. When using or reproducing the code, please remove
+# the trademark and/or other branding elements.
+
+
+"""
+Command line tools, run from `ethtx_ce/`:
+    python -m app.cli preload-semantics DIRECTORY [--processes N] [--batch-size N] [--restart]
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from ethtx.models.semantics_model import AddressSemantics
+from ethtx.providers.semantic_providers import MongoSemanticsDatabase
+from pymongo import MongoClient
+from web3 import Web3
+
+from .abi import compile_semantics
+from .cache import DecodedTransactionCache
+from .config import Config
+from .engine import ethtx_config
+from .semantics_cache import SemanticsInvalidationBus, invalidate_semantics
+from .semantics_import import import_semantics
+
+log = logging.getLogger(__name__)
+
+STATE_FILE = ".preload-semantics.state"
+PROGRESS_INTERVAL = 5
+
+# web3 connections of the preload worker process, by chain
+_nodes: Dict[str, Web3] = {}
+
+
+def preload_semantics(
+    directory: str,
+    database: MongoSemanticsDatabase,
+    processes: Optional[int] = None,
+    batch_size: int = 1000,
+    restart: bool = False,
+    default_chain: str = "mainnet",
+) -> Dict:
+    """
+    Compile semantics of the ABI/metadata files of the directory on a pool of processes and bulk upsert them.
+    Files written to the database are recorded in the state file of the directory and skipped by the next run,
+    unless restarted. Files with invalid records are not recorded, their valid records are written.
+    Records without ABI (e.g. of contracts without verified source code) are skipped and reported, so stored
+    semantics of a contract are never replaced with EOA ones. Returns the throughput report.
+    """
+    state_path = os.path.join(directory, STATE_FILE)
+    if restart and os.path.exists(state_path):
+        os.remove(state_path)
+
+    _init_invalidation(database)
+    done = _read_state(state_path)
+    files = [path for path in _list_files(directory) if path not in done]
+    report = {
+        "files": len(files),
+        "skipped_files": len(done),
+        "failed_files": 0,
+        "contracts": 0,
+        "skipped_records": 0,
+        "errors": 0,
+        "compile_time": 0.0,
+        "write_time": 0.0,
+    }
+    log.info(
+        "Preloading semantics of %d files from %s, %d done before.",
+        len(files),
+        directory,
+        len(done),
+    )
+
+    start = last_progress = time.perf_counter()
+    batch: List[AddressSemantics] = []
+    batch_files: List[str] = []
+
+    with open(state_path, "a") as state, multiprocessing.Pool(processes) as pool:
+
+        def flush():
+            write_start = time.perf_counter()
+            import_semantics(database, batch)
+            _invalidate(batch)
+            report["write_time"] += time.perf_counter() - write_start
+            report["contracts"] += len(batch)
+
+            state.writelines(path + "\n" for path in batch_files)
+            state.flush()
+            batch.clear()
+            batch_files.clear()
+
+        for processed, (path, semantics, skipped, errors, compile_time) in enumerate(
+            pool.imap_unordered(
+                _compile_file,
+                (
+                    (os.path.join(directory, path), path, default_chain)
+                    for path in files
+                ),
+                chunksize=8,
+            ),
+            1,
+        ):
+            report["compile_time"] += compile_time
+            batch.extend(semantics)
+            if skipped:
+                report["skipped_records"] += len(skipped)
+                log.warning("%s: records %s without ABI skipped.", path, skipped)
+            if errors:
+                report["failed_files"] += 1
+                report["errors"] += len(errors)
+                for error in errors:
+                    log.warning("%s: %s", path, error)
+            else:
+                batch_files.append(path)
+
+            if len(batch) >= batch_size:
+                flush()
+
+            if time.perf_counter() - last_progress > PROGRESS_INTERVAL:
+                last_progress = time.perf_counter()
+                log.info(
+                    "Files %d/%d, contracts %d, errors %d, %.0f contracts/s.",
+                    processed,
+                    len(files),
+                    report["contracts"] + len(batch),
+                    report["errors"],
+                    (report["contracts"] + len(batch)) / (last_progress - start),
+                )
+
+        flush()
+
+    report["elapsed"] = time.perf_counter() - start
+    report["contracts_per_second"] = report["contracts"] / max(report["elapsed"], 1e-9)
+    return report
+
+
+def _list_files(directory: str) -> List[str]:
+    """Paths of json files of the directory tree, relative to it."""
+    files = []
+    for root, _, names in os.walk(directory):
+        for name in names:
+            if name.endswith((".json", ".ndjson")):
+                files.append(os.path.relpath(os.path.join(root, name), directory))
+
+    return sorted(files)
+
+
+def _read_state(path: str) -> Set[str]:
+    try:
+        with open(path) as f:
+            return {line.strip() for line in f if line.strip()}
+    except FileNotFoundError:
+        return set()
+
+
+def _compile_file(
+    args: Tuple[str, str, str],
+) -> Tuple[str, List[AddressSemantics], List[int], List[str], float]:
+    """Compile semantics of all records of the file, in the worker process. Returns numbers of skipped records."""
+    full_path, path, default_chain = args
+    start = time.perf_counter()
+    semantics = []
+    skipped = []
+    errors = []
+
+    try:
+        with open(full_path) as f:
+            if path.endswith(".ndjson"):
+                records = [json.loads(line) for line in f if line.strip()]
+            else:
+                records = json.load(f)
+    except (OSError, ValueError) as e:
+        return path, [], [], [f"Cannot read file: {e}"], time.perf_counter() - start
+
+    if isinstance(records, dict):
+        records = [records]
+
+    for number, record in enumerate(records, 1):
+        try:
+            address_semantics = _compile_record(record, path, default_chain)
+        except Exception as e:
+            errors.append(f"Invalid record {number}: {e!r}")
+            continue
+
+        if address_semantics is None:
+            skipped.append(number)
+        else:
+            semantics.append(address_semantics)
+
+    return path, semantics, skipped, errors, time.perf_counter() - start
+
+
+def _compile_record(
+    record: Dict, path: str, default_chain: str
+) -> Optional[AddressSemantics]:
+    """
+    Compile record of the import api (`address`, `abi`, `code_hash`, `name`, `standard`, `chain_id`)
+    or of the Etherscan `getsourcecode` export (`ABI`, `ContractName`). Address may be given by the file name,
+    e.g. `0x...json`, missing code hash is read from the node of the chain. None if the record has no ABI.
+    """
+    file_name = os.path.splitext(os.path.basename(path))[0]
+    address = record.get("address") or record.get("Address")
+    if not address and Web3.is_address(file_name):
+        address = file_name
+    if not address:
+        raise ValueError("Address is missing.")
+    address = address.lower()
+
+    chain_id = record.get("chain_id") or default_chain
+    abi = record.get("abi", record.get("ABI"))
+    if isinstance(abi, str):
+        # Etherscan exports contracts without verified source code with the `ABI` message
+        abi = json.loads(abi) if abi.startswith("[") else None
+    if not abi:
+        return None
+
+    standard = record.get("standard")
+    if isinstance(standard, str):
+        standard = json.loads(standard)
+
+    code_hash = record.get("code_hash") or record.get("codeHash")
+    if not code_hash:
+        code_hash = _code_hash(chain_id, address)
+
+    return compile_semantics(
+        chain_id=chain_id,
+        address=address,
+        abi=abi,
+        code_hash=code_hash,
+        name=record.get("name") or record.get("ContractName"),
+        standard=standard,
+    )
+
+
+def _code_hash(chain_id: str, address: str) -> str:
+    node = _nodes.get(chain_id)
+    if node is None:
+        hook = ethtx_config.web3nodes.get(chain_id, {}).get("hook")
+        if not hook:
+            raise ValueError(
+                f"Code hash is missing and there is no node of chain {chain_id}."
+            )
+        node = _nodes[chain_id] = Web3(Web3.HTTPProvider(hook))
+
+    return Web3.keccak(node.eth.get_code(Web3.to_checksum_address(address))).hex()
+
+
+def _init_invalidation(database: MongoSemanticsDatabase) -> None:
+    """Setup the caches invalidated by the preload, as the app does: persistent decoded transactions and the bus."""
+    collection = None
+    if Config.DECODED_CACHE_PERSISTENT:
+        collection = database._db[DecodedTransactionCache.COLLECTION]
+
+    DecodedTransactionCache(max_size=0, collection=collection)
+    SemanticsInvalidationBus(
+        Config.SEMANTICS_INVALIDATION_FILE, Config.SEMANTICS_INVALIDATION_MAX_SIZE
+    )
+
+
+def _invalidate(semantics: Iterable[AddressSemantics]) -> None:
+    """Drop persistent decoded transactions of preloaded addresses and evict them from caches of app workers."""
+    addresses = defaultdict(list)
+    for address_semantics in semantics:
+        addresses[address_semantics.chain_id].append(address_semantics.address)
+
+    for chain_id, chain_addresses in addresses.items():
+        invalidate_semantics(chain_id, chain_addresses)
+
+
+def _print_report(report: Dict) -> None:
+    print(
+        f"Preloaded {report['contracts']} contracts from {report['files']} files "
+        f"({report['skipped_files']} files done before, {report['failed_files']} failed, "
+        f"{report['errors']} invalid records, {report['skipped_records']} records without ABI skipped) "
+        f"in {report['elapsed']:.1f} s: "
+        f"{report['contracts_per_second']:.0f} contracts/s, "
+        f"compile {report['compile_time']:.1f} s (all processes), write {report['write_time']:.1f} s."
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    preload = commands.add_parser(
+        "preload-semantics",
+        help="Bulk upsert semantics compiled from a directory of ABI/metadata json files.",
+    )
+    preload.add_argument("directory")
+    preload.add_argument(
+        "--processes", type=int, default=None, help="Default: number of CPUs."
+    )
+    preload.add_argument(
+        "--batch-size",
+        type=int,
+        default=Config.SEMANTICS_IMPORT_BATCH_SIZE,
+        help="Contracts per bulk write.",
+    )
+    preload.add_argument(
+        "--chain-id",
+        default=ethtx_config.default_chain,
+        help="Default chain of records.",
+    )
+    preload.add_argument(
+        "--restart",
+        action="store_true",
+        help="Ignore files preloaded by previous runs.",
+    )
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(levelname)-8s %(message)s"
+    )
+
+    if not os.path.isdir(args.directory):
+        parser.error(f"{args.directory} is not a directory.")
+
+    connection_string = ethtx_config.mongo_connection_string or ""
+    if connection_string.startswith("mongomock://"):
+        parser.error("MONGO_CONNECTION_STRING is an in-memory mongomock database.")
+
+    database = MongoSemanticsDatabase(MongoClient(connection_string).get_database())
+    report = preload_semantics(
+        args.directory,
+        database,
+        processes=args.processes,
+        batch_size=args.batch_size,
+        restart=args.restart,
+        default_chain=args.chain_id,
+    )
+    _print_report(report)
+
+    return 1 if report["failed_files"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
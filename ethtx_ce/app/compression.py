@@ -0,0 +1,298 @@
+# Copyright 2021 DAI FOUNDATION (the original version https://github.com/daifoundation/ethtx_ce)
+# Copyright 2021-2022 Token Flow Insights SA (modifications to the original software as recorded
+# in the changelog https://github.com/EthTx/ethtx/blob/master/CHANGELOG.md)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# The product contains trademarks and other branding elements of Token Flow Insights SA which are
+# not licensed under the Apache 2.0 license. When using or reproducing the code, please remove
+# the trademark and/or other branding elements.
+
+import re
+import threading
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Type
+
+from werkzeug.datastructures import Headers
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional
+    zstandard = None
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/javascript",
+    "application/x-ndjson",
+    "application/xml",
+    "image/svg+xml",
+}
+
+
+class Encoder(ABC):
+    """Content coding, one-shot and streaming."""
+
+    name: str
+
+    def compress(self, data: bytes) -> bytes:
+        compressor = self.compressor()
+        return compressor.send(data, flush=False) + compressor.finish()
+
+    @abstractmethod
+    def compressor(self) -> "StreamCompressor":
+        """New streaming compressor."""
+
+
+class StreamCompressor:
+    def __init__(
+        self, compress: Callable[[bytes], bytes], flush: Callable, finish: Callable
+    ):
+        self._compress = compress
+        self._flush = flush
+        self._finish = finish
+
+    def send(self, data: bytes, flush: bool = True) -> bytes:
+        """Compress the chunk, flushed so the client can decode it right away."""
+        compressed = self._compress(data)
+        return compressed + self._flush() if flush else compressed
+
+    def finish(self) -> bytes:
+        return self._finish()
+
+
+class GzipEncoder(Encoder):
+    name = "gzip"
+
+    def __init__(self, level: int):
+        self.level = level
+
+    def compressor(self) -> StreamCompressor:
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        return StreamCompressor(
+            compressor.compress,
+            lambda: compressor.flush(zlib.Z_SYNC_FLUSH),
+            compressor.flush,
+        )
+
+
+class BrotliEncoder(Encoder):
+    name = "br"
+
+    def __init__(self, quality: int):
+        self.quality = quality
+
+    def compressor(self) -> StreamCompressor:
+        compressor = brotli.Compressor(quality=self.quality)
+        return StreamCompressor(compressor.process, compressor.flush, compressor.finish)
+
+
+class ZstdEncoder(Encoder):
+    name = "zstd"
+
+    def __init__(self, level: int):
+        self.level = level
+
+    def compressor(self) -> StreamCompressor:
+        compressor = zstandard.ZstdCompressor(level=self.level).compressobj()
+        return StreamCompressor(
+            compressor.compress,
+            lambda: compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK),
+            compressor.flush,
+        )
+
+
+class PrecompressedCache:
+    """LRU of compressed bodies keyed by (ETag, encoding), bounded by their total size."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+
+        self._entries: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, etag: str, encoding: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._entries.get((etag, encoding))
+            if data is not None:
+                self._entries.move_to_end((etag, encoding))
+            return data
+
+    def set(self, etag: str, encoding: str, data: bytes) -> None:
+        if len(data) > self.max_size:
+            return
+
+        with self._lock:
+            previous = self._entries.pop((etag, encoding), None)
+            self._size -= len(previous) if previous else 0
+
+            self._entries[(etag, encoding)] = data
+            self._size += len(data)
+            while self._size > self.max_size:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+
+class CompressionMiddleware:
+    """
+    WSGI middleware compressing responses with the best encoding accepted by the client:
+    brotli or zstd (when installed), then gzip. Responses with a known length under `min_size`
+    are sent as they are, streamed responses are compressed chunk by chunk. Compressed bodies
+    of responses with an ETag (cached pages, static files) are kept, so they are compressed once.
+    """
+
+    def __init__(
+        self,
+        app: Callable,
+        min_size: int = 1024,
+        gzip_level: int = 5,
+        brotli_quality: int = 4,
+        zstd_level: int = 3,
+        cache_size: int = 64 * 1024 * 1024,
+    ):
+        self.app = app
+        self.min_size = min_size
+
+        # in order of preference
+        self.encoders: Dict[str, Encoder] = {}
+        if brotli is not None:
+            self.encoders["br"] = BrotliEncoder(brotli_quality)
+        if zstandard is not None:
+            self.encoders["zstd"] = ZstdEncoder(zstd_level)
+        self.encoders["gzip"] = GzipEncoder(gzip_level)
+
+        self.cache = PrecompressedCache(cache_size)
+
+    @classmethod
+    def from_config(cls, config: Type, app: Callable) -> "CompressionMiddleware":
+        return cls(
+            app,
+            min_size=config.COMPRESSION_MIN_SIZE,
+            gzip_level=config.COMPRESSION_GZIP_LEVEL,
+            brotli_quality=config.COMPRESSION_BROTLI_QUALITY,
+            zstd_level=config.COMPRESSION_ZSTD_LEVEL,
+            cache_size=config.COMPRESSION_CACHE_SIZE,
+        )
+
+    def __call__(self, environ: Dict, start_response: Callable) -> Iterable[bytes]:
+        encoder = self._negotiate(environ.get("HTTP_ACCEPT_ENCODING", ""))
+        if encoder is not None and "HTTP_IF_NONE_MATCH" in environ:
+            # the app knows ETags of its responses without the encoding suffix
+            environ["HTTP_IF_NONE_MATCH"] = _strip_etag_suffixes(
+                environ["HTTP_IF_NONE_MATCH"], self.encoders
+            )
+
+        response: List = []
+
+        def _start_response(status, headers, exc_info=None):
+            response[:] = [status, headers, exc_info]
+            return lambda data: None  # write() is not used by flask
+
+        body = self.app(environ, _start_response)
+        status, headers, exc_info = response
+        headers = Headers(headers)
+
+        if status.startswith("304") and encoder is not None and "ETag" in headers:
+            # validates the encoded representation the client has
+            headers["ETag"] = _add_etag_suffix(headers["ETag"], encoder.name)
+
+        if not self._compressible(environ, status, headers):
+            start_response(status, headers.to_wsgi_list(), exc_info)
+            return body
+
+        headers.add("Vary", "Accept-Encoding")
+        length = headers.get("Content-Length", type=int)
+        if encoder is None or (length is not None and length < self.min_size):
+            start_response(status, headers.to_wsgi_list(), exc_info)
+            return body
+
+        etag = headers.get("ETag")
+        headers["Content-Encoding"] = encoder.name
+        if etag:
+            headers["ETag"] = _add_etag_suffix(etag, encoder.name)
+
+        if length is None:
+            headers.remove("Content-Length")
+            start_response(status, headers.to_wsgi_list(), exc_info)
+            return self._stream(body, encoder)
+
+        data = self.cache.get(etag, encoder.name) if etag else None
+        if data is None:
+            try:
+                data = encoder.compress(b"".join(body))
+            finally:
+                if hasattr(body, "close"):
+                    body.close()
+            if etag:
+                self.cache.set(etag, encoder.name, data)
+        elif hasattr(body, "close"):
+            body.close()
+
+        headers["Content-Length"] = str(len(data))
+        start_response(status, headers.to_wsgi_list(), exc_info)
+        return [data]
+
+    def _negotiate(self, accept_encoding: str) -> Optional[Encoder]:
+        """Encoding of the highest quality accepted by the client, preferred by the server on a tie."""
+        accepted = {}
+        for item in accept_encoding.split(","):
+            name, _, params = item.strip().partition(";")
+            quality = re.search(r"q=([0-9.]+)", params)
+            accepted[name.strip().lower()] = float(quality.group(1)) if quality else 1.0
+
+        # the highest client quality wins, then the server preference
+        quality, _, encoder = max(
+            (accepted.get(name, accepted.get("*", 0)), -index, encoder)
+            for index, (name, encoder) in enumerate(self.encoders.items())
+        )
+        if quality <= 0 or quality < accepted.get("identity", 0):
+            return None
+
+        return encoder
+
+    @staticmethod
+    def _compressible(environ: Dict, status: str, headers: Headers) -> bool:
+        mimetype = headers.get("Content-Type", "").split(";")[0].strip()
+        return (
+            environ.get("REQUEST_METHOD") != "HEAD"
+            and status[:3] not in ("204", "206", "304")
+            and "Content-Encoding" not in headers
+            and "Content-Range" not in headers
+            and (mimetype.startswith("text/") or mimetype in COMPRESSIBLE_MIMETYPES)
+        )
+
+    @staticmethod
+    def _stream(body: Iterable[bytes], encoder: Encoder) -> Iterator[bytes]:
+        compressor = encoder.compressor()
+        try:
+            for chunk in body:
+                if chunk:
+                    yield compressor.send(chunk)
+            yield compressor.finish()
+        finally:
+            if hasattr(body, "close"):
+                body.close()
+
+
+def _add_etag_suffix(etag: str, encoding: str) -> str:
+    return f'{etag[:-1]}-{encoding}"' if etag.endswith('"') else f"{etag}-{encoding}"
+
+
+def _strip_etag_suffixes(if_none_match: str, encoders: Dict[str, Encoder]) -> str:
+    for encoding in encoders:
+        if_none_match = if_none_match.replace(f'-{encoding}"', '"')
+
+    return if_none_match
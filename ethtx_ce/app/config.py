@@ -15,12 +15,16 @@
 # the trademark and/or other branding elements.
 
 import os
+import tempfile
 
 from dotenv import load_dotenv, find_dotenv
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 load_dotenv(find_dotenv(filename="../../.env"))
 
+# files shared by all workers of the node, kept in memory when possible
+SHARED_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
 
 class Config:
     """Base Config."""
@@ -38,6 +42,90 @@ class Config:
     ETHTX_ADMIN_USERNAME = os.getenv("ETHTX_ADMIN_USERNAME")
     ETHTX_ADMIN_PASSWORD = os.getenv("ETHTX_ADMIN_PASSWORD")
 
+    DECODED_CACHE_SIZE = int(os.getenv("DECODED_CACHE_SIZE", 256))
+    DECODED_CACHE_PERSISTENT = os.getenv("DECODED_CACHE_PERSISTENT", "true") == "true"
+    DECODE_LOCK_FILE = os.getenv("DECODE_LOCK_FILE")
+    LITE_DECODE_UPGRADE_CONCURRENCY = int(
+        os.getenv("LITE_DECODE_UPGRADE_CONCURRENCY", 2)
+    )
+
+    SEMANTICS_CACHE_SIZE = int(os.getenv("SEMANTICS_CACHE_SIZE", 1024))
+    SEMANTICS_INVALIDATION_FILE = os.getenv(
+        "SEMANTICS_INVALIDATION_FILE",
+        os.path.join(SHARED_DIR, "ethtx_ce_semantics_invalidations.log"),
+    )
+    SEMANTICS_INVALIDATION_MAX_SIZE = int(
+        os.getenv("SEMANTICS_INVALIDATION_MAX_SIZE", 1024 * 1024)
+    )
+    SEMANTICS_SHARED_STORE = os.getenv("SEMANTICS_SHARED_STORE", "false") == "true"
+    SEMANTICS_SHARED_STORE_DIR = os.getenv(
+        "SEMANTICS_SHARED_STORE_DIR", os.path.join(SHARED_DIR, "ethtx_ce_semantics")
+    )
+    SEMANTICS_SHARED_STORE_SIZE = int(
+        os.getenv("SEMANTICS_SHARED_STORE_SIZE", 256 * 1024 * 1024)
+    )
+    SEMANTICS_WARMUP_ADDRESSES = os.getenv("SEMANTICS_WARMUP_ADDRESSES", "")
+    SEMANTICS_WARMUP_TOP_N = int(os.getenv("SEMANTICS_WARMUP_TOP_N", 100))
+    SEMANTICS_HOT_ADDRESSES_FILE = os.getenv(
+        "SEMANTICS_HOT_ADDRESSES_FILE",
+        os.path.join(SHARED_DIR, "ethtx_ce_hot_addresses.json"),
+    )
+    SEMANTICS_HOT_ADDRESSES_INTERVAL = float(
+        os.getenv("SEMANTICS_HOT_ADDRESSES_INTERVAL", 300)
+    )
+    SIGNATURE_INDEX = os.getenv("SIGNATURE_INDEX", "true") == "true"
+    SIGNATURE_INDEX_FILE = os.getenv(
+        "SIGNATURE_INDEX_FILE", os.path.join(SHARED_DIR, "ethtx_ce_signatures.pickle")
+    )
+    SIGNATURE_INDEX_REFRESH_INTERVAL = float(
+        os.getenv("SIGNATURE_INDEX_REFRESH_INTERVAL", 600)
+    )
+    SEMANTICS_BATCH_MAX_SIZE = int(os.getenv("SEMANTICS_BATCH_MAX_SIZE", 1000))
+    SEMANTICS_IMPORT_BATCH_SIZE = int(os.getenv("SEMANTICS_IMPORT_BATCH_SIZE", 1000))
+    SEMANTICS_IMPORT_MAX_CONTENT_LENGTH = int(
+        os.getenv("SEMANTICS_IMPORT_MAX_CONTENT_LENGTH", 512 * 1024 * 1024)
+    )
+
+    BATCH_DECODE_MAX_SIZE = int(os.getenv("BATCH_DECODE_MAX_SIZE", 100))
+    BATCH_DECODE_CONCURRENCY = int(os.getenv("BATCH_DECODE_CONCURRENCY", 4))
+    BLOCK_DECODE_CONCURRENCY = int(os.getenv("BLOCK_DECODE_CONCURRENCY", 4))
+    CALLS_PAGE_SIZE = int(os.getenv("CALLS_PAGE_SIZE", 500))
+    CALLS_PAGE_MAX_SIZE = int(os.getenv("CALLS_PAGE_MAX_SIZE", 5000))
+
+    JOBS_QUEUE_BACKEND = os.getenv("JOBS_QUEUE_BACKEND", "app.jobs.SQLiteJobQueue")
+    JOBS_QUEUE_URL = os.getenv("JOBS_QUEUE_URL", "/tmp/ethtx_ce_jobs.sqlite3")
+    JOBS_TIMEOUT = int(os.getenv("JOBS_TIMEOUT", 3600))
+    JOBS_RESULT_TTL = int(os.getenv("JOBS_RESULT_TTL", 24 * 3600))
+    JOBS_POLL_INTERVAL = float(os.getenv("JOBS_POLL_INTERVAL", 1.0))
+
+    LATEST_VERSION_TTL = float(os.getenv("LATEST_VERSION_TTL", 3600))
+    LATEST_VERSION_TIMEOUT = float(os.getenv("LATEST_VERSION_TIMEOUT", 5))
+
+    TRANSACTION_PAGE_CACHE_SIZE = int(os.getenv("TRANSACTION_PAGE_CACHE_SIZE", 256))
+    TRANSACTION_PAGE_MAX_AGE = int(os.getenv("TRANSACTION_PAGE_MAX_AGE", 0))
+    TRANSACTION_PAGE_STREAM_THRESHOLD = int(
+        os.getenv("TRANSACTION_PAGE_STREAM_THRESHOLD", 5000)
+    )
+    TRANSACTION_PAGE_CALL_DEPTH = int(os.getenv("TRANSACTION_PAGE_CALL_DEPTH", 4))
+    TRANSACTION_PAGE_FRAGMENT_DEPTH = int(
+        os.getenv("TRANSACTION_PAGE_FRAGMENT_DEPTH", 1)
+    )
+
+    COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true") == "true"
+    COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+    COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", 5))
+    COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", 4))
+    COMPRESSION_ZSTD_LEVEL = int(os.getenv("COMPRESSION_ZSTD_LEVEL", 3))
+    COMPRESSION_CACHE_SIZE = int(os.getenv("COMPRESSION_CACHE_SIZE", 64 * 1024 * 1024))
+
+    ETH_PRICE_SOURCE = os.getenv(
+        "ETH_PRICE_SOURCE", "app.frontend.price_feed.coinbase_eth_price"
+    )
+    ETH_PRICE_FILE = os.getenv(
+        "ETH_PRICE_FILE", os.path.join(SHARED_DIR, "ethtx_ce_eth_price.json")
+    )
+    ETH_PRICE_REFRESH_INTERVAL = float(os.getenv("ETH_PRICE_REFRESH_INTERVAL", 60))
+
 
 class ProductionConfig(Config):
     """Production Config."""
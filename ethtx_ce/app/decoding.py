@@ -0,0 +1,524 @@
+# Copyright 2021 DAI FOUNDATION (the original version https://github.com/daifoundation/ethtx_ce)
+# Copyright 2021-2022 Token Flow Insights SA (modifications to the original software as recorded
+# in the changelog https://github.com/EthTx/ethtx/blob/master/CHANGELOG.md)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# The product contains trademarks and other branding elements of Token Flow Insights SA which are
+# not licensed under the Apache 2.0 license. When using or reproducing the code, please remove
+# the trademark and/or other branding elements.
+
+import fcntl
+import logging
+import os
+import threading
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from typing import (
+    Any,
+    Callable,
+    Collection,
+    Dict,
+    Hashable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from ethtx import EthTx
+from ethtx.decoders.abi.decoder import prune_delegates
+from ethtx.models.decoded_model import DecodedTransaction
+from ethtx.models.objects_model import (
+    Block,
+    Call,
+    Event,
+    Transaction,
+    TransactionMetadata,
+)
+from ethtx.models.w3_model import W3Block, W3Transaction
+from flask import Flask
+
+from .cache import DecodedTransactionCache, init_decoded_cache, used_addresses
+from .helpers import Singleton
+from .semantics_cache import invalidate_semantics
+
+log = logging.getLogger(__name__)
+
+FULL, LITE = "full", "lite"
+
+# decoded transaction sections and the ABI decoding stages needed to build them
+SECTION_STAGES: Dict[str, Tuple[str, ...]] = {
+    "block_metadata": (),
+    "metadata": (),
+    "events": ("events",),
+    "calls": ("calls",),
+    "transfers": ("events", "calls", "transfers"),
+    "balances": ("events", "calls", "transfers", "balances"),
+    "status": (),
+}
+# sections decoded from the transaction receipt, without the trace
+LITE_SECTIONS = frozenset(
+    ("block_metadata", "metadata", "events", "transfers", "balances", "status")
+)
+
+
+class SingleFlight:
+    """Runs one call per key at a time, concurrent callers of the same key share its outcome."""
+
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result: Any = None
+            self.error: Optional[BaseException] = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, SingleFlight._Call] = {}
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = SingleFlight._Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result
+
+
+class DecodeLocks(metaclass=Singleton):
+    """
+    Cross-worker decode locks. Each transaction locks one byte of the shared lock file (POSIX
+    record locks), so workers of the node wait for each other instead of decoding the same transaction.
+    Disabled when the lock file is not configured.
+    """
+
+    def __init__(self, lock_file: Optional[str] = None):
+        self.lock_file = lock_file
+        self._fd: Optional[int] = None
+        self._pid: Optional[int] = None
+
+    @contextmanager
+    def hold(self, chain_id: str, tx_hash: str) -> Iterator[None]:
+        if not self.lock_file:
+            yield
+            return
+
+        fd = self._descriptor()
+        offset = zlib.crc32(f"{chain_id}:{tx_hash}".lower().encode())
+        fcntl.lockf(fd, fcntl.LOCK_EX, 1, offset)
+        try:
+            yield
+        finally:
+            fcntl.lockf(fd, fcntl.LOCK_UN, 1, offset)
+
+    def _descriptor(self) -> int:
+        # record locks are released when any descriptor of the file is closed, keep one per process
+        if self._pid != os.getpid():
+            self._fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o600)
+            self._pid = os.getpid()
+        return self._fd
+
+
+class BackgroundDecodes(metaclass=Singleton):
+    """Full decodes scheduled by lite decodes, run on a small thread pool of each worker."""
+
+    def __init__(self, concurrency: int = 2):
+        self.concurrency = concurrency
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pid: Optional[int] = None
+        self._pending: Set[Tuple[str, str]] = set()
+        self._lock = threading.Lock()
+
+    def schedule(self, engine: EthTx, chain_id: str, tx_hash: str) -> None:
+        """Decode transaction in the background, unless it is already scheduled."""
+        key = (chain_id.lower(), tx_hash.lower())
+        with self._lock:
+            if self._pid != os.getpid():
+                # threads do not survive fork
+                self._executor = ThreadPoolExecutor(
+                    max_workers=max(self.concurrency, 1),
+                    thread_name_prefix="ethtx_ce-full-decode",
+                )
+                self._pid = os.getpid()
+                self._pending.clear()
+            if key in self._pending:
+                return
+            self._pending.add(key)
+
+        self._executor.submit(self._decode, engine, chain_id, tx_hash, key)
+
+    def _decode(
+        self, engine: EthTx, chain_id: str, tx_hash: str, key: Tuple[str, str]
+    ) -> None:
+        try:
+            decode_transaction(engine, chain_id=chain_id, tx_hash=tx_hash)
+        except Exception as e:
+            log.warning("Background decode of %s failed: %s", tx_hash, e)
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+
+
+class ThreadRecords:
+    """
+    Semantics used by decodes, recorded separately by every thread. Replaces the records of the semantics
+    repository, which are shared by all decodes and reset by the first decode ending, so concurrent decodes
+    (`decode_transactions`, background decodes) appended to another decode's records or to None.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def start(self) -> None:
+        self._local.records = []
+
+    def end(self) -> Optional[List[str]]:
+        records = getattr(self._local, "records", None)
+        self._local.records = None
+        return records
+
+    def append(self, address: str) -> None:
+        records = getattr(self._local, "records", None)
+        if records is not None:
+            records.append(address)
+
+
+_decodes = SingleFlight()
+# blocks fetched before the decodes of the thread, by (block number, chain id)
+_prefetched = threading.local()
+
+
+def init_decoding(app: Flask, engine: Optional[EthTx]) -> None:
+    """
+    Setup decoded transactions cache, cross-worker decode locks, background decodes
+    and per-thread semantics records of the engine.
+    """
+    init_decoded_cache(app, engine)
+    DecodeLocks(lock_file=app.config["DECODE_LOCK_FILE"])
+    BackgroundDecodes(concurrency=app.config["LITE_DECODE_UPGRADE_CONCURRENCY"])
+
+    if engine and not isinstance(engine.semantics._records, ThreadRecords):
+        records = engine.semantics._records = ThreadRecords()
+        engine.semantics.record = records.start
+        engine.semantics.end_record = records.end
+
+    # the EthTx decoder fetches the block of every transaction, blocks fetched before are reused
+    web3provider = engine.providers.web3provider if engine else None
+    if (
+        web3provider
+        and getattr(web3provider.get_block, "prefetching", None) is not True
+    ):
+        web3provider.get_block = _prefetching(web3provider.get_block)
+
+
+def decode_transaction(
+    engine: EthTx,
+    chain_id: str,
+    tx_hash: str,
+    recreate_semantics: bool = False,
+    sections: Optional[Collection[str]] = None,
+) -> DecodedTransaction:
+    """
+    Decode transaction, confirmed transactions are served from the decoded transactions cache.
+    Concurrent requests for the same transaction wait for a single decode and share its result.
+    Returned object is shared between requests, use `format_transaction` before changing it.
+    :param engine: EthTx engine
+    :param chain_id: chain id
+    :param tx_hash: transaction hash
+    :param recreate_semantics: skip cache and decode with recreated semantics
+    :param sections: `SECTION_STAGES` keys, when given and the transaction is not cached only the stages
+        needed by the sections are run, other sections are left empty and the result is not cached.
+        Sections needing both events and calls (e.g. transfers) cost nearly the full decode,
+        which is run and cached instead.
+    """
+    if not recreate_semantics:
+        decoded_transaction = _cached(chain_id, tx_hash)
+        if decoded_transaction is not None:
+            return decoded_transaction
+
+        if sections is not None and not {"events", "calls"} <= _stages(sections):
+            sections = frozenset(sections)
+            return _decodes.do(
+                (chain_id.lower(), tx_hash.lower(), sections),
+                lambda: _decode_sections(engine, chain_id, tx_hash, sections),
+            )
+
+    return _decodes.do(
+        (chain_id.lower(), tx_hash.lower(), recreate_semantics),
+        lambda: _decode_transaction(engine, chain_id, tx_hash, recreate_semantics),
+    )
+
+
+def decode_transaction_lite(
+    engine: EthTx, chain_id: str, tx_hash: str
+) -> Tuple[DecodedTransaction, str]:
+    """
+    Decode transaction from its receipt (`LITE_SECTIONS`, no call tree) and schedule the full decode
+    in the background, so the following requests get the cached full decode.
+    Return decoded transaction with its mode: `LITE`, or `FULL` when the full decode is already cached.
+    """
+    decoded_transaction = _cached(chain_id, tx_hash)
+    if decoded_transaction is not None:
+        return decoded_transaction, FULL
+
+    BackgroundDecodes().schedule(engine, chain_id, tx_hash)
+    decoded_transaction = _decodes.do(
+        (chain_id.lower(), tx_hash.lower(), LITE),
+        lambda: _decode_sections(engine, chain_id, tx_hash, LITE_SECTIONS, trace=False),
+    )
+    return decoded_transaction, LITE
+
+
+def _decode_transaction(
+    engine: EthTx, chain_id: str, tx_hash: str, recreate_semantics: bool
+) -> DecodedTransaction:
+    with DecodeLocks().hold(chain_id, tx_hash):
+        if not recreate_semantics:
+            # could have been decoded by another worker in the meantime
+            decoded_transaction = _cached(chain_id, tx_hash)
+            if decoded_transaction is not None:
+                return decoded_transaction
+
+        decoded_transaction = engine.decoders.decode_transaction(
+            chain_id=chain_id, tx_hash=tx_hash, recreate_semantics=recreate_semantics
+        )
+
+        if recreate_semantics:
+            # semantics, decoded transactions and pages of all workers of the node
+            invalidate_semantics(chain_id, used_addresses(decoded_transaction))
+        DecodedTransactionCache().set(decoded_transaction)
+
+    return decoded_transaction
+
+
+def _decode_sections(
+    engine: EthTx,
+    chain_id: str,
+    tx_hash: str,
+    sections: Collection[str],
+    trace: bool = True,
+) -> DecodedTransaction:
+    """
+    Decode transaction the same way as the EthTx decoder service, skipping stages not needed by the sections.
+    Without `trace` only the transaction and its receipt are fetched: the call tree is only the root call
+    built from the transaction, so there are no ETH transfers of internal calls and no proxies known
+    from delegate calls.
+    """
+    service = engine.decoders
+    stages = _stages(sections)
+
+    if trace:
+        transaction = service.web3provider.get_full_transaction(
+            tx_hash=tx_hash, chain_id=chain_id
+        )
+        proxies = service.get_proxies(
+            service.get_delegations(transaction.root_call), chain_id
+        )
+    else:
+        w3transaction = service.web3provider.get_transaction(tx_hash, chain_id)
+        w3receipt = service.web3provider.get_receipt(tx_hash, chain_id)
+        metadata = TransactionMetadata.from_raw(w3transaction, w3receipt)
+        transaction = Transaction.construct(
+            metadata=metadata,
+            root_call=_root_call(w3transaction, metadata),
+            events=[Event.from_raw(w3log) for w3log in w3receipt.logs],
+        )
+        proxies = {}
+
+    block = Block.from_raw(
+        w3block=service.web3provider.get_block(
+            transaction.metadata.block_number, chain_id
+        ),
+        chain_id=chain_id,
+    )
+
+    abi, semantic = service.abi_decoder, service.semantic_decoder
+    decoded_transaction = DecodedTransaction(
+        block_metadata=block.metadata,
+        metadata=transaction.metadata,
+        events=[],
+        calls=None,
+        transfers=[],
+        balances=[],
+    )
+    if "events" in stages:
+        decoded_transaction.events = abi.decode_events(
+            transaction.events, block.metadata, transaction.metadata, proxies, chain_id
+        )
+    if "calls" in stages:
+        decoded_transaction.calls = abi.decode_calls(
+            transaction.root_call,
+            block.metadata,
+            transaction.metadata,
+            proxies,
+            chain_id,
+        )
+    if "transfers" in stages:
+        decoded_transaction.transfers = abi.decode_transfers(
+            decoded_transaction.calls, decoded_transaction.events, proxies, chain_id
+        )
+    if "balances" in stages:
+        decoded_transaction.balances = abi.decode_balances(
+            decoded_transaction.transfers
+        )
+    if "calls" not in sections:
+        # decoded only for transfers, e.g. the root call of the lite decode
+        decoded_transaction.calls = None
+    if decoded_transaction.calls is not None:
+        prune_delegates(decoded_transaction.calls)
+    decoded_transaction.status = True
+
+    # semantic decoding of the requested sections only
+    metadata = semantic.decode_metadata(
+        block.metadata, decoded_transaction.metadata, chain_id
+    )
+    decoded_transaction.metadata = metadata
+    if "events" in sections:
+        decoded_transaction.events = semantic.decode_events(
+            decoded_transaction.events, metadata, proxies
+        )
+    if "calls" in sections:
+        decoded_transaction.calls = semantic.decode_calls(
+            decoded_transaction.calls, metadata, proxies
+        )
+    if "transfers" in sections:
+        decoded_transaction.transfers = semantic.decode_transfers(
+            decoded_transaction.transfers, metadata
+        )
+    if "balances" in sections:
+        decoded_transaction.balances = semantic.decode_balances(
+            decoded_transaction.balances, metadata
+        )
+
+    log.info("Decoded sections %s of %s", ", ".join(sorted(sections)), tx_hash)
+    return decoded_transaction
+
+
+def _stages(sections: Collection[str]) -> Set[str]:
+    """ABI decoding stages needed by the sections."""
+    return {stage for section in sections for stage in SECTION_STAGES[section]}
+
+
+def _root_call(w3transaction: W3Transaction, metadata: TransactionMetadata) -> Call:
+    """Top level call of the transaction, without its subcalls and return value known only from the trace."""
+    return Call(
+        call_type="call" if w3transaction.to else "create",
+        call_gas=metadata.gas_limit,
+        from_address=metadata.from_address,
+        to_address=metadata.to_address,
+        call_value=metadata.tx_value,
+        call_data=w3transaction.input,
+        return_value="0x",
+        gas_used=metadata.gas_used,
+        status=metadata.success,
+        error=None if metadata.success else "Reverted",
+    )
+
+
+def _cached(chain_id: str, tx_hash: str) -> Optional[DecodedTransaction]:
+    decoded_transaction = DecodedTransactionCache().get(chain_id, tx_hash)
+    if decoded_transaction is not None:
+        log.info("Decoded transaction %s served from cache", tx_hash)
+    return decoded_transaction
+
+
+def format_transaction(decoded_transaction: DecodedTransaction) -> DecodedTransaction:
+    """Return a copy of decoded transaction with human-readable timestamp."""
+    metadata = decoded_transaction.metadata
+    if metadata.timestamp is None:
+        return decoded_transaction
+
+    return decoded_transaction.copy(
+        update={
+            "metadata": metadata.copy(
+                update={"timestamp": metadata.timestamp.strftime("%Y-%m-%d %H:%M:%S")}
+            )
+        }
+    )
+
+
+def decode_transactions(
+    engine: EthTx,
+    chain_id: str,
+    tx_hashes: List[str],
+    concurrency: int,
+    ordered: bool = False,
+    block: Optional[W3Block] = None,
+) -> Iterator[Tuple[str, Union[DecodedTransaction, Exception]]]:
+    """
+    Decode transactions on a bounded thread pool, yield (tx_hash, decoded transaction or error) pairs.
+    Semantics caches are shared by all the decodes.
+    :param engine: EthTx engine
+    :param chain_id: chain id
+    :param tx_hashes: transactions hashes
+    :param concurrency: maximum number of concurrent decodes
+    :param ordered: yield in `tx_hashes` order instead of completion order
+    :param block: block of the transactions fetched by the caller, the decodes use it instead of fetching it
+    """
+    blocks = {(block.number, chain_id): block} if block is not None else {}
+    executor = ThreadPoolExecutor(max_workers=max(concurrency, 1))
+    futures = {
+        executor.submit(_decode_with_blocks, engine, chain_id, tx_hash, blocks): tx_hash
+        for tx_hash in tx_hashes
+    }
+    try:
+        for future in futures if ordered else as_completed(futures):
+            yield futures[future], _result(future)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _decode_with_blocks(
+    engine: EthTx, chain_id: str, tx_hash: str, blocks: Dict[Tuple[int, str], W3Block]
+) -> DecodedTransaction:
+    _prefetched.blocks = blocks
+    try:
+        return decode_transaction(engine, chain_id, tx_hash)
+    finally:
+        _prefetched.blocks = {}
+
+
+def _prefetching(get_block: Callable[..., W3Block]) -> Callable[..., W3Block]:
+    """Wrap `get_block` of the web3 provider to return blocks prefetched for the decodes of the thread."""
+
+    def get_block_prefetched(block_number: int, chain_id: Optional[str] = None):
+        block = getattr(_prefetched, "blocks", {}).get((block_number, chain_id))
+        return block if block is not None else get_block(block_number, chain_id)
+
+    get_block_prefetched.prefetching = True
+    get_block_prefetched.__wrapped__ = get_block
+    return get_block_prefetched
+
+
+def _result(future: Future) -> Union[DecodedTransaction, Exception]:
+    try:
+        return future.result()
+    except Exception as e:
+        return e
@@ -0,0 +1,71 @@
+# Copyright 2021 DAI FOUNDATION (the original version https://github.com/daifoundation/ethtx_ce)
+# Copyright 2021-2022 Token Flow Insights SA (modifications to the original software as recorded
+# in the changelog https://github.com/EthTx/ethtx/blob/master/CHANGELOG.md)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# The product contains trademarks and other branding elements of Token Flow Insights SA which are
+# not licensed under the Apache 2.0 license. When using or reproducing the code, please remove
+# the trademark and/or other branding elements.
+
+import logging
+import os
+
+from ethtx import EthTx, EthTxConfig
+from pymongo import MongoClient
+from web3._utils import request as web3_request
+
+from .cache import DecodedTransactionCache
+from .helpers import Singleton
+
+log = logging.getLogger(__name__)
+
+ethtx_config = EthTxConfig(
+    mongo_connection_string=os.getenv("MONGO_CONNECTION_STRING"),
+    etherscan_api_key=os.getenv("ETHERSCAN_KEY"),
+    web3nodes={
+        "mainnet": dict(hook=os.getenv("MAINNET_NODE_URL", ""), poa=False),
+        "goerli": dict(hook=os.getenv("GOERLI_NODE_URL", ""), poa=True),
+    },
+    default_chain="mainnet",
+    etherscan_urls={
+        "mainnet": "https://api.etherscan.io/api",
+        "goerli": "https://api-goerli.etherscan.io/api",
+    },
+)
+
+
+def create_engine() -> EthTx:
+    """Returns EthTx engine instance configured from the environment."""
+    return EthTx.initialize(ethtx_config)
+
+
+def reconnect_engine(engine: EthTx) -> None:
+    """
+    Re-create connections of the engine inherited from the parent process.
+    Call it in the child after fork, e.g. in gunicorn workers of the preloaded app.
+    """
+    database = engine.semantics.database
+    mongo = getattr(database, "database", database)  # unwrap the semantics cache
+
+    if isinstance(mongo._db.client, MongoClient):
+        db = MongoClient(ethtx_config.mongo_connection_string).get_database(
+            mongo._db.name
+        )
+        mongo._db = db
+        mongo._init_collections()
+
+        decoded_cache = Singleton._instances.get(DecodedTransactionCache)
+        if decoded_cache is not None and decoded_cache._collection is not None:
+            decoded_cache._collection = db[DecodedTransactionCache.COLLECTION]
+
+    # web3 keeps HTTP sessions in a module level cache, do not share their sockets with the parent
+    web3_request._session_cache.clear()
+
+    log.info("EthTx engine connections re-created in process %s.", os.getpid())
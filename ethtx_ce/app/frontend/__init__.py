@@ -22,7 +22,11 @@ from flask import Blueprint, Flask
 
 
 from .. import factory
+from ..decoding import init_decoding
 from ..helpers import read_ethtx_versions
+from ..semantics_cache import init_semantics_cache
+from .page_cache import init_page_cache
+from .price_feed import PriceFeed
 
 
 def create_app(
@@ -43,6 +47,10 @@ def create_app(
 
     app.ethtx = engine  # init ethtx engine
     read_ethtx_versions(app)
+    init_decoding(app, engine)
+    init_semantics_cache(app, engine)
+    init_page_cache(app)
+    app.price_feed = PriceFeed.from_config(app.config)
 
     return app
 
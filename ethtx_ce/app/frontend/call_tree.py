@@ -0,0 +1,91 @@
+# Copyright 2021 DAI FOUNDATION (the original version https://github.com/daifoundation/ethtx_ce)
+# Copyright 2021-2022 Token Flow Insights SA (modifications to the original software as recorded
+# in the changelog https://github.com/EthTx/ethtx/blob/master/CHANGELOG.md)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# The product contains trademarks and other branding elements of Token Flow Insights SA which are
+# not licensed under the Apache 2.0 license. When using or reproducing the code, please remove
+# the trademark and/or other branding elements.
+
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from ethtx.models.decoded_model import DecodedCall
+
+OPEN, COLLAPSED, CLOSE = "open", "collapsed", "close"
+
+
+class CallLine(NamedTuple):
+    """Line of the flattened call tree: call opening its subcalls list, collapsed call or closing."""
+
+    kind: str
+    call: Optional[DecodedCall] = None
+
+
+def call_lines(call: DecodedCall, max_depth: int = 0) -> Iterator[CallLine]:
+    """
+    Flatten call tree into lines, so it can be rendered and streamed without recursion.
+    :param max_depth: calls at this depth are collapsed with their subcalls (0 - no limit)
+    """
+    stack = [(call, 1)]
+    while stack:
+        call, depth = stack.pop()
+        if call is None:
+            yield CallLine(CLOSE)
+            continue
+
+        if call.subcalls and max_depth and depth >= max_depth:
+            yield CallLine(COLLAPSED, call)
+            continue
+
+        yield CallLine(OPEN, call)
+        stack.append((None, depth))
+        stack.extend((subcall, depth + 1) for subcall in reversed(call.subcalls))
+
+
+def subcalls_lines(call: DecodedCall, max_depth: int = 0) -> Iterator[CallLine]:
+    """Flatten subcalls of the call, depth is counted from them."""
+    for subcall in call.subcalls:
+        yield from call_lines(subcall, max_depth)
+
+
+def find_call(call: DecodedCall, call_id: str) -> Optional[DecodedCall]:
+    """Find call in the tree by its id."""
+    stack = [call]
+    while stack:
+        call = stack.pop()
+        if call.call_id == call_id:
+            return call
+        stack.extend(call.subcalls)
+
+    return None
+
+
+def count_calls(call: Optional[DecodedCall]) -> int:
+    """Number of calls in the tree."""
+    count, stack = 0, [call] if call else []
+    while stack:
+        count += 1
+        stack.extend(stack.pop().subcalls)
+
+    return count
+
+
+def buffered(chunks: Iterable[str], size: int = 64 * 1024) -> Iterator[str]:
+    """Join small chunks of the rendered template into chunks of about the given size."""
+    buffer, buffer_size = [], 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        buffer_size += len(chunk)
+        if buffer_size >= size:
+            yield "".join(buffer)
+            buffer, buffer_size = [], 0
+
+    if buffer:
+        yield "".join(buffer)
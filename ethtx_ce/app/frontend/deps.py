@@ -14,15 +14,12 @@
 # not licensed under the Apache 2.0 license. When using or reproducing the code, please remove
 # the trademark and/or other branding elements.
 
-import json
 import logging
 import re
-import time
 from secrets import compare_digest
 from typing import Optional
 
-import requests
-from flask import request
+from flask import current_app, request
 from flask_httpauth import HTTPBasicAuth
 
 from ..config import Config
@@ -31,9 +28,6 @@ log = logging.getLogger(__name__)
 
 auth = HTTPBasicAuth()
 
-eth_price: Optional[float] = None
-eth_price_update: Optional[float] = None
-
 
 @auth.verify_password
 def verify_password(username: str, password: str) -> bool:
@@ -44,26 +38,8 @@ def verify_password(username: str, password: str) -> bool:
 
 
 def get_eth_price() -> Optional[float]:
-    """
-    Get current ETH price from coinbase.com
-    Cache price for 60 seconds.
-    """
-    global eth_price, eth_price_update
-
-    current_time = time.time()
-    if (
-        eth_price is None
-        or eth_price_update is None
-        or (current_time - eth_price_update) > 60
-    ):
-        response = requests.get(
-            "https://api.coinbase.com/v2/prices/ETH-USD/buy", timeout=2
-        )
-        if response.status_code == 200:
-            eth_price = float(json.loads(response.content)["data"]["amount"])
-            eth_price_update = time.time()
-
-    return eth_price
+    """Get last known ETH price, refreshed in the background by the price feed."""
+    return current_app.price_feed.price
 
 
 def extract_tx_hash_from_req() -> str:
@@ -0,0 +1,109 @@
+# Copyright 2021 DAI FOUNDATION (the original version https://github.com/daifoundation/ethtx_ce)
+# Copyright 2021-2022 Token Flow Insights SA (modifications to the original software as recorded
+# in the changelog https://github.com/EthTx/ethtx/blob/master/CHANGELOG.md)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# The product contains trademarks and other branding elements of Token Flow Insights SA which are
+# not licensed under the Apache 2.0 license. When using or reproducing the code, please remove
+# the trademark and/or other branding elements.
+
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Iterable, NamedTuple, Optional, Set, Tuple
+
+from ethtx.models.decoded_model import DecodedTransaction
+from flask import Flask
+
+from ..cache import used_addresses
+from ..helpers import Singleton
+from ..semantics_cache import SemanticsInvalidationBus
+
+CacheKey = Tuple[str, str]
+
+
+class RenderedPage(NamedTuple):
+    """Transaction page rendered without the per request fragments, zlib compressed."""
+
+    chain_id: str
+    etag: str
+    html: bytes
+    tx_cost: float
+
+    @classmethod
+    def create(cls, html: str, data: DecodedTransaction) -> "RenderedPage":
+        content = html.encode()
+        return cls(
+            chain_id=data.metadata.chain_id,
+            etag=hashlib.blake2b(content, digest_size=16).hexdigest(),
+            html=zlib.compress(content),
+            tx_cost=data.metadata.gas_used * data.metadata.gas_price,
+        )
+
+
+class RenderedPageCache(metaclass=Singleton):
+    """
+    In-process LRU of rendered pages of confirmed transactions. Like the decoded transactions
+    cache, entries remember used addresses and are dropped on their semantics invalidation.
+    """
+
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+
+        self._entries: "OrderedDict[CacheKey, Tuple[RenderedPage, Set[str]]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def get(self, chain_id: str, tx_hash: str) -> Optional[RenderedPage]:
+        key = (chain_id.lower(), tx_hash.lower())
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, page: RenderedPage, data: DecodedTransaction) -> None:
+        """Store rendered page. Pages of pending transactions are never cached."""
+        if data.metadata.block_number is None or not self.max_size:
+            return
+
+        key = (data.metadata.chain_id.lower(), data.metadata.tx_hash.lower())
+        with self._lock:
+            self._entries[key] = (page, used_addresses(data))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, chain_id: str, addresses: Iterable[str]) -> None:
+        """Drop pages of transactions decoded with semantics of given addresses."""
+        chain_id = chain_id.lower()
+        addresses = {address.lower() for address in addresses if address}
+
+        with self._lock:
+            for key in [
+                key
+                for key, (_, used) in self._entries.items()
+                if key[0] == chain_id and used & addresses
+            ]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        """Drop all rendered pages."""
+        with self._lock:
+            self._entries.clear()
+
+
+def init_page_cache(app: Flask) -> None:
+    """Create rendered pages cache and subscribe it to semantics invalidations."""
+    cache = RenderedPageCache(app.config["TRANSACTION_PAGE_CACHE_SIZE"])
+    SemanticsInvalidationBus().subscribe(cache.invalidate, cache.clear)
@@ -0,0 +1,102 @@
+# Copyright 2021 DAI FOUNDATION (the original version https://github.com/daifoundation/ethtx_ce)
+# Copyright 2021-2022 Token Flow Insights SA (modifications to the original software as recorded
+# in the changelog https://github.com/EthTx/ethtx/blob/master/CHANGELOG.md)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# The product contains trademarks and other branding elements of Token Flow Insights SA which are
+# not licensed under the Apache 2.0 license. When using or reproducing the code, please remove
+# the trademark and/or other branding elements.
+
+import json
+import logging
+import os
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+import requests
+
+from ..background import BackgroundRefresher
+from ..helpers import class_import
+
+log = logging.getLogger(__name__)
+
+PriceSource = Callable[[], Optional[float]]
+
+
+def coinbase_eth_price() -> Optional[float]:
+    """Get current ETH price from coinbase.com"""
+    response = requests.get("https://api.coinbase.com/v2/prices/ETH-USD/buy", timeout=2)
+    if response.status_code != 200:
+        return None
+
+    return float(json.loads(response.content)["data"]["amount"])
+
+
+class PriceFeed(BackgroundRefresher):
+    """
+    ETH price refreshed in the background and shared by all workers of the node through a small file
+    (in `/dev/shm` by default). Workers refresh it only when another one has not done it recently,
+    readers get the last known price and never wait for the network.
+    """
+
+    def __init__(self, source: PriceSource, path: str, interval: float = 60):
+        super().__init__(interval, name="eth-price-feed")
+        self.source = source
+        self.path = path
+
+        self._last: Tuple[Optional[float], Optional[float]] = (None, None)
+
+    @classmethod
+    def from_config(cls, config: Dict) -> "PriceFeed":
+        return cls(
+            source=class_import(config["ETH_PRICE_SOURCE"]),
+            path=config["ETH_PRICE_FILE"],
+            interval=config["ETH_PRICE_REFRESH_INTERVAL"],
+        )
+
+    @property
+    def price(self) -> Optional[float]:
+        """Last known price."""
+        self.start()
+
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            return None
+
+        if self._last[0] != mtime:
+            try:
+                with open(self.path) as f:
+                    self._last = (mtime, json.load(f)["price"])
+            except (OSError, ValueError, KeyError) as e:
+                log.warning("Cannot read ETH price: %s", e)
+
+        return self._last[1]
+
+    def refresh(self) -> None:
+        try:
+            age = time.time() - os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            age = None
+
+        if age is not None:
+            if age < self.interval:
+                return
+            # claim the refresh, so other workers do not fetch the price at the same time
+            os.utime(self.path)
+
+        price = self.source()
+        if price is None:
+            return
+
+        tmp_path = f"{self.path}.{os.getpid()}"
+        with open(tmp_path, "w") as f:
+            json.dump({"price": price, "updated_at": time.time()}, f)
+        os.replace(tmp_path, self.path)
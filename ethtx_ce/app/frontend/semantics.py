@@ -33,11 +33,12 @@ from ethtx.models.semantics_model import (
     ParameterSemantics,
 )
 from flask import Blueprint, render_template, current_app, request, jsonify
-from web3 import Web3
 
 from . import frontend_route
 from .deps import auth
+from ..abi import compile_semantics
 from ..exceptions import EmptyResponseError
+from ..semantics_cache import invalidate_semantics
 
 bp = Blueprint("semantics", __name__)
 
@@ -62,12 +63,12 @@ def reload_semantics():
     data = json.loads(request.data)
 
     ethtx: EthTx = current_app.ethtx
-    ethtx.semantics.database._addresses.delete_one({"address": data["address"]})
-    ethtx.semantics.get_semantics.cache_clear()
-    ethtx.semantics.get_semantics(
-        data["chain_id"] if data.get("chain_id") else current_app.ethtx._default_chain,
-        data["address"],
+    chain_id = (
+        data["chain_id"] if data.get("chain_id") else current_app.ethtx._default_chain
     )
+    ethtx.semantics.database._addresses.delete_one({"address": data["address"]})
+    invalidate_semantics(chain_id, [data["address"]])
+    ethtx.semantics.get_semantics(chain_id, data["address"])
 
     return "ok"
 
@@ -242,14 +243,9 @@ def _semantics_save(data):
         )
 
         current_app.ethtx.semantics.update_semantics(semantics=address_semantics)
-        current_app.ethtx.semantics.get_semantics.cache_clear()
-        current_app.ethtx.semantics.get_event_abi.cache_clear()
-        current_app.ethtx.semantics.get_anonymous_event_abi.cache_clear()
-        current_app.ethtx.semantics.get_transformations.cache_clear()
-        current_app.ethtx.semantics.get_function_abi.cache_clear()
-        current_app.ethtx.semantics.get_constructor_abi.cache_clear()
-        current_app.ethtx.semantics.check_is_contract.cache_clear()
-        current_app.ethtx.semantics.get_standard.cache_clear()
+        invalidate_semantics(
+            address_semantics.chain_id or current_app.ethtx._default_chain, [address]
+        )
 
         result = "ok"
 
@@ -261,101 +257,6 @@ def _semantics_save(data):
 
 
 def _poke_abi(data):
-    # helper function decoding contract ABI
-    def _parse_abi(json_abi):
-
-        # helper function to recursively parse parameters
-        def _parse_parameters(parameters):
-
-            comp_canonical = "("
-            comp_inputs = list()
-
-            for i, parameter in enumerate(parameters):
-                argument = dict(
-                    parameter_name=parameter["name"], parameter_type=parameter["type"]
-                )
-
-                if parameter["type"][:5] == "tuple":
-                    sub_canonical, sub_components = _parse_parameters(
-                        parameter["components"]
-                    )
-                    comp_canonical += sub_canonical + parameter["type"][5:]
-                    argument["components"] = sub_components
-                else:
-                    comp_canonical += parameter["type"]
-                    sub_components = []
-
-                if i < len(parameters) - 1:
-                    comp_canonical += ","
-
-                if (
-                    parameter["type"] in ("string", "bytes")
-                    or parameter["type"][-2:] == "[]"
-                ):
-                    argument["dynamic"] = True
-                elif parameter["type"] == "tuple":
-                    argument["dynamic"] = any(c["dynamic"] for c in sub_components)
-                else:
-                    argument["dynamic"] = False
-
-                if "indexed" in parameter:
-                    argument["indexed"] = parameter["indexed"]
-
-                comp_inputs.append(argument)
-
-            comp_canonical += ")"
-
-            return comp_canonical, comp_inputs
-
-        functions = dict()
-        events = dict()
-
-        for item in json_abi:
-            if "type" in item:
-
-                # parse contract functions
-                if item["type"] == "constructor":
-                    _, inputs = _parse_parameters(item["inputs"])
-                    functions["constructor"] = dict(
-                        signature="constructor",
-                        name="constructor",
-                        inputs=inputs,
-                        outputs=[],
-                    )
-                elif item["type"] == "fallback":
-                    functions["fallback"] = {}
-
-                elif item["type"] == "function":
-                    canonical, inputs = _parse_parameters(item["inputs"])
-                    canonical = item["name"] + canonical
-                    function_hash = Web3.sha3(text=canonical).hex()
-                    signature = function_hash[0:10]
-
-                    _, outputs = _parse_parameters(item["outputs"])
-
-                    functions[signature] = dict(
-                        signature=signature,
-                        name=item["name"],
-                        inputs=inputs,
-                        outputs=outputs,
-                    )
-
-                # parse contract events
-                elif item["type"] == "event":
-                    canonical, parameters = _parse_parameters(item["inputs"])
-                    canonical = item["name"] + canonical
-                    event_hash = Web3.sha3(text=canonical).hex()
-                    signature = event_hash
-
-                    events[signature] = dict(
-                        signature=signature,
-                        name=item["name"],
-                        anonymous=item["anonymous"],
-                        parameters=parameters,
-                    )
-
-        return functions, events
-
     try:
 
         address = data["address"]
@@ -365,73 +266,19 @@ def _poke_abi(data):
         standard = json.loads(data["standard"])
         abi = json.loads(data["abi"])
 
-        if abi and abi != []:
-
-            is_contract = True
-            functions, events = _parse_abi(abi)
-
-            events_semantics = dict()
-            for event in events.values():
-                events_semantics[event.get("signature")] = EventSemantics(
-                    signature=event.get("signature"),
-                    anonymous=event.get("anonymous"),
-                    name=event.get("name"),
-                    parameters=_parameters_semantics(event.get("parameters")),
-                )
-
-            functions_semantics = dict()
-            for function in functions.values():
-                functions_semantics[function.get("signature")] = FunctionSemantics(
-                    signature=function.get("signature"),
-                    name=function.get("name"),
-                    inputs=_parameters_semantics(function.get("inputs")),
-                    outputs=_parameters_semantics(function.get("outputs")),
-                )
-
-            contract_semantics = ContractSemantics(
-                code_hash=chash,
-                name=name,
-                events=events_semantics,
-                functions=functions_semantics,
-                transformations=dict(),
-            )
-
-        else:
-
-            is_contract = False
-            contract_semantics = ContractSemantics(
-                code_hash="0xc5d2460186f7233c927e7db2dcc703c0e500b653ca82273b7bfad8045d85a470",
-                name="EOA",
-                events=dict(),
-                functions=dict(),
-                transformations=dict(),
-            )
-
-        address_semantics = AddressSemantics(
+        address_semantics = compile_semantics(
             chain_id=network,
             address=address,
+            abi=abi,
+            code_hash=chash,
             name=name,
-            is_contract=is_contract,
-            contract=contract_semantics,
-            standard=standard.get("name"),
-            erc20=ERC20Semantics(
-                name=standard["data"].get("name"),
-                symbol=standard["data"].get("symbol"),
-                decimals=standard["data"].get("decimals"),
-            )
-            if standard.get("name") == "ERC20"
-            else None,
+            standard=standard,
         )
 
         current_app.ethtx.semantics.update_semantics(semantics=address_semantics)
-        current_app.ethtx.semantics.get_semantics.cache_clear()
-        current_app.ethtx.semantics.get_event_abi.cache_clear()
-        current_app.ethtx.semantics.get_anonymous_event_abi.cache_clear()
-        current_app.ethtx.semantics.get_transformations.cache_clear()
-        current_app.ethtx.semantics.get_function_abi.cache_clear()
-        current_app.ethtx.semantics.get_constructor_abi.cache_clear()
-        current_app.ethtx.semantics.check_is_contract.cache_clear()
-        current_app.ethtx.semantics.get_standard.cache_clear()
+        invalidate_semantics(
+            address_semantics.chain_id or current_app.ethtx._default_chain, [address]
+        )
 
         logging.info(f"ABI for {address} decoded.")
 
@@ -16,15 +16,37 @@
 
 import logging
 import os
-from typing import Optional
+import zlib
+from typing import Dict, Optional
 
 from ethtx.models.decoded_model import DecodedTransaction
-from flask import Blueprint, render_template, current_app, request
+from flask import (
+    Blueprint,
+    Response,
+    render_template,
+    current_app,
+    request,
+    stream_with_context,
+)
+from markupsafe import Markup
 
 from . import frontend_route, deps
+from .call_tree import buffered, call_lines, count_calls, find_call, subcalls_lines
+from .page_cache import RenderedPage, RenderedPageCache
+from ..decoding import (
+    FULL,
+    LITE,
+    decode_transaction,
+    decode_transaction_lite,
+    format_transaction,
+)
+from ..exceptions import EmptyResponseError
 
 log = logging.getLogger(__name__)
 
+# replaced with the tx cost in USD, rendered with the current ETH price on each request
+TX_COST_USD_MARKER = "<!--tx-cost-usd-->"
+
 bp = Blueprint("transactions", __name__)
 
 
@@ -45,27 +67,154 @@ def read_decoded_transaction(
         log.info(f"Decoding tx {tx_hash} with semantics refresh")
 
     chain_id = chain_id or current_app.ethtx.default_chain
-    decoded_transaction = current_app.ethtx.decoders.decode_transaction(
-        chain_id=chain_id, tx_hash=tx_hash, recreate_semantics=refresh_semantics
+    page_cache = RenderedPageCache()
+    page = None if refresh_semantics else page_cache.get(chain_id, tx_hash)
+
+    if page is None:
+        mode = FULL
+        if request.args.get("mode") == LITE and not refresh_semantics:
+            decoded_transaction, mode = decode_transaction_lite(
+                current_app.ethtx, chain_id=chain_id, tx_hash=tx_hash
+            )
+        else:
+            decoded_transaction = decode_transaction(
+                current_app.ethtx,
+                chain_id=chain_id,
+                tx_hash=tx_hash,
+                recreate_semantics=refresh_semantics,
+            )
+        data = format_transaction(decoded_transaction)
+
+        if mode == LITE:
+            # not cached, the full decode is served as soon as it is done
+            return show_transaction_page(
+                render_transaction_page(data, lite=True), cacheable=False
+            )
+
+        if (
+            count_calls(data.calls)
+            > current_app.config["TRANSACTION_PAGE_STREAM_THRESHOLD"]
+        ):
+            return stream_transaction_page(data)
+
+        page = render_transaction_page(data)
+        page_cache.set(page, decoded_transaction)
+
+    return show_transaction_page(page)
+
+
+@frontend_route(bp, "/<string:chain_id>/<string:tx_hash>/calls/<string:call_id>")
+def read_call_tree_fragment(chain_id: str, tx_hash: str, call_id: str) -> Response:
+    """
+    Render subcalls of the call collapsed on the transaction page, from the cached decoded transaction.
+    Calls deeper than TRANSACTION_PAGE_FRAGMENT_DEPTH are collapsed again.
+    """
+    tx_hash = tx_hash if tx_hash.startswith("0x") else "0x" + tx_hash
+    decoded_transaction = decode_transaction(
+        current_app.ethtx, chain_id=chain_id, tx_hash=tx_hash
     )
-    decoded_transaction.metadata.timestamp = (
-        decoded_transaction.metadata.timestamp.strftime("%Y-%m-%d %H:%M:%S")
+
+    call = (
+        find_call(decoded_transaction.calls, call_id)
+        if decoded_transaction.calls
+        else None
+    )
+    if call is None:
+        raise EmptyResponseError(f"Call {call_id} not found in {tx_hash}.")
+
+    response = Response(
+        render_template(
+            "partials/call_tree.html",
+            transaction=decoded_transaction.metadata,
+            call_lines=subcalls_lines(
+                call, current_app.config["TRANSACTION_PAGE_FRAGMENT_DEPTH"]
+            ),
+        ),
+        mimetype="text/html",
     )
+    response.add_etag()
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config["TRANSACTION_PAGE_MAX_AGE"]
+    response.cache_control.must_revalidate = True
 
-    return show_transaction_page(decoded_transaction)
+    return response.make_conditional(request)
 
 
-def show_transaction_page(data: DecodedTransaction) -> render_template:
-    """Render transaction/exception page."""
-    return (
-        render_template(
-            "transaction.html",
-            eth_price=deps.get_eth_price(),
-            transaction=data.metadata,
-            events=data.events,
-            call=data.calls,
-            transfers=data.transfers,
-            balances=data.balances,
+def render_transaction_page(
+    data: DecodedTransaction, lite: bool = False
+) -> RenderedPage:
+    """Render transaction page, without the tx cost in USD."""
+    return RenderedPage.create(
+        render_template("transaction.html", **_page_context(data), lite=lite), data
+    )
+
+
+def stream_transaction_page(data: DecodedTransaction) -> Response:
+    """
+    Stream transaction page rendered with the current tx cost in USD.
+    The call tree is rendered last, so everything else is sent before it.
+    """
+    eth_price = deps.get_eth_price() if data.metadata.chain_id == "mainnet" else None
+    context = _page_context(data)
+    context["tx_cost_usd"] = Markup(
+        _render_tx_cost_usd(data.metadata.gas_used * data.metadata.gas_price, eth_price)
+    )
+
+    app = current_app._get_current_object()
+    app.update_template_context(context)
+    template = app.jinja_env.get_template("transaction.html")
+
+    return Response(
+        stream_with_context(buffered(template.generate(context))),
+        mimetype="text/html",
+    )
+
+
+def show_transaction_page(page: RenderedPage, cacheable: bool = True) -> Response:
+    """
+    Send rendered transaction page with the current tx cost in USD, or 304 if not modified.
+    :param cacheable: False for incomplete pages (lite decodes), they are sent without ETag and not stored
+    """
+    eth_price = deps.get_eth_price() if page.chain_id == "mainnet" else None
+    etag = f"{page.etag}-{eth_price}" if eth_price else page.etag
+
+    if cacheable and request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        html = zlib.decompress(page.html).decode()
+        tx_cost_usd = _render_tx_cost_usd(page.tx_cost, eth_price)
+        response = Response(
+            html.replace(TX_COST_USD_MARKER, tx_cost_usd, 1), mimetype="text/html"
+        )
+
+    if not cacheable:
+        response.cache_control.no_store = True
+        return response
+
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config["TRANSACTION_PAGE_MAX_AGE"]
+    response.cache_control.must_revalidate = True
+
+    return response
+
+
+def _page_context(data: DecodedTransaction) -> Dict:
+    return dict(
+        transaction=data.metadata,
+        events=data.events,
+        call=data.calls,
+        call_lines=(
+            call_lines(data.calls, current_app.config["TRANSACTION_PAGE_CALL_DEPTH"])
+            if data.calls
+            else []
         ),
-        200,
+        transfers=data.transfers,
+        balances=data.balances,
+    )
+
+
+def _render_tx_cost_usd(tx_cost: float, eth_price: Optional[float]) -> str:
+    return render_template(
+        "partials/tx_cost_usd.html", tx_cost=tx_cost, eth_price=eth_price
     )
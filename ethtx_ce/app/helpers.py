@@ -18,12 +18,12 @@ import importlib
 import logging
 import os
 import pkgutil
+from functools import lru_cache
+from importlib import metadata
 from typing import Any, List, Tuple, Optional
 
-import pkg_resources
 import requests
 from flask import Blueprint, Flask
-from git import Repo
 
 log = logging.getLogger(__name__)
 
@@ -71,14 +71,7 @@ class Singleton(type):
 
 def read_ethtx_versions(app: Flask) -> None:
     """Read ethtx and ethtx_ce versions."""
-    ethtx_version = pkg_resources.get_distribution("ethtx").version
-
-    try:
-        remote_url, sha = _get_version_from_git()
-    except Exception:
-        remote_url, sha = _get_version_from_docker()
-
-    ethtx_ce_version = f"{_clean_up_git_link(remote_url)}/tree/{sha}"
+    ethtx_version, ethtx_ce_version = get_versions()
 
     log.info(
         "%s: EthTx version: %s. EthTx CE version: %s",
@@ -91,10 +84,23 @@ def read_ethtx_versions(app: Flask) -> None:
     app.config["ethtx_ce_version"] = ethtx_ce_version
 
 
-def get_latest_ethtx_version() -> str:
+@lru_cache(maxsize=None)
+def get_versions() -> Tuple[str, str]:
+    """Get ethtx and ethtx_ce versions, resolved once per process."""
+    ethtx_version = metadata.version("ethtx")
+
+    try:
+        remote_url, sha = _get_version_from_git()
+    except Exception:
+        remote_url, sha = _get_version_from_docker()
+
+    return ethtx_version, f"{_clean_up_git_link(remote_url)}/tree/{sha}"
+
+
+def get_latest_ethtx_version(timeout: Optional[float] = None) -> str:
     """Get latest EthTx version."""
     package = "EthTx"
-    response = requests.get(f"https://pypi.org/pypi/{package}/json")
+    response = requests.get(f"https://pypi.org/pypi/{package}/json", timeout=timeout)
 
     if response.status_code != 200:
         log.warning("Failed to get latest EthTx version from PyPI")
@@ -105,14 +111,62 @@ def get_latest_ethtx_version() -> str:
 
 
 def _get_version_from_git() -> Tuple[str, str]:
-    """Get EthTx CE version from .git"""
-    repo = Repo(__file__, search_parent_directories=True)
+    """Get EthTx CE version from .git files, without running git."""
+    git_dir = _find_git_dir(os.path.dirname(os.path.abspath(__file__)))
+
+    with open(os.path.join(git_dir, "HEAD")) as f:
+        head = f.read().strip()
+    sha = _read_git_ref(git_dir, head[5:]) if head.startswith("ref: ") else head
 
-    remote_url = repo.remote("origin").url
-    sha = repo.head.commit.hexsha
-    short_sha = repo.git.rev_parse(sha, short=True)
+    return _read_git_remote_url(git_dir), sha[:7]
 
-    return remote_url, short_sha
+
+def _find_git_dir(path: str) -> str:
+    """Find .git directory of the repository containing the path."""
+    while True:
+        git_path = os.path.join(path, ".git")
+        if os.path.isdir(git_path):
+            return git_path
+        if os.path.isfile(git_path):  # worktree or submodule
+            with open(git_path) as f:
+                git_dir = f.read().strip()[len("gitdir: ") :]
+            return os.path.join(path, git_dir)
+
+        parent = os.path.dirname(path)
+        if parent == path:
+            raise FileNotFoundError(".git not found")
+        path = parent
+
+
+def _read_git_ref(git_dir: str, ref: str) -> str:
+    """Read commit sha of the ref, loose or packed."""
+    try:
+        with open(os.path.join(git_dir, ref)) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        pass
+
+    with open(os.path.join(git_dir, "packed-refs")) as f:
+        for line in f:
+            sha, _, name = line.strip().partition(" ")
+            if name == ref:
+                return sha
+
+    raise LookupError(f"Git ref {ref} not found")
+
+
+def _read_git_remote_url(git_dir: str) -> str:
+    """Read origin remote url from the git config."""
+    in_origin = False
+    with open(os.path.join(git_dir, "config")) as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("["):
+                in_origin = line == '[remote "origin"]'
+            elif in_origin and line.startswith("url"):
+                return line.partition("=")[2].strip()
+
+    raise LookupError("Git remote origin not found")
 
 
 def _get_version_from_docker() -> Tuple[str, str]:
@@ -0,0 +1,274 @@
+# Copyright 2021 DAI FOUNDATION (the original version https://github.com/daifoundation/ethtx_ce)
+# Copyright 2021-2022 Token Flow Insights SA (modifications to the original software as recorded
+# in the changelog https://github.com/EthTx/ethtx/blob/master/CHANGELOG.md)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# The product contains trademarks and other branding elements of Token Flow Insights SA which are
+# not licensed under the Apache 2.0 license. When using or reproducing the code, please remove
+# the trademark and/or other branding elements.
+
+import sqlite3
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import closing
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from enum import Enum
+from typing import Dict, Optional
+
+from ..helpers import class_import
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+@dataclass
+class Job:
+    id: str
+    chain_id: str
+    tx_hash: str
+    status: JobStatus
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    worker: Optional[str] = None
+
+    def dict(self) -> Dict:
+        return {
+            **asdict(self),
+            "status": self.status.value,
+            "created_at": _datetime(self.created_at),
+            "started_at": _datetime(self.started_at),
+            "finished_at": _datetime(self.finished_at),
+        }
+
+
+class JobQueue(ABC):
+    """Decode jobs queue. Represents interface required to be implemented by a queue backend."""
+
+    @abstractmethod
+    def enqueue(self, chain_id: str, tx_hash: str) -> Job:
+        """Add decode job, return already queued or running job for the same transaction."""
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Job]:
+        """Get job by id."""
+
+    @abstractmethod
+    def claim(self, worker: str) -> Optional[Job]:
+        """Take the oldest queued job and mark it as running by the worker."""
+
+    @abstractmethod
+    def complete(self, job_id: str, worker: str, result: str) -> bool:
+        """
+        Mark job as done and store its (serialized) result. Only the worker running the job can finish it,
+        False if the job was queued again in the meantime.
+        """
+
+    @abstractmethod
+    def fail(self, job_id: str, worker: str, error: str) -> bool:
+        """Mark job as failed, only by the worker running it (see `complete`)."""
+
+    @abstractmethod
+    def result(self, job_id: str) -> Optional[str]:
+        """Get serialized result of the done job."""
+
+    @abstractmethod
+    def purge(self, older_than: float) -> int:
+        """Delete finished jobs older than the given number of seconds."""
+
+
+class SQLiteJobQueue(JobQueue):
+    """
+    Jobs queue kept in a SQLite file, shared by web and job workers of a single node.
+    Running jobs not finished within `timeout` seconds are queued again.
+    """
+
+    def __init__(self, url: str, timeout: float = 3600):
+        self.path = url
+        self.timeout = timeout
+
+        with closing(self._connect()) as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    chain_id TEXT NOT NULL,
+                    tx_hash TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    error TEXT,
+                    result TEXT,
+                    worker TEXT
+                )
+                """)
+            columns = [row[1] for row in connection.execute("PRAGMA table_info(jobs)")]
+            if "worker" not in columns:
+                # queue files created before jobs were owned by their workers
+                connection.execute("ALTER TABLE jobs ADD COLUMN worker TEXT")
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS jobs_tx ON jobs (chain_id, tx_hash, status)"
+            )
+
+    def enqueue(self, chain_id: str, tx_hash: str) -> Job:
+        with closing(self._connect()) as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            row = connection.execute(
+                f"SELECT {_JOB_COLUMNS} FROM jobs WHERE chain_id = ? AND tx_hash = ? AND status IN (?, ?)",
+                (chain_id, tx_hash, JobStatus.QUEUED.value, JobStatus.RUNNING.value),
+            ).fetchone()
+            if row:
+                connection.execute("COMMIT")
+                return _job(row)
+
+            job = Job(
+                id=uuid.uuid4().hex,
+                chain_id=chain_id,
+                tx_hash=tx_hash,
+                status=JobStatus.QUEUED,
+                created_at=time.time(),
+            )
+            connection.execute(
+                "INSERT INTO jobs (id, chain_id, tx_hash, status, created_at) VALUES (?, ?, ?, ?, ?)",
+                (job.id, job.chain_id, job.tx_hash, job.status.value, job.created_at),
+            )
+            connection.execute("COMMIT")
+
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with closing(self._connect()) as connection:
+            row = connection.execute(
+                f"SELECT {_JOB_COLUMNS} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+
+        return _job(row) if row else None
+
+    def claim(self, worker: str) -> Optional[Job]:
+        now = time.time()
+        with closing(self._connect()) as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute(
+                "UPDATE jobs SET status = ?, started_at = NULL, worker = NULL WHERE status = ? AND started_at < ?",
+                (JobStatus.QUEUED.value, JobStatus.RUNNING.value, now - self.timeout),
+            )
+            row = connection.execute(
+                f"SELECT {_JOB_COLUMNS} FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1",
+                (JobStatus.QUEUED.value,),
+            ).fetchone()
+            if row:
+                connection.execute(
+                    "UPDATE jobs SET status = ?, started_at = ?, worker = ? WHERE id = ?",
+                    (JobStatus.RUNNING.value, now, worker, row[0]),
+                )
+            connection.execute("COMMIT")
+
+        if not row:
+            return None
+
+        job = _job(row)
+        job.status, job.started_at, job.worker = JobStatus.RUNNING, now, worker
+        return job
+
+    def complete(self, job_id: str, worker: str, result: str) -> bool:
+        return self._finish(job_id, worker, JobStatus.DONE, result=result)
+
+    def fail(self, job_id: str, worker: str, error: str) -> bool:
+        return self._finish(job_id, worker, JobStatus.FAILED, error=error)
+
+    def result(self, job_id: str) -> Optional[str]:
+        with closing(self._connect()) as connection:
+            row = connection.execute(
+                "SELECT result FROM jobs WHERE id = ? AND status = ?",
+                (job_id, JobStatus.DONE.value),
+            ).fetchone()
+
+        return row[0] if row else None
+
+    def purge(self, older_than: float) -> int:
+        with closing(self._connect()) as connection:
+            cursor = connection.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+                (
+                    JobStatus.DONE.value,
+                    JobStatus.FAILED.value,
+                    time.time() - older_than,
+                ),
+            )
+
+        return cursor.rowcount
+
+    def _finish(
+        self,
+        job_id: str,
+        worker: str,
+        status: JobStatus,
+        result: Optional[str] = None,
+        error: Optional[str] = None,
+    ) -> bool:
+        with closing(self._connect()) as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, result = ?, error = ? "
+                "WHERE id = ? AND status = ? AND worker = ?",
+                (
+                    status.value,
+                    time.time(),
+                    result,
+                    error,
+                    job_id,
+                    JobStatus.RUNNING.value,
+                    worker,
+                ),
+            )
+
+        return cursor.rowcount == 1
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+
+def create_job_queue(config) -> JobQueue:
+    """Create jobs queue backend configured by `JOBS_QUEUE_BACKEND` and `JOBS_QUEUE_URL`."""
+    backend = class_import(config["JOBS_QUEUE_BACKEND"])
+    return backend(config["JOBS_QUEUE_URL"], timeout=config["JOBS_TIMEOUT"])
+
+
+_JOB_COLUMNS = (
+    "id, chain_id, tx_hash, status, created_at, started_at, finished_at, error, worker"
+)
+
+
+def _job(row) -> Job:
+    return Job(
+        id=row[0],
+        chain_id=row[1],
+        tx_hash=row[2],
+        status=JobStatus(row[3]),
+        created_at=row[4],
+        started_at=row[5],
+        finished_at=row[6],
+        error=row[7],
+        worker=row[8],
+    )
+
+
+def _datetime(timestamp: Optional[float]) -> Optional[datetime]:
+    return datetime.utcfromtimestamp(timestamp) if timestamp is not None else None
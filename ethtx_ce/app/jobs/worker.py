@@ -0,0 +1,190 @@
+# Copyright 2021 DAI FOUNDATION (the original version https://github.com/daifoundation/ethtx_ce)
+# Copyright 2021-2022 Token Flow Insights SA (modifications to the original software as recorded
+# in the changelog https://github.com/EthTx/ethtx/blob/master/CHANGELOG.md)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# The product contains trademarks and other branding elements of Token Flow Insights SA which are
+# not licensed under the Apache 2.0 license. When using or reproducing the code, please remove
+# the trademark and/or other branding elements.
+
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+from typing import List
+
+from flask import Flask
+
+from .queue import Job, JobQueue, create_job_queue
+from ..api.exceptions import item_error
+from ..api.utils import jsonable
+from ..decoding import decode_transaction, format_transaction
+from ..semantics_cache import SemanticsInvalidationBus
+
+log = logging.getLogger(__name__)
+
+PURGE_INTERVAL = 60
+STOP_TIMEOUT = 600
+
+
+class JobWorker:
+    """Runs decode jobs taken from the queue until stopped."""
+
+    def __init__(self, app: Flask, queue: JobQueue, poll_interval: float = 1.0):
+        self.app = app
+        self.queue = queue
+        self.poll_interval = poll_interval
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self._running = False
+
+    def run(self) -> None:
+        self._running = True
+        last_purge = 0.0
+
+        while self._running:
+            if time.time() - last_purge > PURGE_INTERVAL:
+                self.queue.purge(self.app.config["JOBS_RESULT_TTL"])
+                last_purge = time.time()
+
+            job = self.queue.claim(self.name)
+            if job is None:
+                time.sleep(self.poll_interval)
+                continue
+
+            SemanticsInvalidationBus().poll()
+            self.process(job)
+
+    def stop(self, *_) -> None:
+        self._running = False
+
+    def process(self, job: Job) -> None:
+        log.info("Job %s: decoding %s / %s.", job.id, job.tx_hash, job.chain_id)
+        try:
+            decoded_transaction = decode_transaction(
+                self.app.ethtx, chain_id=job.chain_id, tx_hash=job.tx_hash
+            )
+            result = json.dumps(
+                jsonable(format_transaction(decoded_transaction).dict())
+            )
+        except Exception as e:
+            finished = self.queue.fail(job.id, self.name, item_error(e)["error"])
+        else:
+            finished = self.queue.complete(job.id, self.name, result)
+
+        if finished:
+            log.info("Job %s: done.", job.id)
+        else:
+            log.warning("Job %s: timed out and queued again, result dropped.", job.id)
+
+
+def run_worker() -> None:
+    """Job worker process entrypoint."""
+    from .. import api
+    from ..engine import create_engine
+
+    app = api.create_app(engine=create_engine())
+    worker = JobWorker(
+        app, create_job_queue(app.config), app.config["JOBS_POLL_INTERVAL"]
+    )
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+
+    with app.app_context():
+        worker.run()
+
+
+class JobWorkers:
+    """Job worker processes, restarted when they exit while not stopped."""
+
+    def __init__(self, count: int, check_interval: float = 1.0):
+        self.count = count
+        self.check_interval = check_interval
+        self.processes: List[multiprocessing.Process] = []
+        self._stopping = threading.Event()
+        self._supervisor = threading.Thread(
+            target=self._supervise, name="ethtx_ce-job-workers", daemon=True
+        )
+
+    def start(self) -> None:
+        self.processes = [self._spawn(index) for index in range(self.count)]
+        self._supervisor.start()
+        log.info("Started %s job workers.", self.count)
+
+    def wait(self) -> None:
+        """Block until the workers are stopped."""
+        self._stopping.wait()
+
+    def stop(self, timeout: float) -> None:
+        """
+        Stop the workers, each finishes its current job first. Workers still running after `timeout` seconds are
+        killed, their jobs are queued again by the next claim after JOBS_TIMEOUT.
+        """
+        self._stopping.set()
+        if self._supervisor.is_alive():
+            self._supervisor.join()
+
+        for process in self.processes:
+            process.terminate()
+
+        deadline = time.time() + timeout
+        for process in self.processes:
+            process.join(max(deadline - time.time(), 0))
+            if process.is_alive():
+                log.warning(
+                    "Job worker %s did not stop in %ss, killed, its job is queued again after JOBS_TIMEOUT.",
+                    process.name,
+                    timeout,
+                )
+                process.kill()
+                process.join()
+
+    def _spawn(self, index: int) -> multiprocessing.Process:
+        process = multiprocessing.Process(
+            target=run_worker, name=f"ethtx_ce-job-worker-{index}", daemon=True
+        )
+        process.start()
+        return process
+
+    def _supervise(self) -> None:
+        while not self._stopping.wait(self.check_interval):
+            for index, process in enumerate(self.processes):
+                if process.is_alive() or self._stopping.is_set():
+                    continue
+
+                log.warning(
+                    "Job worker %s exited with code %s, restarting.",
+                    process.name,
+                    process.exitcode,
+                )
+                self.processes[index] = self._spawn(index)
+
+
+def start_workers(count: int) -> JobWorkers:
+    """Start job worker processes."""
+    workers = JobWorkers(count)
+    workers.start()
+    return workers
+
+
+def stop_workers(workers: JobWorkers, timeout: float = STOP_TIMEOUT) -> None:
+    """Stop job worker processes, workers exit after finishing the current job (see `JobWorkers.stop`)."""
+    workers.stop(timeout)
+
+
+if __name__ == "__main__":
+    workers = start_workers(int(os.getenv("JOBS_WORKERS", 1)))
+    try:
+        workers.wait()
+    except KeyboardInterrupt:
+        stop_workers(workers, float(os.getenv("JOBS_STOP_TIMEOUT", STOP_TIMEOUT)))
@@ -0,0 +1,626 @@
+# Copyright 2021 DAI FOUNDATION (the original version https://github.com/daifoundation/ethtx_ce)
+# Copyright 2021-2022 Token Flow Insights SA (modifications to the original software as recorded
+# in the changelog https://github.com/EthTx/ethtx/blob/master/CHANGELOG.md)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# The product contains trademarks and other branding elements of Token Flow Insights SA which are
+# not licensed under the Apache 2.0 license. When using or reproducing the code, please remove
+# the trademark and/or other branding elements.
+
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import pickle
+import threading
+import uuid
+from collections import Counter, OrderedDict, defaultdict
+from functools import partial
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+from bson import ObjectId
+from ethtx import EthTx
+from ethtx.providers.semantic_providers import MongoSemanticsDatabase
+from flask import Flask
+from pymongo import ReturnDocument
+
+from .cache import DecodedTransactionCache
+from .helpers import Singleton
+from .signatures import SignatureIndex, most_used_signature
+from .warmup import HotAddresses, SemanticsWarmup, init_warmup
+
+log = logging.getLogger(__name__)
+
+InvalidationCallback = Callable[[str, List[str]], None]
+
+
+class SharedSemanticsStore:
+    """
+    Semantics records shared by all workers of the node, one pickled file per key in a directory
+    (in `/dev/shm` by default, so the files stay in memory). Files are replaced atomically, when
+    the store grows over `max_size` bytes the oldest written entries are removed. Entries are stamped
+    with the EthTx version, so records written by workers of another version are not read.
+    """
+
+    EVICTION_CHECK_INTERVAL = 32
+
+    def __init__(self, path: str, max_size: int, version: str = ""):
+        self.path = path
+        self.max_size = max_size
+        self.version = version
+
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+
+        os.makedirs(self.path, mode=0o700, exist_ok=True)
+
+    def get(self, key: Hashable) -> Optional[Dict]:
+        try:
+            with open(self._file(key), "rb") as f:
+                version, record = pickle.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, pickle.PickleError, EOFError, TypeError, ValueError) as e:
+            log.warning("Cannot read shared semantics %s: %s", key, e)
+            self.misses += 1
+            return None
+
+        if version != self.version:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return record
+
+    def set(self, key: Hashable, record: Dict) -> None:
+        path = self._file(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                pickle.dump((self.version, record), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            log.warning("Cannot write shared semantics %s: %s", key, e)
+            return
+
+        self._writes += 1
+        if self._writes % self.EVICTION_CHECK_INTERVAL == 0:
+            self._evict_oldest()
+
+    def delete(self, key: Hashable) -> None:
+        try:
+            os.remove(self._file(key))
+        except FileNotFoundError:
+            pass
+
+    def stats(self) -> Dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def _file(self, key: Hashable) -> str:
+        return os.path.join(self.path, hashlib.sha1(repr(key).encode()).hexdigest())
+
+    def _evict_oldest(self) -> None:
+        entries = []
+        with os.scandir(self.path) as files:
+            for file in files:
+                if file.name.endswith(".tmp"):
+                    continue
+                try:
+                    stat = file.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, file.path))
+
+        size = sum(entry[1] for entry in entries)
+        for _, file_size, path in sorted(entries):
+            if size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            size -= file_size
+
+
+class CachedSemanticsDatabase:
+    """
+    Per-process cache of address and contract semantics records in front of the semantics database.
+    Unlike the `lru_cache` of the database, which can only be cleared as a whole, entries of a single
+    address (and of its contract) can be evicted. Misses are looked up in the optional shared store
+    before the database. Signatures are looked up in the optional signature index before the database.
+    Other calls are passed through to the database.
+    """
+
+    def __init__(
+        self,
+        database: MongoSemanticsDatabase,
+        max_size: int = 1024,
+        store: Optional[SharedSemanticsStore] = None,
+    ):
+        self.database = database
+        self.max_size = max_size
+        self.store = store
+
+        # accesses per (chain_id, address), counted when recording hot addresses
+        self.accesses: Optional[Counter] = None
+        self.hot_addresses: Optional[HotAddresses] = None
+        self.warmup: Optional[SemanticsWarmup] = None
+        self.signatures: Optional[SignatureIndex] = None
+
+        self._entries: "OrderedDict[Hashable, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # generation of the last eviction of recently evicted keys, records loaded while their key
+        # was evicted are not cached. Older evictions are forgotten, up to the floor generation.
+        self._generation = 0
+        self._evicted: "OrderedDict[Hashable, int]" = OrderedDict()
+        self._evicted_floor = 0
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.database, name)
+
+    def get_address_semantics(self, chain_id: str, address: str) -> Optional[Dict]:
+        if self.accesses is not None:
+            with self._lock:
+                self.accesses[(chain_id, address)] += 1
+
+        return self._get(
+            ("address", chain_id, address),
+            lambda: self.database._addresses.find_one(
+                {"chain_id": chain_id, "address": address}
+            ),
+        )
+
+    def get_contract_semantics(self, code_hash: str) -> Optional[Dict]:
+        return self._get(
+            ("contract", code_hash),
+            lambda: self.database._contracts.find_one({"code_hash": code_hash}),
+        )
+
+    def get_many_address_semantics(
+        self, addresses: Iterable[Tuple[str, str]]
+    ) -> Dict[Tuple[str, str], Dict]:
+        """Address semantics records of (chain_id, address) pairs found, misses are loaded with a single query."""
+        keys = [("address", chain_id, address) for chain_id, address in addresses]
+        if self.accesses is not None:
+            with self._lock:
+                self.accesses.update(key[1:] for key in keys)
+
+        def load(misses: List[Hashable]) -> Iterable[Tuple[Hashable, Dict]]:
+            by_chain = defaultdict(list)
+            for _, chain_id, address in misses:
+                by_chain[chain_id].append(address)
+
+            query = [
+                {"chain_id": chain_id, "address": {"$in": chain_addresses}}
+                for chain_id, chain_addresses in by_chain.items()
+            ]
+            for record in self.database._addresses.find({"$or": query}):
+                yield ("address", record["chain_id"], record["address"]), record
+
+        return {key[1:]: record for key, record in self._get_many(keys, load).items()}
+
+    def get_many_contract_semantics(
+        self, code_hashes: Iterable[str]
+    ) -> Dict[str, Dict]:
+        """Contract semantics records of code hashes found, misses are loaded with a single query."""
+        keys = [("contract", code_hash) for code_hash in code_hashes]
+
+        def load(misses: List[Hashable]) -> Iterable[Tuple[Hashable, Dict]]:
+            query = {"code_hash": {"$in": [code_hash for _, code_hash in misses]}}
+            for record in self.database._contracts.find(query):
+                yield ("contract", record["code_hash"]), record
+
+        return {key[1]: record for key, record in self._get_many(keys, load).items()}
+
+    def insert_address(self, address: Dict, update_if_exist: Optional[bool] = False):
+        result = self.database.insert_address(address, update_if_exist)
+        self._evict_keys([("address", address["chain_id"], address["address"])])
+        return result
+
+    def insert_contract(self, contract: Dict, update_if_exist: Optional[bool] = False):
+        result = self.database.insert_contract(contract, update_if_exist)
+        self._evict_keys([("contract", contract["code_hash"])])
+        if self.signatures:
+            self.signatures.add_contract(contract)
+        return result
+
+    def get_signature_candidates(self, signature_hash: str) -> Iterable[Dict]:
+        """Candidate signatures to guess the function from, from the signature index when loaded."""
+        candidates = (
+            self.signatures.functions(signature_hash) if self.signatures else None
+        )
+        if candidates:
+            return candidates
+
+        return self.database.get_signature_semantics(signature_hash)
+
+    def insert_signature(
+        self, signature: Dict, update_if_exist: Optional[bool] = False
+    ) -> Optional[ObjectId]:
+        """
+        Count the signature in with an atomic update of the stored one (EthTx passes the stored signature
+        with the count already increased, replacing it would drop increments of other workers), insert it
+        if not stored yet. Signatures are the same for EthTx if their name and number of args match.
+        """
+        if update_if_exist and "_id" in signature:
+            query = {"_id": signature["_id"]}
+            update = {
+                "$inc": {"count": 1},
+                "$set": {"args": signature["args"], "guessed": signature["guessed"]},
+            }
+        else:
+            query = {
+                "signature_hash": signature["signature_hash"],
+                "name": signature["name"],
+                "args": {"$size": len(signature["args"])},
+            }
+            update = {
+                "$inc": {"count": signature.get("count", 1)},
+                "$setOnInsert": {
+                    key: value
+                    for key, value in signature.items()
+                    if key not in ("_id", "count", "signature_hash", "name")
+                },
+            }
+
+        stored = self.database._signatures.find_one_and_update(
+            query, update, upsert=True, return_document=ReturnDocument.AFTER
+        )
+        if self.signatures and stored:
+            self.signatures.add_signature(stored)
+        return stored["_id"] if stored else None
+
+    def delete_semantics_by_address(self, chain_id: str, address: str) -> None:
+        self.evict(chain_id, [address])
+        self.database.delete_semantics_by_address(chain_id, address)
+
+    def evict(self, chain_id: str, addresses: Iterable[str]) -> None:
+        """Evict semantics of given addresses and of their contracts, cached and current ones."""
+        addresses = list(addresses)
+        keys = [("address", chain_id, address) for address in addresses]
+        with self._lock:
+            records = [self._entries.get(key) for key in keys]
+
+        records.extend(
+            self.database._addresses.find(
+                {"chain_id": chain_id, "address": {"$in": addresses}}, {"contract": 1}
+            )
+        )
+        keys.extend(
+            {
+                ("contract", record["contract"])
+                for record in records
+                if record and record.get("contract")
+            }
+        )
+
+        self._evict_keys(keys)
+
+    def clear(self) -> None:
+        """Drop all semantics cached by this worker, records being loaded are not cached."""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._evicted.clear()
+            self._evicted_floor = self._generation
+
+    def stats(self) -> Dict:
+        """Number of cached entries and shared store counters of this worker."""
+        return {
+            "entries": len(self._entries),
+            "shared_store": self.store.stats() if self.store else None,
+            "signature_index": self.signatures.stats() if self.signatures else None,
+        }
+
+    def _get(self, key: Hashable, load: Callable[[], Optional[Dict]]) -> Optional[Dict]:
+        with self._lock:
+            record = self._entries.get(key)
+            if record is not None:
+                self._entries.move_to_end(key)
+                return record
+            generation = self._generation
+
+        record = self.store.get(key) if self.store else None
+        shared = record is not None
+        if record is None:
+            record = load()
+            if record is None:
+                return None
+
+        self._cache(key, record, generation, shared)
+        return record
+
+    def _get_many(
+        self,
+        keys: List[Hashable],
+        load: Callable[[List[Hashable]], Iterable[Tuple[Hashable, Dict]]],
+    ) -> Dict[Hashable, Dict]:
+        records = {}
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                record = self._entries.get(key)
+                if record is not None:
+                    self._entries.move_to_end(key)
+                    records[key] = record
+            generation = self._generation
+
+        misses = []
+        for key in dict.fromkeys(keys):
+            if key in records:
+                continue
+            record = self.store.get(key) if self.store else None
+            if record is None:
+                misses.append(key)
+            else:
+                records[key] = record
+                self._cache(key, record, generation, shared=True)
+
+        if misses:
+            for key, record in load(misses):
+                records[key] = record
+                self._cache(key, record, generation, shared=False)
+
+        return records
+
+    def _cache(
+        self, key: Hashable, record: Dict, generation: int, shared: bool
+    ) -> None:
+        """
+        Cache the record read at `generation`, a loaded one also in the shared store. Records of keys
+        evicted in the meantime are stale, they are not cached and are removed from the store again.
+        """
+        if self.store and not shared:
+            self.store.set(key, record)
+
+        with self._lock:
+            stale = self._evicted.get(key, self._evicted_floor) > generation
+            if not stale:
+                self._entries[key] = record
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+
+        if stale and self.store:
+            self.store.delete(key)
+
+    def _evict_keys(self, keys: Iterable[Hashable]) -> None:
+        keys = list(keys)
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                self._entries.pop(key, None)
+                self._evicted[key] = self._generation
+                self._evicted.move_to_end(key)
+            while len(self._evicted) > self.max_size:
+                _, self._evicted_floor = self._evicted.popitem(last=False)
+
+        if self.store:
+            for key in keys:
+                self.store.delete(key)
+
+
+class SemanticsInvalidationBus(metaclass=Singleton):
+    """
+    Broadcasts semantics invalidations to all workers of the node. Invalidations are appended to
+    a shared log file (in `/dev/shm` by default), every worker polls it for new entries before
+    handling a request and passes them to its subscribers.
+    The log is rotated once it reaches `max_size` bytes, the previous generation is kept for
+    workers still reading it. Workers which missed a whole generation reset their caches.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_size: int = 1024 * 1024):
+        self.path = path
+        self.max_size = max_size
+
+        self._lock = threading.Lock()
+        self._subscribers: Set[InvalidationCallback] = set()
+        self._resets: Set[Callable[[], None]] = set()
+        self._stamp = self._stat(self.path)
+        self._generation = self._read(self.path, None, 0)[0] if path else None
+        self._offset = self._stamp[1]
+
+    def subscribe(
+        self, callback: InvalidationCallback, reset: Optional[Callable[[], None]] = None
+    ) -> None:
+        """
+        Subscribe to invalidations.
+        :param reset: drops everything the callback would invalidate, called when invalidations were missed
+        """
+        self._subscribers.add(callback)
+        if reset is not None:
+            self._resets.add(reset)
+
+    def publish(self, chain_id: str, addresses: Iterable[str]) -> None:
+        """Invalidate semantics of given addresses in all workers, including this one."""
+        message = {"chain_id": chain_id, "addresses": [a for a in addresses if a]}
+        if not message["addresses"]:
+            return
+
+        if self.path is None:
+            self._notify(message)
+            return
+
+        line = (json.dumps(message) + "\n").encode()
+        # workers rotate the log one at a time, so no invalidation is written to a replaced generation
+        with open(f"{self.path}.lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                size = self._stat(self.path)[1]
+                if size and size + len(line) > self.max_size:
+                    os.replace(self.path, f"{self.path}.1")
+                    size = 0
+                if not size:
+                    header = {"generation": uuid.uuid4().hex}
+                    line = (json.dumps(header) + "\n").encode() + line
+
+                fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+                try:
+                    os.write(fd, line)
+                finally:
+                    os.close(fd)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+        self.poll()
+
+    def poll(self) -> None:
+        """Apply invalidations published since the last poll."""
+        if self.path is None or self._stat(self.path) == self._stamp:
+            return
+
+        with self._lock:
+            self._stamp = self._stat(self.path)
+            data, missed = b"", False
+
+            generation, current = self._read(self.path, self._generation, self._offset)
+            if current is None:  # log was rotated, removed or truncated
+                previous = self._read(f"{self.path}.1", self._generation, self._offset)
+                missed = previous[1] is None
+                data = previous[1] or b""
+                self._generation, self._offset = generation, 0
+                current = self._read(self.path, generation, 0)[1] or b""
+
+            # skip partially written last line, it is read with the next poll
+            current = current[: current.rfind(b"\n") + 1]
+            self._offset += len(current)
+            data += current
+
+        if missed:
+            log.warning("Semantics invalidations were missed, resetting caches.")
+            for reset in self._resets:
+                try:
+                    reset()
+                except Exception as e:
+                    log.warning("Semantics invalidation reset error: %s", e)
+
+        for line in data.splitlines():
+            try:
+                message = json.loads(line)
+            except ValueError:
+                log.warning("Invalid semantics invalidation: %s", line)
+                continue
+            if "generation" not in message:
+                self._notify(message)
+
+    def _notify(self, message: Dict) -> None:
+        log.info(
+            "Semantics invalidated for %s: %s",
+            message["chain_id"],
+            ", ".join(message["addresses"]),
+        )
+        for callback in self._subscribers:
+            try:
+                callback(message["chain_id"], message["addresses"])
+            except Exception as e:
+                log.warning("Semantics invalidation error: %s", e)
+
+    @staticmethod
+    def _read(
+        path: str, generation: Optional[str], offset: int
+    ) -> Tuple[Optional[str], Optional[bytes]]:
+        """
+        Read generation of the log (from its first line) and the log from offset.
+        :returns: None entries if the log is not the given generation
+        """
+        try:
+            with open(path, "rb") as f:
+                header = f.readline()
+                log_generation = (
+                    json.loads(header)["generation"]
+                    if header.startswith(b'{"generation"')
+                    else None
+                )
+                size = os.fstat(f.fileno()).st_size
+                if log_generation != generation or size < offset:
+                    return log_generation, None
+
+                f.seek(offset)
+                return log_generation, f.read()
+        except FileNotFoundError:
+            return None, b"" if generation is None and not offset else None
+
+    @staticmethod
+    def _stat(path: Optional[str]) -> Tuple[Optional[int], int, int]:
+        """Inode, size and modification time of the log, to check for changes without reading it."""
+        if path is None:
+            return None, 0, 0
+
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None, 0, 0
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+def init_semantics_cache(app: Flask, engine: EthTx) -> None:
+    """
+    Wrap engine semantics database with the cache and the signature index, subscribe it
+    to invalidations and warm it up with hot addresses.
+    """
+    bus = SemanticsInvalidationBus(
+        app.config["SEMANTICS_INVALIDATION_FILE"],
+        app.config["SEMANTICS_INVALIDATION_MAX_SIZE"],
+    )
+    app.before_request(bus.poll)
+
+    bus.subscribe(_invalidate_decoded_transactions, _reset_decoded_transactions)
+    if engine is None:
+        return
+
+    database = engine.semantics.database
+    if not isinstance(database, CachedSemanticsDatabase):
+        store = (
+            SharedSemanticsStore(
+                app.config["SEMANTICS_SHARED_STORE_DIR"],
+                app.config["SEMANTICS_SHARED_STORE_SIZE"],
+                app.config["ethtx_version"],
+            )
+            if app.config["SEMANTICS_SHARED_STORE"]
+            else None
+        )
+        database = engine.semantics.database = CachedSemanticsDatabase(
+            database, max_size=app.config["SEMANTICS_CACHE_SIZE"], store=store
+        )
+        if app.config["SIGNATURE_INDEX"]:
+            database.signatures = SignatureIndex(
+                database.database,
+                app.config["SIGNATURE_INDEX_FILE"],
+                app.config["SIGNATURE_INDEX_REFRESH_INTERVAL"],
+            )
+        init_warmup(app, database, engine.default_chain)
+
+    bus.subscribe(database.evict, database.clear)
+    if database.warmup:
+        app.before_request(database.warmup.start)
+    if database.hot_addresses:
+        app.before_request(database.hot_addresses.start)
+    if database.signatures:
+        app.before_request(database.signatures.start)
+        engine.semantics.get_most_used_signature = partial(
+            most_used_signature, engine.semantics
+        )
+
+
+def invalidate_semantics(chain_id: str, addresses: Iterable[str]) -> None:
+    """Invalidate cached semantics and decoded transactions of given addresses on the whole node."""
+    addresses = list(addresses)
+    DecodedTransactionCache().invalidate(chain_id, addresses)
+    SemanticsInvalidationBus().publish(chain_id, addresses)
+
+
+def _invalidate_decoded_transactions(chain_id: str, addresses: List[str]) -> None:
+    DecodedTransactionCache().invalidate(chain_id, addresses, persistent=False)
+
+
+def _reset_decoded_transactions() -> None:
+    DecodedTransactionCache().clear()
@@ -0,0 +1,165 @@
+# Copyright 2021 DAI FOUNDATION (the original version https://github.com/daifoundation/ethtx_ce)
+# Copyright 2021-2022 Token Flow Insights SA (modifications to the original software as recorded
+# in the changelog https://github.com/EthTx/ethtx/blob/master/CHANGELOG.md)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# The product contains trademarks and other branding elements of Token Flow Insights SA which are
+# not licensed under the Apache 2.0 license. When using or reproducing the code, please remove
+# the trademark and/or other branding elements.
+
+
+"""Bulk import of contract semantics compiled from ABI."""
+
+import json
+import logging
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ethtx.models.semantics_model import AddressSemantics
+from pymongo import InsertOne, ReplaceOne, UpdateOne
+
+from .abi import compile_semantics
+from .exceptions import MalformedRequest
+from .signatures import function_signature
+
+log = logging.getLogger(__name__)
+
+
+def read_records(
+    lines: Iterable[bytes], default_chain: str
+) -> Iterator[Tuple[int, Optional[AddressSemantics], Optional[Exception]]]:
+    """
+    Compile NDJSON records `{"chain_id", "address", "abi", "code_hash", "name", "standard"}`, ABI and standard
+    may also be json strings. Yields line number, semantics and error of the invalid record.
+    """
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+
+        try:
+            record = json.loads(line)
+            abi = record.get("abi")
+            standard = record.get("standard")
+            semantics = compile_semantics(
+                chain_id=record.get("chain_id") or default_chain,
+                address=record["address"].lower(),
+                abi=json.loads(abi) if isinstance(abi, str) else abi,
+                code_hash=record.get("code_hash"),
+                name=record.get("name"),
+                standard=(
+                    json.loads(standard) if isinstance(standard, str) else standard
+                ),
+            )
+        except Exception as e:
+            yield number, None, MalformedRequest(
+                f"Invalid record in line {number}: {e!r}"
+            )
+        else:
+            yield number, semantics, None
+
+
+def import_semantics(database, semantics: List[AddressSemantics]) -> Dict[str, int]:
+    """
+    Upsert address and contract semantics with bulk writes, like `SemanticsRepository.update_semantics`
+    does one by one. Signatures of new contracts are counted in with a single lookup of existing ones.
+    """
+    contracts = {s.contract.code_hash: s.contract.dict() for s in semantics}
+    addresses = {}
+    for address_semantics in semantics:
+        address = address_semantics.dict()
+        address["contract"] = address_semantics.contract.code_hash
+        addresses[(address["chain_id"], address["address"])] = address
+
+    if not addresses:
+        return {"addresses": 0, "contracts": 0, "new_contracts": 0, "signatures": 0}
+
+    result = database._contracts.bulk_write(
+        [
+            ReplaceOne({"code_hash": code_hash}, contract, upsert=True)
+            for code_hash, contract in contracts.items()
+        ],
+        ordered=False,
+    )
+    contract_records = list(contracts.values())
+    new_contracts = [contract_records[i] for i in result.upserted_ids]
+
+    database._addresses.bulk_write(
+        [
+            ReplaceOne({"chain_id": chain_id, "address": address}, record, upsert=True)
+            for (chain_id, address), record in addresses.items()
+        ],
+        ordered=False,
+    )
+
+    signatures = _insert_signatures(database, new_contracts)
+
+    index = getattr(database, "signatures", None)
+    if index:
+        for contract in contracts.values():
+            index.add_contract(contract)
+
+    return {
+        "addresses": len(addresses),
+        "contracts": len(contracts),
+        "new_contracts": len(new_contracts),
+        "signatures": signatures,
+    }
+
+
+def _insert_signatures(database, contracts: List[Dict]) -> int:
+    """Insert function signatures of contracts or increase counts of the stored ones, return number of writes."""
+    signatures: Dict[Tuple[str, str, int], Dict] = {}
+    for contract in contracts:
+        for function in contract["functions"].values():
+            signature = function_signature(function)
+            if signature is None:
+                continue
+
+            key = (
+                signature["signature_hash"],
+                signature["name"],
+                len(signature["args"]),
+            )
+            if key in signatures:
+                signatures[key]["count"] += 1
+            else:
+                signatures[key] = signature
+
+    if not signatures:
+        return 0
+
+    stored = defaultdict(list)
+    for record in database._signatures.find(
+        {"signature_hash": {"$in": list({key[0] for key in signatures})}},
+        {"signature_hash": 1, "name": 1, "args": 1},
+    ):
+        stored[record["signature_hash"]].append(record)
+
+    requests = []
+    for (signature_hash, name, args_count), signature in signatures.items():
+        existing = next(
+            (
+                record
+                for record in stored[signature_hash]
+                if record["name"] == name and len(record["args"]) == args_count
+            ),
+            None,
+        )
+        if existing:
+            requests.append(
+                UpdateOne(
+                    {"_id": existing["_id"]}, {"$inc": {"count": signature["count"]}}
+                )
+            )
+        else:
+            requests.append(InsertOne(signature))
+
+    database._signatures.bulk_write(requests, ordered=False)
+    return len(requests)
@@ -0,0 +1,299 @@
+# Copyright 2021 DAI FOUNDATION (the original version https://github.com/daifoundation/ethtx_ce)
+# Copyright 2021-2022 Token Flow Insights SA (modifications to the original software as recorded
+# in the changelog https://github.com/EthTx/ethtx/blob/master/CHANGELOG.md)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# The product contains trademarks and other branding elements of Token Flow Insights SA which are
+# not licensed under the Apache 2.0 license. When using or reproducing the code, please remove
+# the trademark and/or other branding elements.
+
+import copy
+import logging
+import os
+import pickle
+import threading
+from typing import Dict, Iterable, List, Optional, Set
+
+from bson import ObjectId
+from ethtx.models.semantics_model import Signature
+from ethtx.providers.semantic_providers import (
+    MongoSemanticsDatabase,
+    SemanticsRepository,
+)
+
+from .background import BackgroundRefresher
+
+log = logging.getLogger(__name__)
+
+CONTRACTS_BATCH_SIZE = 500
+
+
+class SignatureIndex(BackgroundRefresher):
+    """
+    In-memory index of function selectors and event topics to candidate signatures, built from
+    the stored signatures and from functions and events of all stored contract semantics.
+    The index is loaded from `path` and then caught up with the database every `interval` seconds
+    in the background, reading only the signatures and contracts not indexed yet. Contracts and
+    signatures stored through this worker are indexed right away. The index may be behind other workers,
+    it is used to guess functions only, signatures are always counted in against the database.
+    Function candidates have the format of the signatures collection, the ones not stored there yet
+    (found only in contract semantics) have no `_id`.
+    """
+
+    VERSION = 1
+
+    def __init__(
+        self, database: MongoSemanticsDatabase, path: str, interval: float = 600
+    ):
+        super().__init__(interval, "signature-index")
+        self.database = database
+        self.path = path
+        self.loaded = False
+
+        self._functions: Dict[str, List[Dict]] = {}
+        self._events: Dict[str, List[Dict]] = {}
+        self._contracts: Set[str] = set()
+        self._last_signature_id: Optional[ObjectId] = None
+        self._index_lock = threading.Lock()
+
+    def functions(self, selector: str) -> Optional[List[Dict]]:
+        """Candidate signatures of the function selector, None if the index is not loaded yet."""
+        if not self.loaded:
+            return None
+
+        with self._index_lock:
+            return copy.deepcopy(self._functions.get(selector.lower(), []))
+
+    def events(self, topic: str) -> Optional[List[Dict]]:
+        """Candidate signatures of the event topic, None if the index is not loaded yet."""
+        if not self.loaded:
+            return None
+
+        with self._index_lock:
+            return copy.deepcopy(self._events.get(topic.lower(), []))
+
+    def add_signature(self, signature: Dict) -> None:
+        """Index signature stored in the signatures collection."""
+        with self._index_lock:
+            _add_function(self._functions, copy.deepcopy(signature))
+
+    def add_contract(self, contract: Dict) -> None:
+        """Index functions and events of contract semantics, also of a replaced contract."""
+        with self._index_lock:
+            self._contracts.discard(contract["code_hash"])
+            self._add_contract(contract)
+
+    def stats(self) -> Dict:
+        with self._index_lock:
+            return {
+                "loaded": self.loaded,
+                "functions": len(self._functions),
+                "events": len(self._events),
+                "contracts": len(self._contracts),
+            }
+
+    def refresh(self) -> None:
+        if not self.loaded:
+            self._load()
+
+        changed = self._index_signatures()
+        changed = self._index_contracts() or changed
+        self.loaded = True
+
+        if changed:
+            self._save()
+
+    def _index_signatures(self) -> bool:
+        query = (
+            {"_id": {"$gt": self._last_signature_id}} if self._last_signature_id else {}
+        )
+        count = 0
+        for signature in self.database._signatures.find(query).sort("_id", 1):
+            with self._index_lock:
+                _add_function(self._functions, signature)
+                self._last_signature_id = signature["_id"]
+            count += 1
+
+        if count:
+            log.info("Signature index: %d new signatures indexed.", count)
+        return bool(count)
+
+    def _index_contracts(self) -> bool:
+        code_hashes = {
+            contract["code_hash"]
+            for contract in self.database._contracts.find({}, {"code_hash": 1})
+            if contract.get("code_hash")
+        }
+        missing = list(code_hashes - self._contracts)
+
+        for start in range(0, len(missing), CONTRACTS_BATCH_SIZE):
+            contracts = self.database._contracts.find(
+                {"code_hash": {"$in": missing[start : start + CONTRACTS_BATCH_SIZE]}},
+                {"code_hash": 1, "functions": 1, "events": 1},
+            )
+            with self._index_lock:
+                for contract in contracts:
+                    self._add_contract(contract)
+
+        if missing:
+            log.info("Signature index: %d new contracts indexed.", len(missing))
+        return bool(missing)
+
+    def _add_contract(self, contract: Dict) -> None:
+        if contract["code_hash"] in self._contracts:
+            return
+
+        self._contracts.add(contract["code_hash"])
+        for function in (contract.get("functions") or {}).values():
+            signature = function_signature(function)
+            if signature:
+                _add_function(self._functions, signature)
+        for event in (contract.get("events") or {}).values():
+            signature = _event_signature(event)
+            if signature:
+                _add_event(self._events, signature)
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "rb") as f:
+                data = pickle.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, pickle.PickleError, EOFError) as e:
+            log.warning("Cannot load signature index %s: %s", self.path, e)
+            return
+
+        if data.get("version") != self.VERSION:
+            return
+
+        with self._index_lock:
+            self._functions = data["functions"]
+            self._events = data["events"]
+            self._contracts = data["contracts"]
+            self._last_signature_id = data["last_signature_id"]
+
+        log.info(
+            "Signature index loaded: %d functions, %d events.",
+            len(self._functions),
+            len(self._events),
+        )
+
+    def _save(self) -> None:
+        with self._index_lock:
+            data = pickle.dumps(
+                {
+                    "version": self.VERSION,
+                    "functions": self._functions,
+                    "events": self._events,
+                    "contracts": self._contracts,
+                    "last_signature_id": self._last_signature_id,
+                },
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            log.warning("Cannot save signature index %s: %s", self.path, e)
+
+
+def most_used_signature(
+    repository: SemanticsRepository, signature_hash: str
+) -> Optional[Signature]:
+    """`SemanticsRepository.get_most_used_signature` reading candidates from the signature index."""
+    candidates = list(repository.database.get_signature_candidates(signature_hash))
+    if not candidates:
+        return None
+
+    signature = max(candidates, key=lambda candidate: candidate["count"])
+    return Signature(
+        signature_hash=signature["signature_hash"],
+        name=signature["name"],
+        args=signature["args"],
+        count=signature["count"],
+        tuple=signature.get("tuple", False),
+        guessed=signature.get("guessed", False),
+    )
+
+
+def function_signature(function: Dict) -> Optional[Dict]:
+    """Signature record of contract function semantics, built like the EthTx repository does."""
+    selector = function.get("signature") or ""
+    if not selector.startswith("0x"):
+        return None
+
+    inputs = function.get("inputs") or []
+    if inputs and inputs[0]["parameter_type"] == "tuple":
+        inputs = inputs[0].get("components") or []
+
+    return {
+        "signature_hash": selector.lower(),
+        "name": function["name"],
+        "args": _args(inputs),
+        "count": 1,
+        "tuple": False,
+        "guessed": False,
+    }
+
+
+def _event_signature(event: Dict) -> Optional[Dict]:
+    topic = event.get("signature") or ""
+    if not topic.startswith("0x"):
+        return None
+
+    return {
+        "signature_hash": topic.lower(),
+        "name": event["name"],
+        "args": _args(event.get("parameters") or [], indexed=True),
+        "anonymous": bool(event.get("anonymous")),
+        "count": 1,
+    }
+
+
+def _args(parameters: Iterable[Dict], indexed: bool = False) -> List[Dict]:
+    args = []
+    for parameter in parameters:
+        arg = {"name": parameter["parameter_name"], "type": parameter["parameter_type"]}
+        if indexed:
+            arg["indexed"] = bool(parameter.get("indexed"))
+        args.append(arg)
+
+    return args
+
+
+def _add_function(index: Dict[str, List[Dict]], signature: Dict) -> None:
+    """Add candidate, signatures with the same name and number of args are the same one for EthTx."""
+    candidates = index.setdefault(signature["signature_hash"].lower(), [])
+    for i, candidate in enumerate(candidates):
+        if candidate["name"] == signature["name"] and len(candidate["args"]) == len(
+            signature["args"]
+        ):
+            if "_id" in signature:
+                candidates[i] = signature
+            elif "_id" not in candidate:
+                candidate["count"] += 1
+            return
+
+    candidates.append(signature)
+
+
+def _add_event(index: Dict[str, List[Dict]], signature: Dict) -> None:
+    candidates = index.setdefault(signature["signature_hash"], [])
+    for candidate in candidates:
+        if candidate["name"] == signature["name"] and [
+            arg["type"] for arg in candidate["args"]
+        ] == [arg["type"] for arg in signature["args"]]:
+            candidate["count"] += 1
+            return
+
+    candidates.append(signature)
@@ -0,0 +1,221 @@
+# Copyright 2021 DAI FOUNDATION (the original version https://github.com/daifoundation/ethtx_ce)
+# Copyright 2021-2022 Token Flow Insights SA (modifications to the original software as recorded
+# in the changelog https://github.com/EthTx/ethtx/blob/master/CHANGELOG.md)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# The product contains trademarks and other branding elements of Token Flow Insights SA which are
+# not licensed under the Apache 2.0 license. When using or reproducing the code, please remove
+# the trademark and/or other branding elements.
+
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from typing import TYPE_CHECKING, Iterable, List, Optional, Tuple
+
+from flask import Flask
+
+from .background import BackgroundRefresher
+
+if TYPE_CHECKING:
+    from .semantics_cache import CachedSemanticsDatabase
+
+log = logging.getLogger(__name__)
+
+Address = Tuple[str, str]
+
+
+class HotAddresses(BackgroundRefresher):
+    """
+    Most accessed addresses of the node. Every worker periodically merges its semantics access
+    counters into a shared file, which is read to warm up the caches of new workers. Recorded counts
+    decay with `HALF_LIFE`, so addresses no longer used give way to the current ones.
+    """
+
+    HALF_LIFE = 24 * 3600
+
+    def __init__(
+        self,
+        database: "CachedSemanticsDatabase",
+        path: str,
+        top_n: int,
+        interval: float = 300,
+    ):
+        super().__init__(interval, name="semantics-hot-addresses")
+        self.database = database
+        self.path = path
+        self.top_n = top_n
+
+        self.database.accesses = Counter()
+
+    def read(self) -> List[Address]:
+        """Recorded addresses, most accessed first."""
+        counts, _ = self._read_counts()
+        return [address for address, _ in counts.most_common(self.top_n)]
+
+    def refresh(self) -> None:
+        with self.database._lock:
+            accesses, self.database.accesses = self.database.accesses, Counter()
+        if not accesses:
+            return
+
+        # workers merge into the file one at a time, so their counts are not overwritten
+        with open(f"{self.path}.lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                self._merge(accesses)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _merge(self, accesses: Counter) -> None:
+        counts, updated = self._read_counts()
+        now = time.time()
+        decay = 0.5 ** (max(now - updated, 0) / self.HALF_LIFE)
+        counts = Counter({address: count * decay for address, count in counts.items()})
+        counts.update(accesses)
+
+        tmp_path = f"{self.path}.{os.getpid()}"
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {
+                    "updated": now,
+                    "addresses": [
+                        [*address, round(count, 3)]
+                        for address, count in counts.most_common(self.top_n)
+                    ],
+                },
+                f,
+            )
+        os.replace(tmp_path, self.path)
+
+    def _read_counts(self) -> Tuple[Counter, float]:
+        """Recorded counts and the time they were recorded at."""
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            if isinstance(data, list):
+                # recorded without the time
+                data = {"updated": time.time(), "addresses": data}
+
+            return (
+                Counter(
+                    {
+                        (chain_id, address): count
+                        for chain_id, address, count in data["addresses"]
+                    }
+                ),
+                data["updated"],
+            )
+        except FileNotFoundError:
+            return Counter(), time.time()
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            log.warning("Cannot read hot addresses: %s", e)
+            return Counter(), time.time()
+
+
+def parse_addresses(addresses: Optional[str], default_chain: str) -> List[Address]:
+    """Parse comma separated `address` or `chain_id:address` list."""
+    parsed = []
+    for entry in (addresses or "").split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        chain_id, _, address = entry.rpartition(":")
+        parsed.append((chain_id or default_chain, address.lower()))
+
+    return parsed
+
+
+def warm_up_semantics(
+    database: "CachedSemanticsDatabase", addresses: Iterable[Address]
+) -> None:
+    """Load semantics records of given addresses and of their contracts into the cache."""
+    start = time.time()
+    loaded = 0
+
+    for chain_id, address in dict.fromkeys(addresses):
+        try:
+            record = database.get_address_semantics(chain_id, address)
+            if record and record.get("contract"):
+                database.get_contract_semantics(record["contract"])
+        except Exception as e:
+            log.warning("Semantics warm-up of %s / %s failed: %s", address, chain_id, e)
+            continue
+        loaded += record is not None
+
+    log.info(
+        "Semantics warm-up: %d of %d addresses loaded in %.2fs.",
+        loaded,
+        len(dict.fromkeys(addresses)),
+        time.time() - start,
+    )
+
+
+class SemanticsWarmup:
+    """
+    Warms up the semantics cache in a daemon thread, once in each process using it. Started lazily,
+    so with the app preloaded in the gunicorn master it runs in the forked workers, with their own connections,
+    instead of in the master before fork.
+    """
+
+    def __init__(
+        self,
+        database: "CachedSemanticsDatabase",
+        addresses: List[Address],
+        hot_addresses: Optional[HotAddresses] = None,
+    ):
+        self.database = database
+        self.addresses = addresses
+        self.hot_addresses = hot_addresses
+
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+
+    def start(self) -> None:
+        if self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+
+            self._pid = os.getpid()
+            threading.Thread(
+                target=self._run, name="semantics-warm-up", daemon=True
+            ).start()
+
+    def _run(self) -> None:
+        addresses = list(self.addresses)
+        if self.hot_addresses:
+            addresses += self.hot_addresses.read()
+
+        if addresses:
+            warm_up_semantics(self.database, addresses)
+
+
+def init_warmup(
+    app: Flask, database: "CachedSemanticsDatabase", default_chain: str
+) -> None:
+    """Setup recording of hot addresses and the semantics cache warm-up, both started lazily in each process."""
+    top_n = app.config["SEMANTICS_WARMUP_TOP_N"]
+    if top_n:
+        database.hot_addresses = HotAddresses(
+            database,
+            app.config["SEMANTICS_HOT_ADDRESSES_FILE"],
+            top_n,
+            app.config["SEMANTICS_HOT_ADDRESSES_INTERVAL"],
+        )
+
+    addresses = parse_addresses(app.config["SEMANTICS_WARMUP_ADDRESSES"], default_chain)
+    if addresses or database.hot_addresses:
+        database.warmup = SemanticsWarmup(database, addresses, database.hot_addresses)
@@ -14,36 +14,25 @@
 # not licensed under the Apache 2.0 license. When using or reproducing the code, please remove
 # the trademark and/or other branding elements.
 
-import os
-
-from ethtx import EthTx, EthTxConfig
+from ethtx import EthTxConfig
 from flask import Flask
 from werkzeug.middleware.dispatcher import DispatcherMiddleware
 
 from . import frontend, api
+from .compression import CompressionMiddleware
+from .config import Config
+from .engine import create_engine
 
 app = Flask(__name__)
 
-ethtx_config = EthTxConfig(
-    mongo_connection_string=os.getenv("MONGO_CONNECTION_STRING"),
-    etherscan_api_key=os.getenv("ETHERSCAN_KEY"),
-    web3nodes={
-        "mainnet": dict(hook=os.getenv("MAINNET_NODE_URL", ""), poa=False),
-        "goerli": dict(hook=os.getenv("GOERLI_NODE_URL", ""), poa=True),
-    },
-    default_chain="mainnet",
-    etherscan_urls={
-        "mainnet": "https://api.etherscan.io/api",
-        "goerli": "https://api-goerli.etherscan.io/api",
-    },
-)
+ethtx = create_engine()
 
-ethtx = EthTx.initialize(ethtx_config)
+frontend_app = frontend.create_app(engine=ethtx, settings_override=EthTxConfig)
+api_app = api.create_app(engine=ethtx, settings_override=EthTxConfig)
 
-app.wsgi_app = DispatcherMiddleware(
-    frontend.create_app(engine=ethtx, settings_override=EthTxConfig),
-    {"/api": api.create_app(engine=ethtx, settings_override=EthTxConfig)},
-)
+app.wsgi_app = DispatcherMiddleware(frontend_app, {"/api": api_app})
+if Config.COMPRESSION_ENABLED:
+    app.wsgi_app = CompressionMiddleware.from_config(Config, app.wsgi_app)
 
 # ethtx_ce/ as Source Root
 if __name__ == "__main__":
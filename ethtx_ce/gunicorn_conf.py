@@ -1,3 +1,4 @@
+import gc
 import json
 import multiprocessing
 import os
@@ -35,6 +36,7 @@ use_errorlog = errorlog_var or None
 graceful_timeout_str = os.getenv("GRACEFUL_TIMEOUT", "600")
 timeout_str = os.getenv("TIMEOUT", "600")
 keepalive_str = os.getenv("KEEP_ALIVE", "5")
+preload_app_str = os.getenv("PRELOAD_APP", "false")
 
 # Gunicorn config variables
 loglevel = use_loglevel
@@ -46,6 +48,7 @@ accesslog = use_accesslog
 graceful_timeout = int(graceful_timeout_str)
 timeout = int(timeout_str)
 keepalive = int(keepalive_str)
+preload_app = preload_app_str == "true"
 
 
 # For debugging and testing
@@ -56,6 +59,7 @@ log_data = {
     "graceful_timeout": graceful_timeout,
     "timeout": timeout,
     "keepalive": keepalive,
+    "preload_app": preload_app,
     "errorlog": errorlog,
     "accesslog": accesslog,
     # Additional, non-gunicorn variables
@@ -65,3 +69,50 @@ log_data = {
     "port": port,
 }
 print(json.dumps(log_data))
+
+
+# Decode job workers (see app/jobs), started with the master, web workers never run long decodes
+jobs_workers = int(os.getenv("JOBS_WORKERS", "0"))
+# seconds the job workers have to finish their current jobs on shutdown, the jobs of killed workers are queued again
+jobs_stop_timeout = float(os.getenv("JOBS_STOP_TIMEOUT", "600"))
+
+
+def when_ready(server):
+    if preload_app:
+        from app.wsgi import frontend_app
+
+        # compile templates once in the master
+        for template in frontend_app.jinja_env.list_templates():
+            frontend_app.jinja_env.get_template(template)
+
+        # the app is loaded, keep its objects out of the gc, so collections in workers do not copy their pages
+        gc.freeze()
+
+    if jobs_workers > 0:
+        from app.jobs.worker import start_workers
+
+        server.jobs_workers = start_workers(jobs_workers)
+
+
+def on_exit(server):
+    if getattr(server, "jobs_workers", None):
+        from app.jobs.worker import stop_workers
+
+        stop_workers(server.jobs_workers, jobs_stop_timeout)
+
+
+def post_fork(server, worker):
+    if preload_app:
+        from app.engine import reconnect_engine
+        from app.wsgi import ethtx
+
+        reconnect_engine(ethtx)
+
+
+def post_worker_init(worker):
+    # warm up the semantics cache in the worker, never in the master of the preloaded app
+    from app.wsgi import ethtx
+
+    warmup = getattr(ethtx.semantics.database, "warmup", None)
+    if warmup:
+        warmup.start()
@@ -0,0 +1,145 @@
+import mongomock
+import pytest
+from ethtx.providers.semantic_providers import MongoSemanticsDatabase
+
+from app.abi import EOA_CODE_HASH, compile_abi, compile_semantics, signature_hash
+from app.semantics_import import import_semantics, read_records
+
+TRANSFER = "0xa9059cbb"
+TRANSFER_EVENT = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+
+ERC20_ABI = [
+    {"type": "constructor", "inputs": [{"name": "supply", "type": "uint256"}]},
+    {"type": "fallback"},
+    {
+        "type": "function",
+        "name": "transfer",
+        "inputs": [
+            {"name": "to", "type": "address"},
+            {"name": "value", "type": "uint256"},
+        ],
+        "outputs": [{"name": "", "type": "bool"}],
+    },
+    {
+        "type": "event",
+        "name": "Transfer",
+        "anonymous": False,
+        "inputs": [
+            {"name": "from", "type": "address", "indexed": True},
+            {"name": "to", "type": "address", "indexed": True},
+            {"name": "value", "type": "uint256", "indexed": False},
+        ],
+    },
+]
+
+TUPLE_ABI = [
+    {
+        "type": "function",
+        "name": "swap",
+        "inputs": [
+            {
+                "name": "orders",
+                "type": "tuple[]",
+                "components": [
+                    {"name": "maker", "type": "address"},
+                    {"name": "data", "type": "bytes"},
+                ],
+            },
+            {
+                "name": "order",
+                "type": "tuple",
+                "components": [{"name": "data", "type": "bytes"}],
+            },
+        ],
+        "outputs": [],
+    }
+]
+
+
+class TestCompileAbi:
+    def test_compiles_functions_and_events(self):
+        functions, events = compile_abi(ERC20_ABI)
+
+        assert set(functions) == {"constructor", TRANSFER}
+        assert [p.parameter_type for p in functions[TRANSFER].inputs] == [
+            "address",
+            "uint256",
+        ]
+        assert functions[TRANSFER].outputs[0].parameter_type == "bool"
+        assert [p.indexed for p in events[TRANSFER_EVENT].parameters] == [
+            True,
+            True,
+            False,
+        ]
+
+    def test_canonical_signature_of_tuples(self):
+        functions, _ = compile_abi(TUPLE_ABI)
+
+        selector = signature_hash("swap((address,bytes)[],(bytes))")[:10]
+        orders, order = functions[selector].inputs
+        assert orders.dynamic and order.dynamic
+        assert [c.parameter_name for c in orders.components] == ["maker", "data"]
+
+    def test_compile_semantics(self):
+        semantics = compile_semantics(
+            "mainnet",
+            "0x1",
+            ERC20_ABI,
+            code_hash="0xc0de",
+            name="Token",
+            standard={
+                "name": "ERC20",
+                "data": {"name": "T", "symbol": "T", "decimals": 18},
+            },
+        )
+        assert semantics.is_contract and semantics.contract.code_hash == "0xc0de"
+        assert semantics.erc20.decimals == 18
+
+        eoa = compile_semantics("mainnet", "0x2", [])
+        assert not eoa.is_contract and eoa.contract.code_hash == EOA_CODE_HASH
+
+        with pytest.raises(ValueError):
+            compile_semantics("mainnet", "0x3", ERC20_ABI)
+
+
+class TestImportSemantics:
+    @pytest.fixture
+    def mongo(self):
+        db = mongomock.MongoClient().db
+        mongo = MongoSemanticsDatabase(db)
+        # collection names are built from an enum format, which differs between python versions
+        mongo._addresses, mongo._contracts, mongo._signatures = (
+            db.addresses,
+            db.contracts,
+            db.signatures,
+        )
+        return mongo
+
+    def test_read_records(self):
+        lines = [
+            b'{"address": "0xAB", "abi": "[]", "standard": "{}"}\n',
+            b"\n",
+            b"not json\n",
+        ]
+        (line, semantics, _), (bad_line, _, error) = read_records(lines, "mainnet")
+
+        assert line == 1 and semantics.chain_id == "mainnet"
+        assert semantics.address == "0xab"
+        assert bad_line == 3 and "line 3" in str(error)
+
+    def test_import_upserts_and_counts_signatures(self, mongo):
+        first = compile_semantics("mainnet", "0x1", ERC20_ABI, code_hash="0xc1")
+        second = compile_semantics("mainnet", "0x2", ERC20_ABI, code_hash="0xc2")
+
+        assert import_semantics(mongo, [first]) == {
+            "addresses": 1,
+            "contracts": 1,
+            "new_contracts": 1,
+            "signatures": 1,
+        }
+        assert import_semantics(mongo, [first, second])["new_contracts"] == 1
+
+        assert mongo.get_address_semantics("mainnet", "0x2")["contract"] == "0xc2"
+        assert mongo._contracts.count_documents({}) == 2
+        (signature,) = mongo.get_signature_semantics(TRANSFER)
+        assert signature["name"] == "transfer" and signature["count"] == 2
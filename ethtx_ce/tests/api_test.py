@@ -0,0 +1,368 @@
+import json
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import mongomock
+import pytest
+from ethtx.exceptions import InvalidTransactionHash
+from ethtx.providers.semantic_providers import MongoSemanticsDatabase
+from hexbytes import HexBytes
+
+from app.abi import compile_semantics
+from app.api import create_app
+from app.helpers import Singleton
+from app.semantics_cache import CachedSemanticsDatabase
+from app.semantics_import import import_semantics
+from tests.mocks.mocks import Mocks
+
+VALID_TX_HASH = "0x" + "a" * 64
+INVALID_TX_HASH = "0x" + "b" * 64
+
+
+class Settings:
+    API_KEY = "test"
+    DECODED_CACHE_PERSISTENT = False
+
+
+def decode_transaction(chain_id, tx_hash, recreate_semantics=False):
+    if tx_hash == INVALID_TX_HASH:
+        raise InvalidTransactionHash(tx_hash)
+    return Mocks.get_mocked_decoded_transaction(tx_hash=tx_hash)
+
+
+class TestApi:
+    @pytest.fixture
+    def engine(self):
+        engine = MagicMock()
+        engine.default_chain = "mainnet"
+        engine.decoders.decode_transaction.side_effect = decode_transaction
+        engine.providers.web3provider.get_block.return_value = SimpleNamespace(
+            number=123,
+            transactions=[HexBytes(INVALID_TX_HASH), HexBytes(VALID_TX_HASH)],
+        )
+        return engine
+
+    @pytest.fixture
+    def client(self, engine, tmp_path):
+        Singleton._instances.clear()
+        Settings.JOBS_QUEUE_URL = str(tmp_path / "jobs.sqlite3")
+        app = create_app(engine, Settings)
+        with app.test_client() as client:
+            yield client
+        Singleton._instances.clear()
+
+    def test_read_decoded_transaction(self, client):
+        resp = client.get(f"/transactions/mainnet/{VALID_TX_HASH}?api_key=test")
+        assert resp.status_code == 200
+        assert resp.json["metadata"]["tx_hash"] == VALID_TX_HASH
+        assert resp.json["metadata"]["timestamp"] == "2022-01-01 12:00:00"
+
+    @pytest.mark.parametrize(
+        "mimetype, loads",
+        [
+            (
+                "application/msgpack",
+                lambda data: pytest.importorskip("msgpack").unpackb(data),
+            ),
+            ("application/cbor", lambda data: pytest.importorskip("cbor2").loads(data)),
+        ],
+    )
+    def test_read_decoded_transaction_binary_format(self, client, mimetype, loads):
+        resp = client.get(
+            f"/transactions/mainnet/{VALID_TX_HASH}?api_key=test",
+            headers={"Accept": f"{mimetype}, application/json;q=0.5"},
+        )
+        assert resp.status_code == 200
+        assert resp.mimetype == mimetype
+        assert "Accept" in resp.vary
+
+        body = loads(resp.data)
+        assert body["metadata"]["tx_hash"] == VALID_TX_HASH
+        assert body["metadata"]["gas_used"] == 21000  # "21000" in json
+
+    def test_read_decoded_transaction_fields(self, client):
+        resp = client.get(
+            f"/transactions/mainnet/{VALID_TX_HASH}?api_key=test&fields=events,calls"
+        )
+        assert resp.status_code == 200
+        assert set(resp.json) == {"events", "calls"}
+
+        resp = client.get(
+            f"/transactions/mainnet/{VALID_TX_HASH}?api_key=test&fields=events,unknown"
+        )
+        assert resp.status_code == 400
+
+    def test_read_decoded_transaction_section(self, client):
+        full = client.get(f"/transactions/mainnet/{VALID_TX_HASH}?api_key=test").json
+
+        resp = client.get(
+            f"/transactions/mainnet/{VALID_TX_HASH}/transfers?api_key=test"
+        )
+        assert resp.status_code == 200
+        assert resp.json == full["transfers"]
+
+        resp = client.get(f"/transactions/mainnet/{VALID_TX_HASH}/unknown?api_key=test")
+        assert resp.status_code == 404
+
+    def test_read_decoded_transaction_calls(self, client):
+        resp = client.get(
+            f"/transactions/mainnet/{VALID_TX_HASH}?api_key=test&max_depth=1"
+        )
+        assert resp.json["calls"]["subcalls"] == []
+        assert resp.json["calls"]["subcalls_truncated"]
+
+        resp = client.get(
+            f"/transactions/mainnet/{VALID_TX_HASH}/calls/flat?api_key=test&limit=2"
+        )
+        assert [call["call_id"] for call in resp.json["calls"]] == ["0", "0_0"]
+
+        resp = client.get(
+            f"/transactions/mainnet/{VALID_TX_HASH}/calls/flat?api_key=test"
+            f"&cursor={resp.json['next_cursor']}"
+        )
+        assert [call["parent_id"] for call in resp.json["calls"]] == ["0_0"]
+        assert resp.json["next_cursor"] is None
+
+        resp = client.get(
+            f"/transactions/mainnet/{VALID_TX_HASH}/calls/flat?api_key=test&limit=0"
+        )
+        assert resp.status_code == 400
+
+    def test_read_decoded_transaction_mode(self, client):
+        resp = client.get(f"/transactions/mainnet/{VALID_TX_HASH}?api_key=test")
+        assert "mode" not in resp.json
+
+        resp = client.get(
+            f"/transactions/mainnet/{VALID_TX_HASH}?api_key=test&mode=lite"
+        )
+        assert resp.json["mode"] == "full"  # full decode is cached
+
+        resp = client.get(f"/transactions/mainnet/{VALID_TX_HASH}?api_key=test&mode=x")
+        assert resp.status_code == 400
+
+    def test_read_signatures(self, client, engine):
+        engine.semantics.database.signatures = SimpleNamespace(
+            loaded=True,
+            functions=lambda selector: [
+                {"_id": 1, "name": "a", "args": [], "count": 1},
+                {"_id": 2, "name": "b", "args": [], "count": 5},
+            ],
+            events=lambda topic: [],
+        )
+
+        resp = client.get("/signatures/0xA9059CBB?api_key=test")
+        assert resp.status_code == 200
+        assert resp.json["type"] == "function"
+        assert [c["name"] for c in resp.json["candidates"]] == ["b", "a"]
+        assert "_id" not in resp.json["candidates"][0]
+
+        assert client.get(f"/signatures/0x{'ab' * 32}?api_key=test").status_code == 404
+        assert client.get("/signatures/0x1234?api_key=test").status_code == 400
+
+    def test_import_semantics(self, client, engine, monkeypatch):
+        database = engine.semantics.database
+        imported = []
+        monkeypatch.setattr(
+            "app.api.endpoints.semantics.import_semantics",
+            lambda db, semantics: imported.extend(semantics)
+            or {"addresses": len(semantics)},
+        )
+        abi = [{"type": "function", "name": "f", "inputs": [], "outputs": []}]
+        lines = [
+            json.dumps({"address": "0x1", "abi": abi, "code_hash": "0xc1"}),
+            json.dumps({"address": "0x2", "abi": abi}),
+        ]
+
+        resp = client.post(
+            "/semantics/import?api_key=test",
+            data="\n".join(lines),
+            content_type="application/x-ndjson",
+        )
+        assert resp.status_code == 200
+        assert resp.json["addresses"] == "1"
+        assert resp.json["errors"][0]["line"] == "2"
+        assert resp.json["errors"][0]["status"] == "400"
+        assert [s.address for s in imported] == ["0x1"]
+        assert imported[0].contract.functions["0x26121ff0"].name == "f"
+        assert engine.semantics.database is database
+
+        assert client.post("/semantics/import?api_key=test", data="").status_code == 400
+
+    def test_import_semantics_over_app_content_length(self, client, monkeypatch):
+        monkeypatch.setattr(
+            "app.api.endpoints.semantics.import_semantics",
+            lambda db, semantics: {"addresses": len(semantics)},
+        )
+        abi = [{"type": "function", "name": "f", "inputs": [], "outputs": []}]
+        line = json.dumps({"address": "0x1", "abi": abi, "code_hash": "0xc1"})
+        # padded over the app MAX_CONTENT_LENGTH of other endpoints
+        data = line + "\n" * (11 * 1024 * 1024)
+
+        resp = client.post(
+            "/semantics/import?api_key=test",
+            data=data,
+            content_type="application/x-ndjson",
+        )
+        assert resp.status_code == 200
+        assert resp.json["addresses"] == "1"
+
+    def test_read_semantics_batch(self, client, engine):
+        db = mongomock.MongoClient().db
+        mongo = MongoSemanticsDatabase(db)
+        # collection names are built from an enum format, which differs between python versions
+        mongo._addresses, mongo._contracts, mongo._signatures = (
+            db.addresses,
+            db.contracts,
+            db.signatures,
+        )
+        engine.semantics.database = CachedSemanticsDatabase(mongo)
+        import_semantics(
+            mongo,
+            [
+                compile_semantics(
+                    "mainnet",
+                    "0x1",
+                    [{"type": "function", "name": "f", "inputs": [], "outputs": []}],
+                    code_hash="0xc1",
+                    name="Token",
+                ),
+                compile_semantics("mainnet", "0x2", []),
+            ],
+        )
+
+        resp = client.post(
+            "/semantics/batch?api_key=test",
+            json={"addresses": ["0x2", ["mainnet", "0x3"], {"address": "0x1"}]},
+        )
+        assert resp.mimetype == "application/x-ndjson"
+        eoa, missing, token = map(json.loads, resp.get_data(as_text=True).splitlines())
+        assert eoa["result"]["contract"]["name"] == "EOA"
+        assert missing["status"] == 404
+        assert token["result"]["contract"]["functions"]["0x26121ff0"]["name"] == "f"
+
+        resp = client.post(
+            "/semantics/batch?api_key=test",
+            json={"addresses": ["0x1"], "fields": ["name", "contract.name"]},
+        )
+        (token,) = map(json.loads, resp.get_data(as_text=True).splitlines())
+        assert token["result"] == {"name": "Token", "contract": {"name": "Token"}}
+
+        resp = client.post(
+            "/semantics/batch?api_key=test",
+            json={"addresses": ["0x1"], "fields": ["contract.functions.f"]},
+        )
+        assert resp.status_code == 400
+        assert client.post("/semantics/batch?api_key=test", json={}).status_code == 400
+
+    def test_read_semantics_batch_database_error(self, client, engine):
+        engine.semantics.database = MagicMock()
+        engine.semantics.database.get_many_address_semantics.side_effect = (
+            ConnectionError("mongo down")
+        )
+
+        resp = client.post("/semantics/batch?api_key=test", json={"addresses": ["0x1"]})
+        assert resp.status_code == 500
+        assert resp.mimetype == "application/json"
+
+    def test_batch_streams_results_and_errors(self, client, engine):
+        resp = client.post(
+            "/transactions/batch?api_key=test",
+            json={"chain_id": "mainnet", "tx_hashes": [VALID_TX_HASH, INVALID_TX_HASH]},
+        )
+        assert resp.status_code == 200
+        assert resp.mimetype == "application/x-ndjson"
+
+        lines = {
+            line["tx_hash"]: line
+            for line in map(json.loads, resp.get_data(as_text=True).splitlines())
+        }
+        assert lines[VALID_TX_HASH]["status"] == 200
+        assert lines[VALID_TX_HASH]["result"]["metadata"]["tx_hash"] == VALID_TX_HASH
+        assert lines[INVALID_TX_HASH]["status"] == 400
+        assert "result" not in lines[INVALID_TX_HASH]
+
+    def test_batch_requires_tx_hashes(self, client):
+        resp = client.post("/transactions/batch?api_key=test", json={"chain_id": "x"})
+        assert resp.status_code == 400
+
+    def test_batch_requires_api_key(self, client):
+        resp = client.post("/transactions/batch", json={"tx_hashes": [VALID_TX_HASH]})
+        assert resp.status_code == 401
+
+    def test_block_streams_in_transaction_index_order(self, client, engine):
+        resp = client.get("/blocks/mainnet/123?api_key=test")
+        assert resp.status_code == 200
+
+        lines = list(map(json.loads, resp.get_data(as_text=True).splitlines()))
+        assert [line["tx_index"] for line in lines] == [0, 1]
+        assert [line["tx_hash"] for line in lines] == [INVALID_TX_HASH, VALID_TX_HASH]
+        assert [line["status"] for line in lines] == [400, 200]
+        engine.providers.web3provider.get_block.__wrapped__.assert_called_once_with(
+            123, "mainnet"
+        )
+
+    def test_block_is_fetched_once(self, client, engine):
+        web3provider = engine.decoders.web3provider = engine.providers.web3provider
+
+        def decode(chain_id, tx_hash, recreate_semantics=False):
+            # the EthTx decoder fetches the block of the transaction
+            web3provider.get_block(123, chain_id)
+            return Mocks.get_mocked_decoded_transaction(tx_hash=tx_hash)
+
+        engine.decoders.decode_transaction.side_effect = decode
+
+        resp = client.get("/blocks/mainnet/123?api_key=test")
+
+        assert [
+            line["status"]
+            for line in map(json.loads, resp.get_data(as_text=True).splitlines())
+        ] == [200, 200]
+        web3provider.get_block.__wrapped__.assert_called_once_with(123, "mainnet")
+
+    def test_jobs(self, client):
+        resp = client.post("/jobs?api_key=test", json={"tx_hash": VALID_TX_HASH})
+        assert resp.status_code == 202
+        job_id = resp.json["id"]
+        assert resp.json["status"] == "queued"
+
+        resp = client.get(f"/jobs/{job_id}?api_key=test")
+        assert resp.status_code == 200
+        assert resp.json["chain_id"] == "mainnet"
+
+        resp = client.get(f"/jobs/{job_id}/result?api_key=test")
+        assert resp.status_code == 404
+
+        resp = client.get("/jobs/unknown?api_key=test")
+        assert resp.status_code == 404
+
+    def test_info_is_served_from_memory(self, client, monkeypatch):
+        fetches = []
+        monkeypatch.setattr(
+            "app.api.version_info.get_latest_ethtx_version",
+            lambda timeout: fetches.append(timeout) or "0.0.1",
+        )
+        version_info = client.application.version_info
+        version_info.start = lambda: None
+        version_info.refresh()
+
+        for _ in range(3):
+            resp = client.get("/info?api_key=test")
+            assert resp.status_code == 200
+            assert resp.json["ethtx"]["is_latest"] is False
+
+        assert fetches == [version_info.timeout]
+        assert version_info.latest_ethtx_version == "0.0.1"
+
+    def test_info_keeps_stale_version_when_pypi_fails(self, client, monkeypatch):
+        version_info = client.application.version_info
+        version_info.start = lambda: None
+        monkeypatch.setattr(
+            "app.api.version_info.get_latest_ethtx_version", lambda timeout: "0.0.1"
+        )
+        version_info.refresh()
+        monkeypatch.setattr(
+            "app.api.version_info.get_latest_ethtx_version", lambda timeout: ""
+        )
+        version_info.refresh()
+
+        assert version_info.latest_ethtx_version == "0.0.1"
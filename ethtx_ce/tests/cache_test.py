@@ -0,0 +1,56 @@
+import mongomock
+import pytest
+
+from app.cache import DecodedTransactionCache, used_addresses
+from app.helpers import Singleton
+from tests.mocks.mocks import Mocks
+
+
+class TestDecodedTransactionCache:
+    @pytest.fixture
+    def collection(self):
+        return mongomock.MongoClient().db[DecodedTransactionCache.COLLECTION]
+
+    @pytest.fixture
+    def cache(self, collection):
+        Singleton._instances.pop(DecodedTransactionCache, None)
+        yield DecodedTransactionCache(max_size=2, version="1", collection=collection)
+        Singleton._instances.pop(DecodedTransactionCache, None)
+
+    def test_used_addresses(self):
+        addresses = used_addresses(Mocks.get_mocked_decoded_transaction())
+        assert addresses == {"0xsender", "0xtoken", "0xreceiver"}
+
+    def test_get_from_persistent_tier(self, cache, collection):
+        decoded = Mocks.get_mocked_decoded_transaction()
+        cache.set(decoded)
+
+        fresh = DecodedTransactionCache.__new__(DecodedTransactionCache)
+        fresh.__init__(max_size=2, version="1", collection=collection)
+        assert fresh.get("mainnet", decoded.metadata.tx_hash) == decoded
+
+        fresh.__init__(max_size=2, version="2", collection=collection)
+        assert fresh.get("mainnet", decoded.metadata.tx_hash) is None
+
+    def test_pending_transaction_is_not_cached(self, cache):
+        decoded = Mocks.get_mocked_decoded_transaction(block_number=None)
+        cache.set(decoded)
+        assert cache.get("mainnet", decoded.metadata.tx_hash) is None
+
+    def test_lru_eviction(self, cache, collection):
+        for index in range(3):
+            cache.set(Mocks.get_mocked_decoded_transaction(tx_hash=f"0x{index}"))
+
+        assert len(cache._entries) == 2
+        assert collection.count_documents({}) == 3
+
+    def test_invalidate_by_address(self, cache, collection):
+        decoded = Mocks.get_mocked_decoded_transaction()
+        cache.set(decoded)
+
+        cache.invalidate("mainnet", ["0xOther"])
+        assert cache.get("mainnet", decoded.metadata.tx_hash) is not None
+
+        cache.invalidate("mainnet", ["0xRECEIVER"])
+        assert cache.get("mainnet", decoded.metadata.tx_hash) is None
+        assert collection.count_documents({}) == 0
@@ -0,0 +1,51 @@
+from app.frontend.call_tree import (
+    CallLine,
+    buffered,
+    call_lines,
+    count_calls,
+    find_call,
+    subcalls_lines,
+)
+from tests.mocks.mocks import Mocks
+
+
+def kinds(lines):
+    return [(line.kind, line.call.call_id if line.call else None) for line in lines]
+
+
+class TestCallTree:
+    call = Mocks.get_mocked_decoded_transaction().calls
+
+    def test_call_lines(self):
+        assert kinds(call_lines(self.call)) == [
+            ("open", "0"),
+            ("open", "0_0"),
+            ("open", "0_0_0"),
+            ("close", None),
+            ("close", None),
+            ("close", None),
+        ]
+
+    def test_deep_calls_are_collapsed(self):
+        assert kinds(call_lines(self.call, max_depth=2)) == [
+            ("open", "0"),
+            ("collapsed", "0_0"),
+            ("close", None),
+        ]
+
+    def test_subcalls_lines(self):
+        assert kinds(subcalls_lines(self.call, max_depth=1)) == [("collapsed", "0_0")]
+
+    def test_find_and_count_calls(self):
+        assert find_call(self.call, "0_0_0").call_id == "0_0_0"
+        assert find_call(self.call, "1") is None
+        assert count_calls(self.call) == 3
+        assert count_calls(None) == 0
+
+    def test_buffered(self):
+        assert list(buffered(["a", "bb", "c", "dd", "e"], size=3)) == [
+            "abb",
+            "cdd",
+            "e",
+        ]
+        assert CallLine("close").call is None
@@ -0,0 +1,81 @@
+import pytest
+
+from app.api.calls import call_tree, calls_page, decode_cursor, encode_cursor
+from app.exceptions import MalformedRequest
+from tests.mocks.mocks import Mocks
+
+
+def deep_call(depth):
+    call = Mocks.get_mocked_decoded_transaction().calls.subcalls[0].subcalls[0]
+    for _ in range(depth - 1):
+        call = call.copy(update={"subcalls": [call]})
+    return call
+
+
+class TestCalls:
+    call = Mocks.get_mocked_decoded_transaction().calls
+
+    def test_call_tree(self):
+        assert call_tree(self.call) == self.call.dict()
+        assert call_tree(None) is None
+
+    def test_call_tree_max_depth(self):
+        tree = call_tree(self.call, max_depth=2)
+
+        child = tree["subcalls"][0]
+        assert child["call_id"] == "0_0"
+        assert child["subcalls"] == [] and child["subcalls_truncated"]
+        assert "subcalls_truncated" not in tree
+
+    def test_calls_pages(self):
+        first = calls_page(self.call, limit=2)
+
+        assert [(c["call_id"], c["parent_id"], c["depth"]) for c in first["calls"]] == [
+            ("0", None, 1),
+            ("0_0", "0", 2),
+        ]
+        assert first["calls"][0]["subcalls_count"] == 1
+        assert "subcalls" not in first["calls"][0]
+
+        last = calls_page(self.call, cursor=first["next_cursor"], limit=2)
+        assert [c["call_id"] for c in last["calls"]] == ["0_0_0"]
+        assert last["next_cursor"] is None
+
+        assert calls_page(self.call, limit=3)["next_cursor"] is None
+        assert len(calls_page(self.call, max_depth=2)["calls"]) == 2
+
+    def test_deep_call_tree_is_paged_without_recursion(self):
+        call = deep_call(5000)
+
+        page = calls_page(call, cursor=encode_cursor([0] * 4990), limit=100)
+
+        assert [c["depth"] for c in page["calls"]] == list(range(4991, 5001))
+
+    def test_pages_resume_at_cursor_path(self):
+        # root with three subcalls, the second one with two subcalls
+        leaf = self.call.subcalls[0].subcalls[0]
+        middle = leaf.copy(update={"call_id": "0_1", "subcalls": [leaf, leaf]})
+        call = self.call.copy(
+            update={"subcalls": [self.call.subcalls[0], middle, leaf]}
+        )
+
+        call_ids, cursors, cursor = [], [], None
+        while True:
+            page = calls_page(call, cursor=cursor, limit=2)
+            call_ids += [c["call_id"] for c in page["calls"]]
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+            cursors.append(decode_cursor(cursor))
+
+        assert cursors == [[0, 0], [1, 0], [2]]
+        assert call_ids == [c["call_id"] for c in calls_page(call, limit=7)["calls"]]
+
+    def test_invalid_cursor(self):
+        assert decode_cursor(encode_cursor([0, 2, 1])) == [0, 2, 1]
+        with pytest.raises(MalformedRequest):
+            decode_cursor("invalid")
+        with pytest.raises(MalformedRequest):
+            calls_page(self.call, cursor=encode_cursor([5]))
+        with pytest.raises(MalformedRequest):
+            calls_page(self.call, cursor=encode_cursor([0, 0]), max_depth=2)
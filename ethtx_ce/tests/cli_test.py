@@ -0,0 +1,120 @@
+import json
+
+import mongomock
+import pytest
+from ethtx.providers.semantic_providers import MongoSemanticsDatabase
+
+from app.cli import STATE_FILE, preload_semantics
+from app.config import Config
+from app.helpers import Singleton
+
+ABI = [
+    {
+        "type": "function",
+        "name": "transfer",
+        "inputs": [
+            {"name": "to", "type": "address"},
+            {"name": "value", "type": "uint256"},
+        ],
+        "outputs": [],
+    }
+]
+ADDRESS = "0x" + "ab" * 20
+
+
+class TestPreloadSemantics:
+    @pytest.fixture(autouse=True)
+    def invalidations(self, tmp_path_factory, monkeypatch):
+        path = tmp_path_factory.mktemp("shm") / "invalidations.log"
+        monkeypatch.setattr(Config, "SEMANTICS_INVALIDATION_FILE", str(path))
+        Singleton._instances.clear()
+        yield path
+        Singleton._instances.clear()
+
+    @pytest.fixture
+    def mongo(self):
+        db = mongomock.MongoClient().db
+        mongo = MongoSemanticsDatabase(db)
+        # collection names are built from an enum format, which differs between python versions
+        mongo._addresses, mongo._contracts, mongo._signatures = (
+            db.addresses,
+            db.contracts,
+            db.signatures,
+        )
+        return mongo
+
+    @pytest.fixture
+    def directory(self, tmp_path):
+        # Etherscan `getsourcecode` export named by the address
+        (tmp_path / f"{ADDRESS}.json").write_text(
+            json.dumps(
+                {"ContractName": "Token", "ABI": json.dumps(ABI), "codeHash": "0xc1"}
+            )
+        )
+        (tmp_path / "nested").mkdir()
+        (tmp_path / "nested" / "records.ndjson").write_text(
+            "\n".join(
+                json.dumps(
+                    {"address": f"0x{i:040x}", "abi": ABI, "code_hash": f"0x{i}"}
+                )
+                for i in range(3)
+            )
+        )
+        (tmp_path / "invalid.json").write_text(json.dumps([{"abi": ABI}]))
+        return tmp_path
+
+    def test_preload_and_resume(self, directory, mongo):
+        report = preload_semantics(str(directory), mongo, processes=2, batch_size=2)
+
+        assert report["files"] == 3
+        assert report["contracts"] == 4
+        assert report["failed_files"] == 1 and report["errors"] == 1
+        assert mongo.get_address_semantics("mainnet", ADDRESS)["name"] == "Token"
+        assert mongo._addresses.count_documents({}) == 4
+
+        state = (directory / STATE_FILE).read_text().split()
+        assert sorted(state) == [f"{ADDRESS}.json", "nested/records.ndjson"]
+
+        report = preload_semantics(str(directory), mongo, processes=2)
+        assert report["files"] == 1 and report["skipped_files"] == 2
+
+        report = preload_semantics(str(directory), mongo, processes=2, restart=True)
+        assert report["files"] == 3 and report["contracts"] == 4
+
+    def test_record_without_abi_is_skipped(self, directory, mongo):
+        preload_semantics(str(directory), mongo, processes=1)
+
+        # Etherscan exports contracts without verified source code with a message in place of the ABI
+        unverified = {
+            "ContractName": "",
+            "ABI": "Contract source code not verified",
+            "codeHash": "0xc1",
+        }
+        (directory / f"{ADDRESS}.json").write_text(json.dumps(unverified))
+        report = preload_semantics(str(directory), mongo, processes=1, restart=True)
+
+        assert report["skipped_records"] == 1 and report["contracts"] == 3
+        assert mongo.get_address_semantics("mainnet", ADDRESS)["name"] == "Token"
+        assert mongo.get_address_semantics("mainnet", ADDRESS)["is_contract"]
+
+    def test_preload_invalidates_decoded_transactions(
+        self, directory, mongo, invalidations
+    ):
+        decoded = mongo._db["decoded_transactions"]
+        decoded.insert_many(
+            [
+                {"_id": "used", "chain_id": "mainnet", "addresses": [ADDRESS]},
+                {"_id": "other", "chain_id": "mainnet", "addresses": ["0xother"]},
+            ]
+        )
+
+        preload_semantics(str(directory), mongo, processes=1)
+
+        assert [document["_id"] for document in decoded.find()] == ["other"]
+        # first line is the header of the log generation
+        published = [
+            json.loads(line) for line in invalidations.read_text().splitlines()[1:]
+        ]
+        assert {ADDRESS, "0x" + "0" * 40} <= {
+            address for message in published for address in message["addresses"]
+        }
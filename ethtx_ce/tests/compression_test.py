@@ -0,0 +1,123 @@
+import gzip
+import zlib
+
+import pytest
+from flask import Flask, Response, request
+from werkzeug.test import Client
+
+from app.compression import CompressionMiddleware
+
+PAYLOAD = b'{"address": "0xc02aaa39b223fe8d0a0e5c4f27ead9083c756cc2"}' * 100
+
+
+def create_app():
+    app = Flask(__name__)
+    app.calls = 0
+
+    @app.route("/json")
+    def json_response():
+        app.calls += 1
+        response = Response(PAYLOAD, mimetype="application/json")
+        response.add_etag()
+        return response.make_conditional(request)
+
+    @app.route("/small")
+    def small():
+        return Response(b"{}", mimetype="application/json")
+
+    @app.route("/image")
+    def image():
+        return Response(PAYLOAD, mimetype="image/png")
+
+    @app.route("/stream")
+    def stream():
+        return Response((PAYLOAD for _ in range(3)), mimetype="text/html")
+
+    return app
+
+
+class TestCompressionMiddleware:
+    @pytest.fixture
+    def app(self):
+        return create_app()
+
+    @pytest.fixture
+    def client(self, app):
+        app.wsgi_app = CompressionMiddleware(app.wsgi_app, min_size=1024)
+        return Client(app)
+
+    def test_gzip(self, client):
+        response = client.get("/json", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert response.headers["Vary"] == "Accept-Encoding"
+        assert int(response.headers["Content-Length"]) < len(PAYLOAD)
+        assert gzip.decompress(response.data) == PAYLOAD
+
+    def test_not_accepted_encoding(self, client):
+        for accept_encoding in ("", "identity", "gzip;q=0"):
+            response = client.get("/json", headers={"Accept-Encoding": accept_encoding})
+
+            assert "Content-Encoding" not in response.headers
+            assert response.headers["Vary"] == "Accept-Encoding"
+            assert response.data == PAYLOAD
+
+    def test_small_and_incompressible_responses(self, client):
+        small = client.get("/small", headers={"Accept-Encoding": "gzip"})
+        image = client.get("/image", headers={"Accept-Encoding": "gzip"})
+
+        assert "Content-Encoding" not in small.headers
+        assert "Content-Encoding" not in image.headers
+        assert "Vary" not in image.headers
+        assert image.data == PAYLOAD
+
+    def test_stream(self, client):
+        response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert "Content-Length" not in response.headers
+        assert zlib.decompress(response.data, 16 + zlib.MAX_WBITS) == PAYLOAD * 3
+
+    def test_compressed_payload_is_cached_by_etag(self, app, client):
+        middleware = app.wsgi_app
+        compress = middleware.encoders["gzip"].compress
+        compressions = []
+        middleware.encoders["gzip"].compress = lambda data: compressions.append(
+            data
+        ) or compress(data)
+
+        first = client.get("/json", headers={"Accept-Encoding": "gzip"})
+        second = client.get("/json", headers={"Accept-Encoding": "gzip"})
+
+        assert len(compressions) == 1
+        assert first.data == second.data
+        assert first.headers["ETag"].endswith('-gzip"')
+
+    def test_conditional_request_with_encoded_etag(self, client):
+        first = client.get("/json", headers={"Accept-Encoding": "gzip"})
+        second = client.get(
+            "/json",
+            headers={"Accept-Encoding": "gzip", "If-None-Match": first.headers["ETag"]},
+        )
+
+        assert second.status_code == 304
+        assert second.headers["ETag"] == first.headers["ETag"]
+        assert "Content-Encoding" not in second.headers
+
+    def test_brotli_preferred(self, client):
+        brotli = pytest.importorskip("brotli")
+
+        response = client.get("/json", headers={"Accept-Encoding": "gzip, br"})
+
+        assert response.headers["Content-Encoding"] == "br"
+        assert brotli.decompress(response.data) == PAYLOAD
+
+    def test_negotiate_by_client_quality_then_server_preference(self):
+        middleware = CompressionMiddleware(None)
+        middleware.encoders = {"br": "br", "zstd": "zstd", "gzip": "gzip"}
+
+        assert middleware._negotiate("gzip, br") == "br"
+        assert middleware._negotiate("gzip;q=1, br;q=0.5") == "gzip"
+        assert middleware._negotiate("br;q=0.2, *;q=0.8") == "zstd"
+        assert middleware._negotiate("gzip;q=0.5, identity") is None
+        assert middleware._negotiate("*;q=0") is None
@@ -0,0 +1,334 @@
+import fcntl
+import json
+import multiprocessing
+import os
+import threading
+import time
+import zlib
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from ethtx.decoders.abi.decoder import ABIDecoder
+from ethtx.models.objects_model import TransactionMetadata
+from ethtx.providers.semantic_providers import SemanticsRepository
+
+from app.cache import DecodedTransactionCache, used_addresses
+from app.decoding import (
+    FULL,
+    LITE,
+    BackgroundDecodes,
+    DecodeLocks,
+    SingleFlight,
+    decode_transaction,
+    decode_transaction_lite,
+    decode_transactions,
+    init_decoding,
+)
+from app.helpers import Singleton
+from app.semantics_cache import SemanticsInvalidationBus
+from tests.mocks.mocks import Mocks
+
+TX_HASH = "0x" + "a" * 64
+SENDER, RECEIVER = "0x" + "1" * 40, "0x" + "2" * 40
+
+
+class TestSingleFlight:
+    def test_concurrent_calls_share_result(self):
+        flight = SingleFlight()
+        started, release = threading.Event(), threading.Event()
+        calls, results = [], []
+
+        def func():
+            calls.append(1)
+            started.set()
+            release.wait()
+            return "result"
+
+        leader = threading.Thread(target=lambda: results.append(flight.do("k", func)))
+        leader.start()
+        started.wait()
+
+        followers = [
+            threading.Thread(target=lambda: results.append(flight.do("k", func)))
+            for _ in range(3)
+        ]
+        for follower in followers:
+            follower.start()
+        time.sleep(0.05)
+        release.set()
+        for thread in [leader, *followers]:
+            thread.join()
+
+        assert len(calls) == 1
+        assert results == ["result"] * 4
+        assert flight.do("k", lambda: "next") == "next"
+
+    def test_error_is_raised(self):
+        with pytest.raises(ValueError):
+            SingleFlight().do("k", lambda: int("x"))
+
+
+class TestDecodeLocks:
+    @pytest.fixture
+    def locks(self, tmp_path):
+        Singleton._instances.clear()
+        yield DecodeLocks(lock_file=str(tmp_path / "decode.lock"))
+        Singleton._instances.clear()
+
+    def test_lock_is_visible_to_other_processes(self, locks):
+        def try_lock(queue):
+            fd = os.open(locks.lock_file, os.O_RDWR)
+            offset = zlib.crc32(f"mainnet:{TX_HASH}".encode())
+            try:
+                fcntl.lockf(fd, fcntl.LOCK_EX | fcntl.LOCK_NB, 1, offset)
+                queue.put("acquired")
+            except OSError:
+                queue.put("locked")
+
+        context = multiprocessing.get_context("fork")
+        queue = context.Queue()
+        with locks.hold("mainnet", TX_HASH):
+            process = context.Process(target=try_lock, args=(queue,))
+            process.start()
+            process.join()
+            assert queue.get() == "locked"
+
+        process = context.Process(target=try_lock, args=(queue,))
+        process.start()
+        process.join()
+        assert queue.get() == "acquired"
+
+
+class TestDecodeTransaction:
+    @pytest.fixture(autouse=True)
+    def singletons(self):
+        Singleton._instances.clear()
+        yield
+        Singleton._instances.clear()
+
+    def test_second_decode_is_served_from_cache(self):
+        engine = MagicMock()
+        engine.decoders.decode_transaction.return_value = (
+            Mocks.get_mocked_decoded_transaction(tx_hash=TX_HASH)
+        )
+
+        first = decode_transaction(engine, "mainnet", TX_HASH)
+        second = decode_transaction(engine, "mainnet", TX_HASH)
+
+        assert first is second
+        engine.decoders.decode_transaction.assert_called_once()
+
+        decode_transaction(engine, "mainnet", TX_HASH, recreate_semantics=True)
+        assert engine.decoders.decode_transaction.call_count == 2
+
+    def test_recreated_semantics_are_invalidated_in_all_workers(self, tmp_path):
+        path = tmp_path / "invalidations.log"
+        SemanticsInvalidationBus(str(path))
+        engine = MagicMock()
+        decoded = Mocks.get_mocked_decoded_transaction(tx_hash=TX_HASH)
+        engine.decoders.decode_transaction.return_value = decoded
+
+        decode_transaction(engine, "mainnet", TX_HASH, recreate_semantics=True)
+
+        [header, message] = [
+            json.loads(line) for line in path.read_text().splitlines()
+        ]
+        assert "generation" in header
+        assert message["chain_id"] == "mainnet"
+        assert set(message["addresses"]) == used_addresses(decoded)
+
+    @pytest.fixture
+    def sections_engine(self, monkeypatch):
+        mocked = Mocks.get_mocked_decoded_transaction(tx_hash=TX_HASH)
+        monkeypatch.setattr(
+            "app.decoding.Block.from_raw",
+            lambda **kwargs: SimpleNamespace(metadata=mocked.block_metadata),
+        )
+
+        engine = MagicMock()
+        service = engine.decoders
+        service.web3provider.get_full_transaction.return_value = SimpleNamespace(
+            metadata=mocked.metadata, events=[], root_call=None
+        )
+        service.get_proxies.return_value = {}
+        service.abi_decoder.decode_events.return_value = mocked.events
+        service.abi_decoder.decode_calls.return_value = mocked.calls
+        service.abi_decoder.decode_transfers.return_value = mocked.transfers
+        service.abi_decoder.decode_balances.return_value = mocked.balances
+        service.semantic_decoder.decode_metadata.side_effect = lambda b, m, c: m
+        for section in ("events", "calls", "transfers", "balances"):
+            getattr(service.semantic_decoder, f"decode_{section}").side_effect = (
+                lambda decoded, *args: decoded
+            )
+
+        return engine
+
+    def test_sections_decode_skips_stages(self, sections_engine):
+        abi = sections_engine.decoders.abi_decoder
+        semantic = sections_engine.decoders.semantic_decoder
+
+        decoded = decode_transaction(
+            sections_engine, "mainnet", TX_HASH, sections={"metadata", "events"}
+        )
+
+        assert decoded.events and decoded.metadata.tx_hash == TX_HASH
+        assert decoded.calls is None and decoded.transfers == []
+        abi.decode_calls.assert_not_called()
+        abi.decode_transfers.assert_not_called()
+        semantic.decode_events.assert_called_once()
+        semantic.decode_transfers.assert_not_called()
+        sections_engine.decoders.decode_transaction.assert_not_called()
+        assert DecodedTransactionCache().get("mainnet", TX_HASH) is None
+
+        decoded = decode_transaction(
+            sections_engine, "mainnet", TX_HASH, sections={"metadata"}
+        )
+        assert decoded.calls is None and decoded.events == []
+        abi.decode_events.assert_called_once()
+
+    def test_sections_needing_events_and_calls_run_full_decode(self, sections_engine):
+        full = Mocks.get_mocked_decoded_transaction(tx_hash=TX_HASH)
+        sections_engine.decoders.decode_transaction.return_value = full
+
+        decoded = decode_transaction(
+            sections_engine, "mainnet", TX_HASH, sections={"transfers", "balances"}
+        )
+
+        assert decoded is full
+        assert DecodedTransactionCache().get("mainnet", TX_HASH) is full
+        sections_engine.decoders.web3provider.get_full_transaction.assert_not_called()
+
+    def test_sections_decode_uses_cache(self, sections_engine):
+        sections_engine.decoders.decode_transaction.return_value = (
+            Mocks.get_mocked_decoded_transaction(tx_hash=TX_HASH)
+        )
+        full = decode_transaction(sections_engine, "mainnet", TX_HASH)
+
+        assert (
+            decode_transaction(
+                sections_engine, "mainnet", TX_HASH, sections={"metadata"}
+            )
+            is full
+        )
+        sections_engine.decoders.web3provider.get_full_transaction.assert_not_called()
+
+    def test_lite_decode_schedules_full_decode(self, sections_engine, monkeypatch):
+        mocked = Mocks.get_mocked_decoded_transaction(tx_hash=TX_HASH)
+        monkeypatch.setattr(
+            "app.decoding.TransactionMetadata.from_raw",
+            lambda w3transaction, w3receipt: mocked.metadata,
+        )
+        service = sections_engine.decoders
+        service.web3provider.get_transaction.return_value = SimpleNamespace(
+            to=mocked.metadata.to_address, input="0x"
+        )
+        service.web3provider.get_receipt.return_value = SimpleNamespace(logs=[])
+        full_decode = threading.Event()
+        service.decode_transaction.side_effect = (
+            lambda **kwargs: full_decode.wait(5) and mocked
+        )
+
+        decoded, mode = decode_transaction_lite(sections_engine, "mainnet", TX_HASH)
+
+        assert mode == LITE
+        assert decoded.calls is None and decoded.transfers
+        service.web3provider.get_full_transaction.assert_not_called()
+        root_call = service.abi_decoder.decode_calls.call_args.args[0]
+        assert root_call.to_address == mocked.metadata.to_address
+        assert not root_call.subcalls
+
+        full_decode.set()
+        BackgroundDecodes()._executor.shutdown(wait=True)
+
+        decoded, mode = decode_transaction_lite(sections_engine, "mainnet", TX_HASH)
+        assert mode == FULL and decoded.calls is not None
+        service.decode_transaction.assert_called_once()
+
+    def test_concurrent_decodes_record_their_own_semantics(self, tmp_path):
+        engine = MagicMock()
+        engine.semantics = SemanticsRepository(*[MagicMock()] * 4)
+        app = SimpleNamespace(
+            config={
+                "DECODED_CACHE_PERSISTENT": False,
+                "DECODED_CACHE_SIZE": 16,
+                "ethtx_version": "test",
+                "DECODE_LOCK_FILE": str(tmp_path / "decode.lock"),
+                "LITE_DECODE_UPGRADE_CONCURRENCY": 1,
+            }
+        )
+        init_decoding(app, engine)
+
+        tx_hashes = [f"0x{index:064x}" for index in range(4)]
+        barrier = threading.Barrier(len(tx_hashes), timeout=5)
+        used = {}
+
+        def decode(chain_id, tx_hash, recreate_semantics):
+            # the same recording as the EthTx decoder service, overlapping in all threads
+            repository = engine.semantics
+            repository.record()
+            barrier.wait()
+            if repository._records is not None:
+                repository._records.append(tx_hash[-4:])
+            barrier.wait()
+            used[tx_hash] = repository.end_record()
+            return Mocks.get_mocked_decoded_transaction(tx_hash=tx_hash)
+
+        engine.decoders.decode_transaction.side_effect = decode
+
+        results = dict(decode_transactions(engine, "mainnet", tx_hashes, concurrency=4))
+
+        assert all(not isinstance(result, Exception) for result in results.values())
+        assert used == {tx_hash: [tx_hash[-4:]] for tx_hash in tx_hashes}
+
+    def test_lite_decode_transfers_transaction_value(self, monkeypatch):
+        metadata = TransactionMetadata(
+            tx_hash=TX_HASH,
+            block_number=1,
+            gas_price=1,
+            from_address=SENDER,
+            to_address=RECEIVER,
+            tx_index=0,
+            tx_value=10**18,
+            gas_limit=21000,
+            gas_used=21000,
+            success=True,
+        )
+        mocked = Mocks.get_mocked_decoded_transaction(tx_hash=TX_HASH)
+        monkeypatch.setattr(
+            "app.decoding.TransactionMetadata.from_raw",
+            lambda w3transaction, w3receipt: metadata,
+        )
+        monkeypatch.setattr(
+            "app.decoding.Block.from_raw",
+            lambda **kwargs: SimpleNamespace(metadata=mocked.block_metadata),
+        )
+
+        engine = MagicMock()
+        service = engine.decoders
+        service.web3provider.get_transaction.return_value = SimpleNamespace(
+            to=RECEIVER, input="0x"
+        )
+        service.web3provider.get_receipt.return_value = SimpleNamespace(logs=[])
+        repository = MagicMock()
+        repository.get_address_label.side_effect = lambda chain_id, address, *_: address
+        repository.check_is_contract.return_value = False
+        service.abi_decoder = ABIDecoder(repository, "mainnet")
+        service.semantic_decoder.decode_metadata.side_effect = lambda b, m, c: m
+        for section in ("events", "transfers", "balances"):
+            getattr(service.semantic_decoder, f"decode_{section}").side_effect = (
+                lambda decoded, *args: decoded
+            )
+
+        decoded, mode = decode_transaction_lite(engine, "mainnet", TX_HASH)
+
+        assert mode == LITE and decoded.calls is None
+        assert [
+            (
+                transfer.from_address.address,
+                transfer.to_address.address,
+                transfer.token_symbol,
+                transfer.value,
+            )
+            for transfer in decoded.transfers
+        ] == [(SENDER, RECEIVER, "ETH", 1)]
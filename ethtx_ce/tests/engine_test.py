@@ -0,0 +1,27 @@
+from unittest.mock import MagicMock
+
+from ethtx.providers.semantic_providers import MongoSemanticsDatabase
+from pymongo import MongoClient
+
+from app.cache import DecodedTransactionCache
+from app.engine import reconnect_engine
+from app.helpers import Singleton
+from app.semantics_cache import CachedSemanticsDatabase
+
+
+class TestEngine:
+    def test_reconnect_engine_creates_new_mongo_client(self):
+        Singleton._instances.clear()
+        client = MongoClient("mongodb://localhost:1/ethtx", connect=False)
+        mongo = MongoSemanticsDatabase(client.ethtx)
+        decoded_cache = DecodedTransactionCache()
+        decoded_cache._collection = client.ethtx[DecodedTransactionCache.COLLECTION]
+        engine = MagicMock()
+        engine.semantics.database = CachedSemanticsDatabase(mongo)
+
+        reconnect_engine(engine)
+
+        assert mongo._db.client is not client
+        assert mongo._db.name == "ethtx"
+        assert decoded_cache._collection.database.client is mongo._db.client
+        Singleton._instances.clear()
@@ -1,6 +1,19 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
 import pytest
 
+from app.cache import DecodedTransactionCache
 from app.frontend import create_app
+from app.helpers import Singleton
+from app.semantics_cache import SemanticsInvalidationBus
+from tests.mocks.mocks import Mocks
+
+TX_HASH = "0x" + "a" * 64
+
+
+class Settings:
+    DECODED_CACHE_PERSISTENT = False
 
 
 class TestFlask:
@@ -22,3 +35,115 @@ class TestFlask:
         url = f"/semantics/mainnet/{tx_hash}/"
         resp = client.get(url)
         assert resp.status_code == 401
+
+
+class TestTransactionPage:
+    @pytest.fixture
+    def client(self):
+        Singleton._instances.clear()
+        engine = MagicMock()
+        engine.default_chain = "mainnet"
+        engine.decoders.decode_transaction.side_effect = (
+            lambda chain_id, tx_hash, recreate_semantics=False: (
+                Mocks.get_mocked_decoded_transaction(tx_hash=tx_hash)
+            )
+        )
+        app = create_app(engine, Settings)
+        app.price_feed = SimpleNamespace(price=2000.0)
+        with app.test_client() as client:
+            yield client
+        Singleton._instances.clear()
+
+    def test_page_is_cached_with_etag(self, client):
+        engine = client.application.ethtx
+        resp = client.get(f"/mainnet/{TX_HASH}/")
+        assert resp.status_code == 200
+        assert "USD" in resp.get_data(as_text=True)
+        assert "<!--tx-cost-usd-->" not in resp.get_data(as_text=True)
+        assert resp.headers["ETag"]
+        assert "must-revalidate" in resp.headers["Cache-Control"]
+
+        DecodedTransactionCache()._entries.clear()
+        cached = client.get(f"/mainnet/{TX_HASH}/")
+        assert cached.get_data() == resp.get_data()
+        assert engine.decoders.decode_transaction.call_count == 1
+
+        not_modified = client.get(
+            f"/mainnet/{TX_HASH}/", headers={"If-None-Match": resp.headers["ETag"]}
+        )
+        assert not_modified.status_code == 304
+        assert not_modified.get_data() == b""
+
+    def test_lite_page_is_not_cached(self, client, monkeypatch):
+        lite = Mocks.get_mocked_decoded_transaction(tx_hash=TX_HASH).copy(
+            update={"calls": None}
+        )
+        monkeypatch.setattr(
+            "app.frontend.transactions.decode_transaction_lite",
+            lambda engine, chain_id, tx_hash: (lite, "lite"),
+        )
+
+        resp = client.get(f"/mainnet/{TX_HASH}/?mode=lite&theme=dark")
+        html = resp.get_data(as_text=True)
+        assert "Execution trace is being decoded" in html
+        assert f'href="/mainnet/{TX_HASH}/?mode=lite&amp;theme=dark">reload' in html
+        assert resp.headers["Cache-Control"] == "no-store"
+        assert "ETag" not in resp.headers
+
+        resp = client.get(f"/mainnet/{TX_HASH}/")
+        assert "Execution trace:" in resp.get_data(as_text=True)
+
+    def test_etag_changes_with_eth_price(self, client):
+        etag = client.get(f"/mainnet/{TX_HASH}/").headers["ETag"]
+
+        client.application.price_feed = SimpleNamespace(price=3000.0)
+        resp = client.get(f"/mainnet/{TX_HASH}/", headers={"If-None-Match": etag})
+
+        assert resp.status_code == 200
+        assert resp.headers["ETag"] != etag
+
+    def test_semantics_invalidation_drops_page(self, client):
+        client.get(f"/mainnet/{TX_HASH}/")
+
+        SemanticsInvalidationBus().publish("mainnet", ["0xToken"])
+        client.get(f"/mainnet/{TX_HASH}/")
+
+        assert client.application.ethtx.decoders.decode_transaction.call_count == 2
+
+    def test_large_transaction_is_streamed(self, client):
+        client.application.config["TRANSACTION_PAGE_STREAM_THRESHOLD"] = 1
+
+        resp = client.get(f"/mainnet/{TX_HASH}/")
+
+        assert resp.is_streamed
+        html = resp.get_data(as_text=True)
+        assert 'id="0_0_0"' in html
+        assert "USD" in html and "<!--tx-cost-usd-->" not in html
+        assert "ETag" not in resp.headers
+
+    def test_deep_calls_are_loaded_as_fragments(self, client):
+        client.application.config["TRANSACTION_PAGE_CALL_DEPTH"] = 2
+
+        html = client.get(f"/mainnet/{TX_HASH}/").get_data(as_text=True)
+        assert 'id="0_0_0"' not in html
+        assert f'data-fragment-url="/mainnet/{TX_HASH}/calls/0_0"' in html
+
+        fragment = client.get(f"/mainnet/{TX_HASH}/calls/0_0")
+        assert fragment.status_code == 200
+        assert 'id="0_0_0"' in fragment.get_data(as_text=True)
+        assert "ETag" in fragment.headers
+
+    def test_fragment_contains_only_children(self, client):
+        fragment = client.get(f"/mainnet/{TX_HASH}/calls/0")
+        html = fragment.get_data(as_text=True)
+
+        assert 'id="0_0"' in html and 'class="lazy' in html
+        assert 'id="0_0_0"' not in html
+
+        not_modified = client.get(
+            f"/mainnet/{TX_HASH}/calls/0",
+            headers={"If-None-Match": fragment.headers["ETag"]},
+        )
+        assert not_modified.status_code == 304
+
+        assert client.get(f"/mainnet/{TX_HASH}/calls/9").status_code == 404
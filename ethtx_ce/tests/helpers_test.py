@@ -0,0 +1,41 @@
+import subprocess
+
+import pytest
+
+from app import helpers
+
+
+class TestVersions:
+    @pytest.fixture
+    def repo(self, tmp_path):
+        def git(*args):
+            return subprocess.run(
+                ["git", *args], cwd=tmp_path, check=True, capture_output=True, text=True
+            ).stdout.strip()
+
+        git("init", "-q")
+        git("remote", "add", "origin", "git@github.com:EthTx/ethtx_ce.git")
+        (tmp_path / "file").write_text("content")
+        git("add", "file")
+        git("-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qm", "init")
+        (tmp_path / "app").mkdir()
+        return tmp_path, git
+
+    def test_version_from_git_files(self, repo, monkeypatch):
+        path, git = repo
+        monkeypatch.setattr(helpers, "__file__", str(path / "app" / "helpers.py"))
+
+        assert helpers._get_version_from_git() == (
+            "git@github.com:EthTx/ethtx_ce.git",
+            git("rev-parse", "HEAD")[:7],
+        )
+
+    def test_version_from_packed_refs(self, repo, monkeypatch):
+        path, git = repo
+        git("pack-refs", "--all")
+        monkeypatch.setattr(helpers, "__file__", str(path / "app" / "helpers.py"))
+
+        assert helpers._get_version_from_git()[1] == git("rev-parse", "HEAD")[:7]
+
+    def test_versions_are_resolved_once(self):
+        assert helpers.get_versions() is helpers.get_versions()
@@ -0,0 +1,151 @@
+import json
+import os
+import signal
+import time
+from unittest.mock import MagicMock
+
+import pytest
+from ethtx.exceptions import InvalidTransactionHash
+from flask import Flask
+
+from app.helpers import Singleton
+from app.jobs import JobStatus, SQLiteJobQueue
+from app.jobs import worker as jobs_worker
+from app.jobs.worker import JobWorker, JobWorkers
+from tests.mocks.mocks import Mocks
+
+TX_HASH = "0x" + "a" * 64
+
+
+class TestSQLiteJobQueue:
+    @pytest.fixture
+    def queue(self, tmp_path):
+        return SQLiteJobQueue(str(tmp_path / "jobs.sqlite3"), timeout=60)
+
+    def test_job_lifecycle(self, queue):
+        job = queue.enqueue("mainnet", TX_HASH)
+        assert queue.get(job.id).status == JobStatus.QUEUED
+        assert queue.enqueue("mainnet", TX_HASH).id == job.id
+
+        claimed = queue.claim("worker")
+        assert claimed.id == job.id
+        assert claimed.status == JobStatus.RUNNING
+        assert claimed.worker == "worker"
+        assert queue.claim("worker") is None
+        assert queue.result(job.id) is None
+
+        assert queue.complete(job.id, "worker", '{"status": true}')
+        assert queue.get(job.id).status == JobStatus.DONE
+        assert queue.result(job.id) == '{"status": true}'
+        assert queue.enqueue("mainnet", TX_HASH).id != job.id
+
+    def test_stale_running_job_is_queued_again(self, queue):
+        job = queue.enqueue("mainnet", TX_HASH)
+        queue.claim("stale")
+
+        queue.timeout = -1
+        assert queue.claim("worker").id == job.id
+
+    def test_stale_worker_cannot_finish_requeued_job(self, queue):
+        job = queue.enqueue("mainnet", TX_HASH)
+        queue.claim("stale")
+        queue.timeout = -1
+        queue.claim("worker")
+
+        assert not queue.complete(job.id, "stale", '{"status": false}')
+        assert not queue.fail(job.id, "stale", "error")
+        assert queue.get(job.id).status == JobStatus.RUNNING
+
+        assert queue.complete(job.id, "worker", '{"status": true}')
+        assert not queue.complete(job.id, "worker", '{"status": true}')
+        assert queue.result(job.id) == '{"status": true}'
+
+    def test_purge(self, queue):
+        job = queue.enqueue("mainnet", TX_HASH)
+        queue.fail(job.id, queue.claim("worker").worker, "error")
+
+        assert queue.purge(older_than=3600) == 0
+        assert queue.purge(older_than=-1) == 1
+        assert queue.get(job.id) is None
+
+
+class TestJobWorker:
+    @pytest.fixture
+    def queue(self, tmp_path):
+        return SQLiteJobQueue(str(tmp_path / "jobs.sqlite3"))
+
+    @pytest.fixture
+    def app(self):
+        Singleton._instances.clear()
+        app = Flask(__name__)
+        app.ethtx = MagicMock()
+        yield app
+        Singleton._instances.clear()
+
+    def test_process_stores_result(self, app, queue):
+        app.ethtx.decoders.decode_transaction.return_value = (
+            Mocks.get_mocked_decoded_transaction(tx_hash=TX_HASH)
+        )
+        job = queue.enqueue("mainnet", TX_HASH)
+
+        worker = JobWorker(app, queue)
+        worker.process(queue.claim(worker.name))
+
+        assert queue.get(job.id).status == JobStatus.DONE
+        result = json.loads(queue.result(job.id))
+        assert result["metadata"]["timestamp"] == "2022-01-01 12:00:00"
+
+    def test_process_stores_error(self, app, queue):
+        app.ethtx.decoders.decode_transaction.side_effect = InvalidTransactionHash(
+            TX_HASH
+        )
+        job = queue.enqueue("mainnet", TX_HASH)
+
+        worker = JobWorker(app, queue)
+        worker.process(queue.claim(worker.name))
+
+        job = queue.get(job.id)
+        assert job.status == JobStatus.FAILED
+        assert TX_HASH in job.error
+
+
+class TestJobWorkers:
+    def test_crashed_worker_is_restarted(self, monkeypatch, tmp_path):
+        started = tmp_path / "started"
+
+        def run_worker():
+            if not started.exists():
+                started.touch()
+                os._exit(1)
+            time.sleep(60)
+
+        monkeypatch.setattr(jobs_worker, "run_worker", run_worker)
+        workers = JobWorkers(1, check_interval=0.05)
+        workers.start()
+        crashed = workers.processes[0]
+        try:
+            crashed.join(5)
+            for _ in range(100):
+                if workers.processes[0] is not crashed:
+                    break
+                time.sleep(0.05)
+
+            assert crashed.exitcode == 1
+            assert workers.processes[0] is not crashed
+            assert workers.processes[0].is_alive()
+        finally:
+            workers.stop(timeout=0)
+
+    def test_stop_kills_worker_after_timeout(self, monkeypatch):
+        def run_worker():
+            signal.signal(signal.SIGTERM, signal.SIG_IGN)
+            time.sleep(60)
+
+        monkeypatch.setattr(jobs_worker, "run_worker", run_worker)
+        workers = JobWorkers(1, check_interval=0.05)
+        workers.start()
+        time.sleep(0.2)
+
+        workers.stop(timeout=0.2)
+
+        assert workers.processes[0].exitcode == -signal.SIGKILL
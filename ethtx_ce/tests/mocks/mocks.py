@@ -1,5 +1,17 @@
+from datetime import datetime
+from decimal import Decimal
 from typing import Dict
 
+from ethtx.models.decoded_model import (
+    AddressInfo,
+    Argument,
+    DecodedCall,
+    DecodedEvent,
+    DecodedTransaction,
+    DecodedTransactionMetadata,
+    DecodedTransfer,
+)
+from ethtx.models.objects_model import BlockMetadata
 from ethtx.models.w3_model import W3Transaction, W3Block, W3Receipt, W3Log
 from ethtx.utils.attr_dict import AttrDict
 from hexbytes import HexBytes
@@ -114,6 +126,96 @@ class Mocks:
         log = W3Log(**log_data)
         return log
 
+    @staticmethod
+    def get_mocked_decoded_transaction(
+        tx_hash: str = "0xd7701a0fc05593aee3a16f20cab605db7183f752ae942cc75fd0975feaf1072e",
+        block_number: int = 123,
+    ) -> DecodedTransaction:
+        timestamp = datetime(2022, 1, 1, 12, 0, 0)
+        sender = AddressInfo(address="0xSender", name="sender", badge="sender")
+        token = AddressInfo(address="0xToken", name="TKN", badge=None)
+
+        def call(call_id: str, indent: int, subcalls) -> DecodedCall:
+            return DecodedCall(
+                chain_id="mainnet",
+                timestamp=timestamp,
+                tx_hash=tx_hash,
+                call_id=call_id,
+                call_type="call",
+                from_address=sender,
+                to_address=token,
+                value=Decimal(0),
+                function_signature="0xa9059cbb",
+                function_name="transfer",
+                arguments=[Argument(name="amount", type="uint256", value=10**30)],
+                outputs=[Argument(name="", type="bool", value=True)],
+                gas_used=21000,
+                error=None,
+                status=True,
+                indent=indent,
+                subcalls=subcalls,
+            )
+
+        return DecodedTransaction(
+            block_metadata=BlockMetadata(
+                block_number=123,
+                block_hash="0xblock",
+                timestamp=timestamp,
+                parent_hash="0xparent",
+                miner="0xminer",
+                gas_limit=30000000,
+                gas_used=21000,
+                tx_count=1,
+            ),
+            metadata=DecodedTransactionMetadata(
+                chain_id="mainnet",
+                tx_hash=tx_hash,
+                block_number=block_number,
+                block_hash="0xblock",
+                timestamp=timestamp,
+                gas_price=10,
+                from_address="0xSender",
+                to_address="0xToken",
+                sender=sender,
+                receiver=token,
+                tx_index=0,
+                tx_value=0,
+                gas_limit=30000000,
+                gas_used=21000,
+                success=True,
+            ),
+            events=[
+                DecodedEvent(
+                    chain_id="mainnet",
+                    tx_hash=tx_hash,
+                    timestamp=timestamp,
+                    contract=token,
+                    index=0,
+                    call_id="0",
+                    event_signature="0xddf252ad",
+                    event_name="Transfer",
+                    parameters=[
+                        Argument(name="value", type="uint256", value=Decimal("1.5"))
+                    ],
+                )
+            ],
+            calls=call("0", 0, [call("0_0", 1, [call("0_0_0", 2, [])])]),
+            transfers=[
+                DecodedTransfer(
+                    from_address=sender,
+                    to_address=AddressInfo(
+                        address="0xReceiver", name="receiver", badge="receiver"
+                    ),
+                    token_address="0xToken",
+                    token_symbol="TKN",
+                    token_standard="ERC20",
+                    value=Decimal("1.5"),
+                )
+            ],
+            balances=[],
+            status=True,
+        )
+
 
 class TestMocks:
     def test_can_create_w3_log(self):
@@ -0,0 +1,63 @@
+import json
+import os
+import time
+
+import pytest
+
+from app.frontend.price_feed import PriceFeed
+
+calls = []
+
+
+def stub_price():
+    calls.append(time.time())
+    return 1234.5
+
+
+class TestPriceFeed:
+    @pytest.fixture
+    def feed(self, tmp_path):
+        calls.clear()
+        feed = PriceFeed(stub_price, str(tmp_path / "price.json"), interval=60)
+        yield feed
+        feed.stop()
+
+    def test_no_price_before_first_refresh(self, feed):
+        feed.start = lambda: None  # do not start the refresher thread
+
+        assert feed.price is None
+
+    def test_refresh_shares_price_through_file(self, feed):
+        feed.refresh()
+
+        with open(feed.path) as f:
+            assert json.load(f)["price"] == 1234.5
+
+        other = PriceFeed(stub_price, feed.path, interval=60)
+        other.start = lambda: None
+        assert other.price == 1234.5
+
+    def test_refresh_is_skipped_when_price_is_fresh(self, feed):
+        feed.refresh()
+        feed.refresh()
+
+        assert len(calls) == 1
+
+    def test_refresh_when_price_is_stale(self, feed):
+        feed.refresh()
+        stale = time.time() - 120
+        os.utime(feed.path, (stale, stale))
+
+        feed.refresh()
+
+        assert len(calls) == 2
+
+    def test_background_refresh(self, feed):
+        feed.price
+
+        for _ in range(100):
+            if feed.price is not None:
+                break
+            time.sleep(0.01)
+
+        assert feed.price == 1234.5
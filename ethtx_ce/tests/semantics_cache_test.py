@@ -0,0 +1,269 @@
+import os
+
+import mongomock
+import pytest
+from ethtx.providers.semantic_providers import MongoSemanticsDatabase
+
+from app.semantics_cache import (
+    CachedSemanticsDatabase,
+    SemanticsInvalidationBus,
+    SharedSemanticsStore,
+)
+
+TOKEN = "0xtoken"
+ROUTER = "0xrouter"
+
+
+def insert(database, address, code_hash, name):
+    database.insert_address(
+        {"chain_id": "mainnet", "address": address, "contract": code_hash},
+        update_if_exist=True,
+    )
+    database.insert_contract(
+        {"code_hash": code_hash, "name": name}, update_if_exist=True
+    )
+
+
+class TestCachedSemanticsDatabase:
+    @pytest.fixture
+    def database(self):
+        db = mongomock.MongoClient().db
+        mongo = MongoSemanticsDatabase(db)
+        # collection names are built from an enum format, which differs between python versions
+        mongo._addresses, mongo._contracts = db.addresses, db.contracts
+        database = CachedSemanticsDatabase(mongo, max_size=10)
+        insert(database, TOKEN, "0x1", "Token")
+        insert(database, ROUTER, "0x2", "Router")
+        return database
+
+    def read(self, database, address):
+        record = database.get_address_semantics("mainnet", address)
+        return database.get_contract_semantics(record["contract"])["name"]
+
+    def test_records_are_cached(self, database):
+        assert self.read(database, TOKEN) == "Token"
+        database._contracts.update_one({"code_hash": "0x1"}, {"$set": {"name": "X"}})
+
+        assert self.read(database, TOKEN) == "Token"
+
+    def test_evict_only_given_address(self, database):
+        self.read(database, TOKEN)
+        self.read(database, ROUTER)
+        database._contracts.update_many({}, {"$set": {"name": "X"}})
+
+        database.evict("mainnet", [TOKEN])
+
+        assert self.read(database, TOKEN) == "X"
+        assert self.read(database, ROUTER) == "Router"
+
+    def test_writes_evict_entries(self, database):
+        self.read(database, TOKEN)
+
+        insert(database, TOKEN, "0x1", "New Token")
+
+        assert self.read(database, TOKEN) == "New Token"
+
+    def test_get_many_loads_misses_with_single_query(self, database, monkeypatch):
+        self.read(database, TOKEN)
+        queries = []
+        find = database.database._addresses.find
+        monkeypatch.setattr(
+            database.database._addresses,
+            "find",
+            lambda query: queries.append(query) or find(query),
+        )
+
+        records = database.get_many_address_semantics(
+            [("mainnet", TOKEN), ("mainnet", ROUTER), ("mainnet", "0xmissing")]
+        )
+
+        assert set(records) == {("mainnet", TOKEN), ("mainnet", ROUTER)}
+        assert queries == [
+            {
+                "$or": [
+                    {"chain_id": "mainnet", "address": {"$in": [ROUTER, "0xmissing"]}}
+                ]
+            }
+        ]
+        assert (
+            database.get_many_contract_semantics(["0x1", "0x2"])["0x2"]["name"]
+            == "Router"
+        )
+
+        # misses are cached
+        database.get_many_address_semantics([("mainnet", ROUTER)])
+        assert len(queries) == 1
+
+    def test_size_is_bounded(self, database):
+        for index in range(20):
+            insert(database, f"0x{index}", f"0xc{index}", str(index))
+            self.read(database, f"0x{index}")
+
+        assert len(database._entries) == 10
+
+
+class TestSemanticsInvalidationBus:
+    def worker(self, path, max_size=1024 * 1024):
+        """Bus of another worker process."""
+        bus = SemanticsInvalidationBus.__new__(SemanticsInvalidationBus)
+        bus.__init__(path, max_size)
+        received = []
+        bus.subscribe(
+            lambda chain_id, addresses: received.append(addresses),
+            lambda: received.append("reset"),
+        )
+        return bus, received
+
+    def test_invalidations_are_broadcast(self, tmp_path):
+        path = str(tmp_path / "invalidations.log")
+        first, first_received = self.worker(path)
+        second, second_received = self.worker(path)
+
+        first.publish("mainnet", [TOKEN])
+        assert first_received == [[TOKEN]]
+        assert second_received == []
+
+        second.poll()
+        second.poll()
+        assert second_received == [[TOKEN]]
+
+    def test_new_worker_skips_past_invalidations(self, tmp_path):
+        path = str(tmp_path / "invalidations.log")
+        first, _ = self.worker(path)
+        first.publish("mainnet", [TOKEN])
+
+        second, second_received = self.worker(path)
+        second.poll()
+
+        assert second_received == []
+
+    def test_partial_line_is_read_later(self, tmp_path):
+        path = str(tmp_path / "invalidations.log")
+        bus, received = self.worker(path)
+
+        with open(path, "a") as f:
+            f.write('{"chain_id": "mainnet", "addresses": ["0xtoken"]')
+        bus.poll()
+        assert received == []
+
+        with open(path, "a") as f:
+            f.write("}\n")
+        bus.poll()
+        assert received == [[TOKEN]]
+
+    def test_log_is_rotated(self, tmp_path):
+        path = str(tmp_path / "invalidations.log")
+        first, _ = self.worker(path, max_size=300)
+        second, second_received = self.worker(path, max_size=300)
+
+        addresses = [f"0x{index:040x}" for index in range(10)]
+        for address in addresses:
+            first.publish("mainnet", [address])
+            assert os.path.getsize(path) <= 300
+            second.poll()
+
+        assert os.path.exists(path + ".1")
+        assert second_received == [[address] for address in addresses]
+
+    def test_worker_behind_rotated_generation_reads_it(self, tmp_path):
+        path = str(tmp_path / "invalidations.log")
+        first, _ = self.worker(path, max_size=300)
+        first.publish("mainnet", [TOKEN])
+        second, second_received = self.worker(path, max_size=300)
+
+        addresses = [f"0x{index:040x}" for index in range(3)]
+        for address in addresses:
+            first.publish("mainnet", [address])
+        second.poll()
+
+        assert second_received == [[address] for address in addresses]
+
+    def test_worker_missing_generation_resets(self, tmp_path):
+        path = str(tmp_path / "invalidations.log")
+        first, _ = self.worker(path, max_size=300)
+        first.publish("mainnet", [TOKEN])
+        second, second_received = self.worker(path, max_size=300)
+
+        addresses = [f"0x{index:040x}" for index in range(10)]
+        for address in addresses:
+            first.publish("mainnet", [address])
+        second.poll()
+
+        assert second_received[0] == "reset"
+        assert second_received[-1] == [addresses[-1]]
+
+
+class TestSharedSemanticsStore:
+    @pytest.fixture
+    def mongo(self):
+        db = mongomock.MongoClient().db
+        mongo = MongoSemanticsDatabase(db)
+        mongo._addresses, mongo._contracts = db.addresses, db.contracts
+        insert(mongo, TOKEN, "0x1", "Token")
+        return mongo
+
+    def test_workers_share_records(self, mongo, tmp_path):
+        first = CachedSemanticsDatabase(
+            mongo, store=SharedSemanticsStore(str(tmp_path), 1024 * 1024)
+        )
+        second = CachedSemanticsDatabase(
+            mongo, store=SharedSemanticsStore(str(tmp_path), 1024 * 1024)
+        )
+
+        first.get_address_semantics("mainnet", TOKEN)
+        mongo._addresses.delete_many({})
+
+        assert second.get_address_semantics("mainnet", TOKEN)["contract"] == "0x1"
+        assert first.store.stats() == {"hits": 0, "misses": 1}
+        assert second.store.stats() == {"hits": 1, "misses": 0}
+
+    def test_evict_removes_shared_records(self, mongo, tmp_path):
+        store = SharedSemanticsStore(str(tmp_path), 1024 * 1024)
+        database = CachedSemanticsDatabase(mongo, store=store)
+        database.get_address_semantics("mainnet", TOKEN)
+
+        database.evict("mainnet", [TOKEN])
+
+        assert store.get(("address", "mainnet", TOKEN)) is None
+
+    def test_size_is_bounded(self, tmp_path):
+        store = SharedSemanticsStore(str(tmp_path), 4096)
+        store.EVICTION_CHECK_INTERVAL = 1
+
+        for index in range(100):
+            store.set(("contract", str(index)), {"abi": "x" * 100})
+
+        assert sum(f.stat().st_size for f in tmp_path.iterdir()) <= 4096
+        assert store.get(("contract", "99")) is not None
+
+    def test_record_evicted_while_loading_is_not_cached(
+        self, mongo, tmp_path, monkeypatch
+    ):
+        store = SharedSemanticsStore(str(tmp_path), 1024 * 1024)
+        database = CachedSemanticsDatabase(mongo, store=store)
+        key = ("address", "mainnet", TOKEN)
+        find_one = mongo._addresses.find_one
+
+        def find_one_and_evict(*args, **kwargs):
+            record = find_one(*args, **kwargs)
+            # semantics written and evicted by a concurrent request
+            database.evict("mainnet", [TOKEN])
+            return record
+
+        monkeypatch.setattr(mongo._addresses, "find_one", find_one_and_evict)
+        assert database.get_address_semantics("mainnet", TOKEN)["contract"] == "0x1"
+        assert key not in database._entries and store.get(key) is None
+
+        monkeypatch.undo()
+        database.get_address_semantics("mainnet", TOKEN)
+        assert key in database._entries and store.get(key) is not None
+
+    def test_records_of_other_versions_are_not_read(self, tmp_path):
+        SharedSemanticsStore(str(tmp_path), 1024 * 1024, "0.3.21").set(
+            ("contract", "0x1"), {"name": "Token"}
+        )
+
+        store = SharedSemanticsStore(str(tmp_path), 1024 * 1024, "0.3.22")
+        assert store.get(("contract", "0x1")) is None
+        store.set(("contract", "0x1"), {"name": "Token"})
+        assert store.get(("contract", "0x1")) == {"name": "Token"}
@@ -0,0 +1,77 @@
+import datetime
+from decimal import Decimal
+
+import jsonpickle
+import pytest
+from flask import Flask, jsonify
+
+from app.api.formats import MSGPACK_INT_RANGE
+from app.api.utils import delete_bstrings, jsonable, native
+from tests.mocks.mocks import Mocks
+
+
+def legacy_jsonable(obj):
+    return delete_bstrings(
+        jsonpickle.decode(
+            jsonpickle.encode(obj, make_refs=False, unpicklable=False, use_decimal=True)
+        )
+    )
+
+
+class TestJsonable:
+    @pytest.fixture
+    def app(self):
+        app = Flask(__name__)
+        with app.app_context():
+            yield app
+
+    @pytest.mark.parametrize(
+        "obj",
+        [
+            Mocks.get_mocked_decoded_transaction().dict(),
+            {
+                "numbers": [0, -5, 10**30, 1.5, 2.0, 1e16, 1e-7],
+                "decimals": [
+                    Decimal("10"),
+                    Decimal("1.5"),
+                    Decimal("-0"),
+                    Decimal("1E+30"),
+                ],
+                "other": (b"bytes", True, None, {1, 2}, datetime.date(2022, 1, 1)),
+                "keys": {None: 1, 1: 2, 1.5: 4, (1, 2): 5},
+                "bool_keys": {True: 1, False: 2},
+            },
+            [float("inf"), float("nan")],
+        ],
+    )
+    def test_same_output_as_legacy_round_trip(self, app, obj):
+        assert jsonify(jsonable(obj)).data == jsonify(legacy_jsonable(obj)).data
+
+    def test_unknown_type_falls_back_to_round_trip(self, app):
+        class Unknown:
+            def __init__(self):
+                self.value = 1
+
+        assert jsonable(Unknown()) == {"value": "1"}
+
+
+class TestNative:
+    def test_keeps_integers_and_bytes(self):
+        obj = {"value": 10**30, "data": b"\x00\x01", "amount": Decimal("1E+3")}
+
+        assert native(obj) == {"value": 10**30, "data": b"\x00\x01", "amount": 1000}
+
+    def test_stringifies_integers_out_of_range_and_fractions(self):
+        obj = [2**64 - 1, 2**64, -(2**63) - 1, Decimal("1.5")]
+
+        assert native(obj, MSGPACK_INT_RANGE) == [
+            2**64 - 1,
+            str(2**64),
+            str(-(2**63) - 1),
+            "1.5",
+        ]
+
+    def test_same_structure_as_jsonable(self):
+        obj = Mocks.get_mocked_decoded_transaction().dict()
+
+        assert jsonable(native(obj)) == jsonable(obj)
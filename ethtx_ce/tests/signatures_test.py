@@ -0,0 +1,154 @@
+from functools import partial
+from unittest.mock import MagicMock
+
+import mongomock
+import pytest
+from ethtx.models.semantics_model import Signature, SignatureArg
+from ethtx.providers.semantic_providers import (
+    MongoSemanticsDatabase,
+    SemanticsRepository,
+)
+
+from app.semantics_cache import CachedSemanticsDatabase
+from app.signatures import SignatureIndex, most_used_signature
+
+TRANSFER = "0xa9059cbb"
+TRANSFER_EVENT = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+TRANSFER_SIGNATURE = Signature(
+    signature_hash=TRANSFER,
+    name="transfer",
+    args=[
+        SignatureArg(name="to", type="address"),
+        SignatureArg(name="value", type="uint256"),
+    ],
+)
+
+
+def parameter(name, type_, indexed=False):
+    return {"parameter_name": name, "parameter_type": type_, "indexed": indexed}
+
+
+def contract(code_hash):
+    return {
+        "code_hash": code_hash,
+        "name": "Token",
+        "functions": {
+            TRANSFER: {
+                "signature": TRANSFER,
+                "name": "transfer",
+                "inputs": [parameter("to", "address"), parameter("value", "uint256")],
+                "outputs": [],
+            },
+            "constructor": {"signature": "constructor", "name": "constructor"},
+        },
+        "events": {
+            TRANSFER_EVENT: {
+                "signature": TRANSFER_EVENT,
+                "name": "Transfer",
+                "anonymous": False,
+                "parameters": [
+                    parameter("from", "address", True),
+                    parameter("to", "address", True),
+                    parameter("value", "uint256"),
+                ],
+            }
+        },
+    }
+
+
+class TestSignatureIndex:
+    @pytest.fixture
+    def mongo(self):
+        db = mongomock.MongoClient().db
+        mongo = MongoSemanticsDatabase(db)
+        # collection names are built from an enum format, which differs between python versions
+        mongo._contracts, mongo._signatures = db.contracts, db.signatures
+        mongo.insert_contract(contract("0x1"))
+        mongo.insert_contract(contract("0x2"))
+        return mongo
+
+    @pytest.fixture
+    def index(self, mongo, tmp_path):
+        return SignatureIndex(mongo, str(tmp_path / "signatures.pickle"))
+
+    def test_index_is_built_from_contracts(self, index):
+        assert index.functions(TRANSFER) is None
+
+        index.refresh()
+
+        [function] = index.functions(TRANSFER)
+        assert function["name"] == "transfer" and function["count"] == 2
+        assert [arg["type"] for arg in function["args"]] == ["address", "uint256"]
+        [event] = index.events(TRANSFER_EVENT)
+        assert event["name"] == "Transfer"
+        assert [arg["indexed"] for arg in event["args"]] == [True, True, False]
+
+    def test_index_is_reloaded_and_caught_up(self, index, mongo):
+        index.refresh()
+        mongo._contracts.delete_many({})
+        mongo.insert_contract({**contract("0x3"), "functions": {}, "events": {}})
+        mongo.insert_signature(
+            Signature(
+                signature_hash="0x12345678",
+                name="guessed",
+                args=[SignatureArg(name="arg_0", type="uint256")],
+            ).dict()
+        )
+
+        reloaded = SignatureIndex(mongo, index.path)
+        reloaded.refresh()
+
+        assert reloaded.functions(TRANSFER)[0]["count"] == 2  # from the file
+        assert reloaded.functions("0x12345678")[0]["name"] == "guessed"
+        assert reloaded.stats()["contracts"] == 3
+
+    def repository(self, mongo, index):
+        database = CachedSemanticsDatabase(mongo)
+        database.signatures = index
+        repository = SemanticsRepository(database, *(MagicMock(),) * 3)
+        repository.get_most_used_signature = partial(most_used_signature, repository)
+        return repository
+
+    def test_repository_guesses_from_index(self, index, mongo):
+        index.refresh()
+        repository = self.repository(mongo, index)
+
+        signature = repository.get_most_used_signature(TRANSFER)
+        assert signature.name == "transfer" and signature.count == 2
+
+        # signatures are counted in against the database, not the derived candidates
+        repository.update_or_insert_signature(TRANSFER_SIGNATURE)
+        [stored] = mongo._signatures.find({"signature_hash": TRANSFER})
+        assert stored["count"] == 1
+        assert [arg["name"] for arg in stored["args"]] == ["to", "value"]
+        assert index.functions(TRANSFER)[0]["_id"] == stored["_id"]
+
+    def test_workers_with_stale_indexes_count_signatures_once(self, mongo, tmp_path):
+        workers = []
+        for i in range(2):
+            index = SignatureIndex(mongo, str(tmp_path / f"signatures{i}.pickle"))
+            index.refresh()
+            workers.append(self.repository(mongo, index))
+
+        for repository in workers * 2:
+            repository.update_or_insert_signature(TRANSFER_SIGNATURE)
+
+        stored = list(mongo._signatures.find({"signature_hash": TRANSFER}))
+        assert [(s["name"], s["count"]) for s in stored] == [("transfer", 4)]
+
+    def test_contracts_stored_through_database_are_indexed(self, index, mongo):
+        index.refresh()
+        database = CachedSemanticsDatabase(mongo)
+        database.signatures = index
+
+        database.insert_contract(
+            {
+                "code_hash": "0x4",
+                "functions": {
+                    "0xdeadbeef": {"signature": "0xdeadbeef", "name": "f", "inputs": []}
+                },
+                "events": {},
+            }
+        )
+
+        assert index.functions("0xdeadbeef")[0]["name"] == "f"
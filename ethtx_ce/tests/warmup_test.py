@@ -0,0 +1,123 @@
+import json
+import logging
+import multiprocessing
+import threading
+import time
+
+import mongomock
+import pytest
+from ethtx.providers.semantic_providers import MongoSemanticsDatabase
+
+from app.semantics_cache import CachedSemanticsDatabase
+from app.warmup import (
+    HotAddresses,
+    SemanticsWarmup,
+    parse_addresses,
+    warm_up_semantics,
+)
+
+
+class TestWarmup:
+    @pytest.fixture
+    def mongo(self):
+        db = mongomock.MongoClient().db
+        mongo = MongoSemanticsDatabase(db)
+        mongo._addresses, mongo._contracts = db.addresses, db.contracts
+        for index in range(3):
+            mongo.insert_address(
+                {"chain_id": "mainnet", "address": f"0x{index}", "contract": "0xc"}
+            )
+        mongo.insert_contract({"code_hash": "0xc"})
+        return mongo
+
+    def test_parse_addresses(self):
+        assert parse_addresses(" 0xAB, goerli:0xcd,,", "mainnet") == [
+            ("mainnet", "0xab"),
+            ("goerli", "0xcd"),
+        ]
+
+    def test_warm_up_loads_records(self, mongo, caplog):
+        database = CachedSemanticsDatabase(mongo)
+
+        with caplog.at_level(logging.INFO):
+            warm_up_semantics(database, [("mainnet", "0x0"), ("mainnet", "0xmissing")])
+
+        assert set(database._entries) == {
+            ("address", "mainnet", "0x0"),
+            ("contract", "0xc"),
+        }
+        assert "1 of 2 addresses loaded" in caplog.text
+
+    def test_hot_addresses_are_merged_from_workers(self, mongo, tmp_path):
+        path = str(tmp_path / "hot.json")
+        first = HotAddresses(CachedSemanticsDatabase(mongo), path, top_n=2)
+        second = HotAddresses(CachedSemanticsDatabase(mongo), path, top_n=2)
+
+        for address in ["0x0", "0x1", "0x1"]:
+            first.database.get_address_semantics("mainnet", address)
+        first.refresh()
+        for address in ["0x0", "0x0", "0x2"]:
+            second.database.get_address_semantics("mainnet", address)
+        second.refresh()
+
+        assert second.read() == [("mainnet", "0x0"), ("mainnet", "0x1")]
+        assert not first.database.accesses
+
+    def test_warm_up_starts_lazily_once_per_process(self, mongo, monkeypatch):
+        database = CachedSemanticsDatabase(mongo)
+        runs = []
+        monkeypatch.setattr(
+            "app.warmup.warm_up_semantics",
+            lambda database, addresses: runs.append(addresses),
+        )
+
+        warmup = SemanticsWarmup(database, [("mainnet", "0x0")])
+        assert not runs
+
+        warmup.start()
+        warmup.start()
+        for thread in threading.enumerate():
+            if thread.name == "semantics-warm-up":
+                thread.join()
+
+        assert runs == [[("mainnet", "0x0")]]
+
+    def test_hot_addresses_decay(self, mongo, tmp_path):
+        path = tmp_path / "hot.json"
+        hot_addresses = HotAddresses(CachedSemanticsDatabase(mongo), str(path), top_n=2)
+        path.write_text(
+            json.dumps(
+                {
+                    "updated": time.time() - HotAddresses.HALF_LIFE,
+                    "addresses": [["mainnet", "0x0", 10], ["mainnet", "0x1", 4]],
+                }
+            )
+        )
+
+        for _ in range(4):
+            hot_addresses.database.get_address_semantics("mainnet", "0x2")
+        hot_addresses.refresh()
+
+        assert hot_addresses.read() == [("mainnet", "0x0"), ("mainnet", "0x2")]
+        assert json.loads(path.read_text())["addresses"][0][2] == pytest.approx(5)
+
+    def test_concurrent_workers_do_not_lose_counts(self, mongo, tmp_path):
+        path = str(tmp_path / "hot.json")
+
+        def worker():
+            hot_addresses = HotAddresses(CachedSemanticsDatabase(mongo), path, top_n=2)
+            for _ in range(20):
+                hot_addresses.database.get_address_semantics("mainnet", "0x0")
+                hot_addresses.refresh()
+
+        context = multiprocessing.get_context("fork")
+        processes = [context.Process(target=worker) for _ in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        counts, _ = HotAddresses(
+            CachedSemanticsDatabase(mongo), path, top_n=2
+        )._read_counts()
+        assert counts[("mainnet", "0x0")] == pytest.approx(80, abs=0.01)
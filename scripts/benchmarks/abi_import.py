@@ -0,0 +1,130 @@
+# Copyright 2021 DAI FOUNDATION (the original version https://github.com/daifoundation/ethtx_ce)
+# Copyright 2021-2022 Token Flow Insights SA (modifications to the original software as recorded
+# in the changelog https://github.com/EthTx/ethtx/blob/master/CHANGELOG.md)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# The product contains trademarks and other branding elements of Token Flow Insights SA which are
+# not licensed under the Apache 2.0 license. When using or reproducing the code, please remove
+# the trademark and/or other branding elements.
+
+
+"""
+Compare importing contract semantics one by one, as the semantics editor does, with the bulk import
+of the api, on synthetic ERC20 like contracts stored in an in-memory (mongomock) database.
+Run from the repository root:
+    PYTHONPATH=./ethtx_ce:./scripts/benchmarks python scripts/benchmarks/abi_import.py
+"""
+
+import time
+import warnings
+from typing import Dict, List
+
+import mongomock
+from ethtx.providers.semantic_providers import (
+    MongoSemanticsDatabase,
+    SemanticsRepository,
+)
+
+from app.abi import compile_semantics, signature_hash
+from app.semantics_import import import_semantics
+
+warnings.simplefilter("ignore", DeprecationWarning)
+
+CONTRACTS = 1000
+BATCH_SIZE = 500
+
+
+def erc20_abi(i: int) -> List[Dict]:
+    def function(name: str, *types: str) -> Dict:
+        return {
+            "type": "function",
+            "name": name,
+            "inputs": [{"name": f"arg{j}", "type": t} for j, t in enumerate(types)],
+            "outputs": [{"name": "", "type": "bool"}],
+        }
+
+    def event(name: str, *types: str) -> Dict:
+        return {
+            "type": "event",
+            "name": name,
+            "anonymous": False,
+            "inputs": [
+                {"name": f"arg{j}", "type": t, "indexed": j < 2}
+                for j, t in enumerate(types)
+            ],
+        }
+
+    return [
+        function("transfer", "address", "uint256"),
+        function("transferFrom", "address", "address", "uint256"),
+        function("approve", "address", "uint256"),
+        function("balanceOf", "address"),
+        function("allowance", "address", "address"),
+        function(f"mint{i}", "address", "uint256"),
+        function(f"configure{i}", "(address,uint256,bytes)[]"),
+        event("Transfer", "address", "address", "uint256"),
+        event("Approval", "address", "address", "uint256"),
+        event(f"Configured{i}", "address", "bytes"),
+    ]
+
+
+def database() -> MongoSemanticsDatabase:
+    db = mongomock.MongoClient().db
+    mongo = MongoSemanticsDatabase(db)
+    mongo._addresses, mongo._contracts, mongo._signatures = (
+        db.addresses,
+        db.contracts,
+        db.signatures,
+    )
+    return mongo
+
+
+def main() -> None:
+    records = [
+        dict(
+            chain_id="mainnet",
+            address=f"0x{i:040x}",
+            abi=erc20_abi(i),
+            code_hash=f"0x{i:064x}",
+            name=f"Token{i}",
+        )
+        for i in range(CONTRACTS)
+    ]
+
+    start = time.perf_counter()
+    semantics = [compile_semantics(**record) for record in records]
+    compile_time = time.perf_counter() - start
+    hashes = signature_hash.cache_info()
+    print(
+        f"compile {CONTRACTS} ABI: {compile_time * 1000:7.1f} ms, "
+        f"signature hashes {hashes.misses} computed, {hashes.hits} memoized"
+    )
+
+    repository = SemanticsRepository(database(), None, None, None)
+    start = time.perf_counter()
+    for address_semantics in semantics:
+        repository.update_semantics(address_semantics)
+    single = time.perf_counter() - start
+    print(
+        f"one by one:      {single * 1000:7.1f} ms, {CONTRACTS / single:8.0f} contracts/s"
+    )
+
+    mongo = database()
+    start = time.perf_counter()
+    for i in range(0, CONTRACTS, BATCH_SIZE):
+        import_semantics(mongo, semantics[i : i + BATCH_SIZE])
+    bulk = time.perf_counter() - start
+    print(
+        f"bulk import:     {bulk * 1000:7.1f} ms, {CONTRACTS / bulk:8.0f} contracts/s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# Copyright 2021 DAI FOUNDATION (the original version https://github.com/daifoundation/ethtx_ce)
+# Copyright 2021-2022 Token Flow Insights SA (modifications to the original software as recorded
+# in the changelog https://github.com/EthTx/ethtx/blob/master/CHANGELOG.md)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# The product contains trademarks and other branding elements of Token Flow Insights SA which are
+# not licensed under the Apache 2.0 license. When using or reproducing the code, please remove
+# the trademark and/or other branding elements.
+
+"""
+Measure the compression middleware on a decoded transaction api response: sizes and latency of the first
+(compressed) and the following (precompressed, cached by ETag) responses per encoding.
+Run from the repository root:
+    PYTHONPATH=./ethtx_ce:./scripts/benchmarks python scripts/benchmarks/compression.py
+"""
+
+import timeit
+import warnings
+
+from flask import Flask, jsonify, request
+from werkzeug.test import Client
+
+from app.api.utils import jsonable
+from app.compression import CompressionMiddleware
+from corpus import decoded_transaction
+
+warnings.simplefilter("ignore", DeprecationWarning)
+
+
+def create_app(payload: dict) -> Flask:
+    app = Flask(__name__)
+
+    @app.route("/tx")
+    def tx():
+        response = jsonify(jsonable(payload))
+        response.add_etag()
+        return response.make_conditional(request)
+
+    return app
+
+
+def main(repeat: int = 5) -> None:
+    app = create_app(decoded_transaction().dict())
+    middleware = CompressionMiddleware(app.wsgi_app)
+    app.wsgi_app = middleware
+    client = Client(app)
+
+    plain = client.get("/tx")
+    print(f"{'identity':>10}: {len(plain.data) / 1024:8.1f} KiB")
+
+    for encoding in middleware.encoders:
+        headers = {"Accept-Encoding": encoding}
+
+        def first():
+            middleware.cache = type(middleware.cache)(middleware.cache.max_size)
+            return client.get("/tx", headers=headers)
+
+        size = len(first().data)
+        cold = min(timeit.repeat(first, number=1, repeat=repeat))
+        warm = min(
+            timeit.repeat(
+                lambda: client.get("/tx", headers=headers), number=1, repeat=repeat
+            )
+        )
+        print(
+            f"{encoding:>10}: {size / 1024:8.1f} KiB ({len(plain.data) / size:.1f}x), "
+            f"compressed {cold * 1000:.1f} ms, cached {warm * 1000:.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+# Copyright 2021 DAI FOUNDATION (the original version https://github.com/daifoundation/ethtx_ce)
+# Copyright 2021-2022 Token Flow Insights SA (modifications to the original software as recorded
+# in the changelog https://github.com/EthTx/ethtx/blob/master/CHANGELOG.md)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# The product contains trademarks and other branding elements of Token Flow Insights SA which are
+# not licensed under the Apache 2.0 license. When using or reproducing the code, please remove
+# the trademark and/or other branding elements.
+
+"""Synthetic decoded transactions used by the benchmarks."""
+
+import random
+from datetime import datetime
+from decimal import Decimal
+from typing import List
+
+from ethtx.models.decoded_model import (
+    AddressInfo,
+    Argument,
+    DecodedBalance,
+    DecodedCall,
+    DecodedEvent,
+    DecodedTransaction,
+    DecodedTransactionMetadata,
+    DecodedTransfer,
+)
+from ethtx.models.objects_model import BlockMetadata
+
+TIMESTAMP = datetime(2022, 1, 1, 12, 0, 0)
+TX_HASH = "0x" + "ab" * 32
+
+
+def _address(rnd: random.Random) -> AddressInfo:
+    address = "0x" + "".join(rnd.choice("0123456789abcdef") for _ in range(40))
+    return AddressInfo(
+        address=address, name=f"Contract{rnd.randint(0, 99)}", badge=None
+    )
+
+
+def _arguments(rnd: random.Random) -> List[Argument]:
+    return [
+        Argument(name="amount", type="uint256", value=rnd.randint(0, 10**30)),
+        Argument(
+            name="ratio", type="uint256", value=Decimal(rnd.randint(0, 10**6)) / 1000
+        ),
+        Argument(name="recipient", type="address", value=_address(rnd).dict()),
+        Argument(name="data", type="bytes", value="0x" + "00" * 32),
+    ]
+
+
+def _call(
+    rnd: random.Random, call_id: str, indent: int, fanout: int, depth: int
+) -> DecodedCall:
+    return DecodedCall(
+        chain_id="mainnet",
+        timestamp=TIMESTAMP,
+        tx_hash=TX_HASH,
+        call_id=call_id,
+        call_type="call",
+        from_address=_address(rnd),
+        to_address=_address(rnd),
+        value=Decimal(0),
+        function_signature="0xa9059cbb",
+        function_name="transfer",
+        arguments=_arguments(rnd),
+        outputs=[Argument(name="", type="bool", value=True)],
+        gas_used=rnd.randint(21000, 100000),
+        error=None,
+        status=True,
+        indent=indent,
+        subcalls=(
+            [
+                _call(rnd, f"{call_id}_{index}", indent + 1, fanout, depth - 1)
+                for index in range(fanout)
+            ]
+            if depth
+            else []
+        ),
+    )
+
+
+def decoded_transaction(
+    fanout: int = 4, depth: int = 5, events: int = 500, seed: int = 0
+) -> DecodedTransaction:
+    """Decoded transaction with `fanout ** depth` calls at the bottom level of the call tree."""
+    rnd = random.Random(seed)
+    sender, receiver = _address(rnd), _address(rnd)
+
+    return DecodedTransaction(
+        block_metadata=BlockMetadata(
+            block_number=15000000,
+            block_hash="0x" + "cd" * 32,
+            timestamp=TIMESTAMP,
+            parent_hash="0x" + "ef" * 32,
+            miner=sender.address,
+            gas_limit=30000000,
+            gas_used=15000000,
+            tx_count=200,
+        ),
+        metadata=DecodedTransactionMetadata(
+            chain_id="mainnet",
+            tx_hash=TX_HASH,
+            block_number=15000000,
+            block_hash="0x" + "cd" * 32,
+            timestamp=TIMESTAMP,
+            gas_price=30,
+            from_address=sender.address,
+            to_address=receiver.address,
+            sender=sender,
+            receiver=receiver,
+            tx_index=0,
+            tx_value=0,
+            gas_limit=3000000,
+            gas_used=2500000,
+            success=True,
+        ),
+        events=[
+            DecodedEvent(
+                chain_id="mainnet",
+                tx_hash=TX_HASH,
+                timestamp=TIMESTAMP,
+                contract=_address(rnd),
+                index=index,
+                call_id="0",
+                event_signature="0xddf252ad",
+                event_name="Transfer",
+                parameters=_arguments(rnd),
+            )
+            for index in range(events)
+        ],
+        calls=_call(rnd, "0", 0, fanout, depth),
+        transfers=[
+            DecodedTransfer(
+                from_address=_address(rnd),
+                to_address=_address(rnd),
+                token_address=receiver.address,
+                token_symbol="TKN",
+                token_standard="ERC20",
+                value=Decimal(rnd.randint(0, 10**9)) / 10**6,
+            )
+            for _ in range(events // 2)
+        ],
+        balances=[
+            DecodedBalance(
+                holder=_address(rnd),
+                tokens=[
+                    dict(
+                        token_address=receiver.address,
+                        token_symbol="TKN",
+                        token_standard="ERC20",
+                        balance="{:,.4f}".format(rnd.random() * 1000),
+                    )
+                ],
+            )
+            for _ in range(events // 10)
+        ],
+        status=True,
+    )
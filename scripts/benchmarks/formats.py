@@ -0,0 +1,76 @@
+# Copyright 2021 DAI FOUNDATION (the original version https://github.com/daifoundation/ethtx_ce)
+# Copyright 2021-2022 Token Flow Insights SA (modifications to the original software as recorded
+# in the changelog https://github.com/EthTx/ethtx/blob/master/CHANGELOG.md)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# The product contains trademarks and other branding elements of Token Flow Insights SA which are
+# not licensed under the Apache 2.0 license. When using or reproducing the code, please remove
+# the trademark and/or other branding elements.
+
+"""
+Compare api response formats on a corpus of large decoded transactions: payload size, encode time
+(from the decoded transaction dict to response bytes) and decode time (response bytes to objects).
+Run from the repository root:
+    PYTHONPATH=./ethtx_ce:./scripts/benchmarks python scripts/benchmarks/formats.py
+"""
+
+import json
+import timeit
+import warnings
+
+import cbor2
+import msgpack
+from flask import Flask, jsonify
+
+from app.api.formats import RESPONSE_FORMATS
+from app.api.utils import jsonable
+from corpus import decoded_transaction
+
+warnings.simplefilter("ignore", DeprecationWarning)
+
+CORPUS = {
+    "4^5 calls, 500 events": dict(fanout=4, depth=5, events=500),
+    "8^4 calls, 2000 events": dict(fanout=8, depth=4, events=2000),
+    "3^8 calls, 5000 events": dict(fanout=3, depth=8, events=5000),
+}
+FORMATS = {
+    "json": (lambda payload: jsonify(jsonable(payload)).data, json.loads),
+    "msgpack": (
+        RESPONSE_FORMATS["application/msgpack"].dumps,
+        lambda data: msgpack.unpackb(data, raw=False),
+    ),
+    "cbor": (RESPONSE_FORMATS["application/cbor"].dumps, cbor2.loads),
+}
+
+
+def best(func, repeat: int) -> float:
+    return min(timeit.repeat(func, number=1, repeat=repeat)) * 1000
+
+
+def main(repeat: int = 3) -> None:
+    app = Flask(__name__)
+
+    with app.app_context():
+        for name, params in CORPUS.items():
+            payload = decoded_transaction(**params).dict()
+            print(name)
+
+            for format_name, (dumps, loads) in FORMATS.items():
+                body = dumps(payload)
+                encode = best(lambda: dumps(payload), repeat)
+                decode = best(lambda: loads(body), repeat)
+                print(
+                    f"{format_name:>10}: {len(body) / 1024 / 1024:6.2f} MiB, "
+                    f"encode {encode:7.1f} ms, decode {decode:7.1f} ms"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# Copyright 2021 DAI FOUNDATION (the original version https://github.com/daifoundation/ethtx_ce)
+# Copyright 2021-2022 Token Flow Insights SA (modifications to the original software as recorded
+# in the changelog https://github.com/EthTx/ethtx/blob/master/CHANGELOG.md)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# The product contains trademarks and other branding elements of Token Flow Insights SA which are
+# not licensed under the Apache 2.0 license. When using or reproducing the code, please remove
+# the trademark and/or other branding elements.
+
+"""
+Compare gunicorn workers with and without the preloaded app (PRELOAD_APP): worker spawn time
+(fork until the worker is ready) and memory (RSS, PSS and private USS) of each worker.
+Linux only. Run from the repository root:
+    PYTHONPATH=./ethtx_ce:./scripts/benchmarks python scripts/benchmarks/preload.py [workers]
+"""
+
+import json
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+PORT = 5099
+
+
+def memory(pid):
+    """Rss, Pss and Uss of the process in MiB."""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                values[parts[0].rstrip(":")] = int(parts[1]) / 1024
+
+    return {
+        "rss": values["Rss"],
+        "pss": values["Pss"],
+        "uss": values["Private_Clean"] + values["Private_Dirty"],
+    }
+
+
+def run(preload, workers):
+    events_file = tempfile.mktemp(suffix=".ndjson")
+    env = dict(
+        os.environ,
+        PRELOAD_APP="true" if preload else "false",
+        WEB_CONCURRENCY=str(workers),
+        BIND=f"127.0.0.1:{PORT}",
+        ACCESS_LOG="",
+        BENCHMARK_EVENTS_FILE=events_file,
+        MONGO_CONNECTION_STRING=os.getenv(
+            "MONGO_CONNECTION_STRING", "mongomock://localhost/ethtx"
+        ),
+    )
+    start = time.time()
+    master = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            "-c",
+            "scripts/benchmarks/preload_conf.py",
+            "app.wsgi:app",
+        ],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+    try:
+        events = []
+        while len(events) < workers:
+            if time.time() - start > 120 or master.poll() is not None:
+                raise RuntimeError("gunicorn workers did not start")
+            time.sleep(0.05)
+            if os.path.exists(events_file):
+                with open(events_file) as f:
+                    events = [json.loads(line) for line in f]
+        started = time.time() - start
+
+        # touch the app in every worker
+        for _ in range(workers * 5):
+            urllib.request.urlopen(f"http://127.0.0.1:{PORT}/").read()
+
+        usage = [memory(event["pid"]) for event in events]
+    finally:
+        master.send_signal(signal.SIGTERM)
+        master.wait()
+        if os.path.exists(events_file):
+            os.remove(events_file)
+
+    return {
+        "started": started,
+        "spawn": statistics.mean(event["spawn"] for event in events),
+        **{
+            key: statistics.mean(u[key] for u in usage) for key in ("rss", "pss", "uss")
+        },
+    }
+
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+
+    results = {preload: run(preload, workers) for preload in (False, True)}
+
+    print(f"{workers} workers, per worker means")
+    print(
+        f"{'mode':<10} {'all ready':>10} {'spawn':>10} {'rss':>10} {'pss':>10} {'uss':>10}"
+    )
+    for preload, result in results.items():
+        print(
+            f"{'preload' if preload else 'default':<10} "
+            f"{result['started']:>9.2f}s {result['spawn']:>9.3f}s "
+            f"{result['rss']:>7.1f}MiB {result['pss']:>7.1f}MiB {result['uss']:>7.1f}MiB"
+        )
+
+    default, preload = results[False], results[True]
+    print(
+        f"preload saves {default['pss'] - preload['pss']:.1f} MiB PSS "
+        f"({default['uss'] - preload['uss']:.1f} MiB private) per worker, "
+        f"worker spawn {default['spawn']:.3f}s -> {preload['spawn']:.3f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
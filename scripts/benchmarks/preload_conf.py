@@ -0,0 +1,39 @@
+# Copyright 2021 DAI FOUNDATION (the original version https://github.com/daifoundation/ethtx_ce)
+# Copyright 2021-2022 Token Flow Insights SA (modifications to the original software as recorded
+# in the changelog https://github.com/EthTx/ethtx/blob/master/CHANGELOG.md)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# The product contains trademarks and other branding elements of Token Flow Insights SA which are
+# not licensed under the Apache 2.0 license. When using or reproducing the code, please remove
+# the trademark and/or other branding elements.
+
+"""
+Gunicorn config of the preload benchmark: `gunicorn_conf.py` recording when workers are ready.
+"""
+
+import json
+import os
+import time
+
+import gunicorn_conf
+from gunicorn_conf import *  # noqa: F401,F403
+
+
+def post_fork(server, worker):
+    worker.forked_at = time.time()
+    gunicorn_conf.post_fork(server, worker)
+
+
+def post_worker_init(worker):
+    with open(os.environ["BENCHMARK_EVENTS_FILE"], "a") as f:
+        f.write(
+            json.dumps({"pid": worker.pid, "spawn": time.time() - worker.forked_at})
+            + "\n"
+        )
@@ -0,0 +1,71 @@
+# Copyright 2021 DAI FOUNDATION (the original version https://github.com/daifoundation/ethtx_ce)
+# Copyright 2021-2022 Token Flow Insights SA (modifications to the original software as recorded
+# in the changelog https://github.com/EthTx/ethtx/blob/master/CHANGELOG.md)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# The product contains trademarks and other branding elements of Token Flow Insights SA which are
+# not licensed under the Apache 2.0 license. When using or reproducing the code, please remove
+# the trademark and/or other branding elements.
+
+"""
+Compare the api response serialization: the legacy jsonpickle round trip vs `jsonable`.
+Run from the repository root:
+    PYTHONPATH=./ethtx_ce:./scripts/benchmarks python scripts/benchmarks/serialization.py
+"""
+
+import timeit
+import warnings
+
+import jsonpickle
+from flask import Flask, jsonify
+
+from app.api.utils import delete_bstrings, jsonable
+from corpus import decoded_transaction
+
+warnings.simplefilter("ignore", DeprecationWarning)
+
+
+def legacy(payload):
+    return jsonify(
+        delete_bstrings(
+            jsonpickle.decode(
+                jsonpickle.encode(
+                    payload, make_refs=False, unpicklable=False, use_decimal=True
+                )
+            )
+        )
+    )
+
+
+def single_pass(payload):
+    return jsonify(jsonable(payload))
+
+
+def main(repeat: int = 5) -> None:
+    app = Flask(__name__)
+    payload = decoded_transaction().dict()
+
+    with app.app_context():
+        legacy_body, body = legacy(payload).data, single_pass(payload).data
+        assert legacy_body == body, "outputs differ"
+
+        print(f"payload: {len(body) / 1024 / 1024:.2f} MiB")
+        results = {}
+        for name, func in (("legacy", legacy), ("jsonable", single_pass)):
+            results[name] = min(
+                timeit.repeat(lambda: func(payload), number=1, repeat=repeat)
+            )
+            print(f"{name:>10}: {results[name] * 1000:.1f} ms")
+
+        print(f"   speedup: {results['legacy'] / results['jsonable']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# Copyright 2021 DAI FOUNDATION (the original version https://github.com/daifoundation/ethtx_ce)
+# Copyright 2021-2022 Token Flow Insights SA (modifications to the original software as recorded
+# in the changelog https://github.com/EthTx/ethtx/blob/master/CHANGELOG.md)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at: http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under the License is distributed
+# on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and limitations under the License.
+#
+# The product contains trademarks and other branding elements of Token Flow Insights SA which are
+# not licensed under the Apache 2.0 license. When using or reproducing the code, please remove
+# the trademark and/or other branding elements.
+
+"""
+Compare worker cold start (import and creation of both apps, `app.wsgi`) with the legacy version
+discovery (pkg_resources + GitPython) and with the current one (importlib.metadata + .git files).
+Every sample runs in a fresh interpreter. Run from the repository root:
+    PYTHONPATH=./ethtx_ce:./scripts/benchmarks python scripts/benchmarks/startup.py [samples]
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+
+LEGACY = """
+def legacy_get_versions():
+    import pkg_resources
+    from git import Repo
+
+    ethtx_version = pkg_resources.get_distribution("ethtx").version
+    try:
+        repo = Repo(helpers.__file__, search_parent_directories=True)
+        remote_url = repo.remote("origin").url
+        sha = repo.git.rev_parse(repo.head.commit.hexsha, short=True)
+    except Exception:
+        remote_url, sha = helpers._get_version_from_docker()
+    return ethtx_version, f"{helpers._clean_up_git_link(remote_url)}/tree/{sha}"
+
+helpers.get_versions = legacy_get_versions
+"""
+
+SAMPLE = """
+import time
+start = time.perf_counter()
+from app import helpers
+{patch}
+versions_start = time.perf_counter()
+helpers.get_versions()
+versions = time.perf_counter() - versions_start
+import app.wsgi
+print(time.perf_counter() - start, versions)
+"""
+
+
+def sample(legacy):
+    code = SAMPLE.format(patch=LEGACY if legacy else "")
+    env = dict(
+        os.environ,
+        MONGO_CONNECTION_STRING=os.getenv(
+            "MONGO_CONNECTION_STRING", "mongomock://localhost/ethtx"
+        ),
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    total, versions = output.split()[-2:]
+    return float(total), float(versions)
+
+
+def main():
+    samples = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    results = {}
+    for legacy in (True, False):
+        runs = [sample(legacy) for _ in range(samples)]
+        results[legacy] = (
+            statistics.median(run[0] for run in runs),
+            statistics.median(run[1] for run in runs),
+        )
+
+    print(f"median of {samples} cold starts")
+    print(f"{'discovery':<10} {'cold start':>12} {'versions':>12}")
+    for legacy, (total, versions) in results.items():
+        print(
+            f"{'legacy' if legacy else 'current':<10} {total:>11.3f}s {versions:>11.3f}s"
+        )
+
+    print(f"cold start saves {results[True][0] - results[False][0]:.3f}s")
+
+
+if __name__ == "__main__":
+    main()